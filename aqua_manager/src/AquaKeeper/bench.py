@@ -0,0 +1,469 @@
+# aqua_manager/src/AquaKeeper/bench.py
+# Mediciones rápidas (memoria / tiempos) para comparar implementaciones.
+# Uso: PYTHONPATH=src python3 -m AquaKeeper.bench [caso ...]
+from __future__ import annotations
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+from AquaKeeper.entidades.modelo import Stock, MatrizStock
+from AquaKeeper.config.constantes import TIPOS_PRODUCTO
+
+def _memoria(construir: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    obj = construir()
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return despues - antes
+
+def memoria_stock(n_clientes: int = 50000) -> None:
+    def con_dicts():
+        res = []
+        for i in range(n_clientes):
+            st = Stock()
+            for tipo in TIPOS_PRODUCTO:
+                st.disponer(tipo, float(i % 50))
+            res.append(st)
+        return res
+
+    def compacto():
+        m = MatrizStock(filas_iniciales=n_clientes)
+        res = []
+        for i in range(n_clientes):
+            st = m.nuevo_stock()
+            for tipo in TIPOS_PRODUCTO:
+                st.disponer(tipo, float(i % 50))
+            res.append(st)
+        return m, res
+
+    b_dict = _memoria(con_dicts)
+    b_comp = _memoria(compacto)
+    print(f"[memoria-stock] {n_clientes} clientes x {len(TIPOS_PRODUCTO)} tipos")
+    print(f"  Stock (dict por cliente): {b_dict / 1e6:8.2f} MB  ({b_dict / n_clientes:6.1f} B/cliente)")
+    print(f"  StockCompacto (matriz)  : {b_comp / 1e6:8.2f} MB  ({b_comp / n_clientes:6.1f} B/cliente)")
+    print(f"  ahorro: {100.0 * (1 - b_comp / b_dict):.1f}%")
+
+def _latencias(llamar: Callable[[], object], n: int) -> Dict[str, float]:
+    muestras = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        llamar()
+        muestras.append((time.perf_counter() - t0) * 1000.0)
+    muestras.sort()
+    return {"p50": muestras[len(muestras) // 2], "p95": muestras[int(len(muestras) * 0.95) - 1],
+            "media": sum(muestras) / len(muestras)}
+
+def web_latencia(n: int = 200) -> None:
+    from fastapi.testclient import TestClient   # requiere httpx (requirements-dev.txt)
+    from AquaKeeper.web.main import app
+    previo = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="aquakeeper-bench-"))  # /run-structured escribe en ./data
+    try:
+        with TestClient(app) as cli:
+            rutas = [
+                ("POST /run-structured", lambda: cli.post("/run-structured")),
+                ("GET  /api/resumen", lambda: cli.get("/api/resumen")),
+                ("GET  /api/piletas/P-MED/faltantes", lambda: cli.get("/api/piletas/P-MED/faltantes?razon=choque")),
+            ]
+            print(f"[web-latencia] {n} requests por ruta (ms)")
+            for nombre, llamar in rutas:
+                llamar()    # warm-up
+                r = _latencias(llamar, n)
+                print(f"  {nombre:34s} p50={r['p50']:7.3f}  p95={r['p95']:7.3f}  media={r['media']:7.3f}")
+    finally:
+        os.chdir(previo)
+
+def web_carga(clientes: int = 200, rondas: int = 3) -> None:
+    # Carga concurrente in-process: /run actual vs. el handler anterior (sync + redirect_stdout)
+    import asyncio
+    import io
+    from contextlib import redirect_stdout
+    import httpx
+    from fastapi import FastAPI
+    from AquaKeeper.demo import demo
+    from AquaKeeper.web.main import app
+    from AquaKeeper.web.ejecucion import capturar_salida
+
+    legado = FastAPI()
+
+    @legado.post("/run")
+    def run_legado():
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            demo()
+        return {"ok": True, "text": buf.getvalue()}
+
+    async def golpear(destino: FastAPI, esperado: str) -> Dict[str, float]:
+        transporte = httpx.ASGITransport(app=destino)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cli:
+            t0 = time.perf_counter()
+            resps = await asyncio.gather(*(cli.post("/run") for _ in range(clientes * rondas)))
+            dt = time.perf_counter() - t0
+        malas = sum(1 for r in resps if r.json()["text"] != esperado)
+        return {"rps": len(resps) / dt, "malas": malas}
+
+    previo, stdout = os.getcwd(), sys.stdout
+    os.chdir(tempfile.mkdtemp(prefix="aquakeeper-bench-"))
+    try:
+        esperado = capturar_salida(demo)[1]
+        print(f"[web-carga] {clientes} clientes concurrentes x {rondas} rondas contra POST /run")
+        async def correr():
+            async with app.router.lifespan_context(app):
+                actual = await golpear(app, esperado)
+            viejo = await golpear(legado, esperado)
+            return actual, viejo
+        actual, viejo = asyncio.run(correr())
+        sys.stdout = stdout     # el handler anterior puede dejar sys.stdout apuntando a un buffer ajeno
+        print(f"  anterior (redirect_stdout): {viejo['rps']:8.1f} req/s  respuestas mezcladas/incompletas={viejo['malas']}")
+        print(f"  actual (captura por ctx)  : {actual['rps']:8.1f} req/s  respuestas mezcladas/incompletas={actual['malas']}")
+    finally:
+        os.chdir(previo)
+
+def ingesta_lecturas(n_piletas: int = 100000, tam_lote: int = 5000, lotes: int = 20, repeticiones: int = 5) -> None:
+    # Mediana de `repeticiones` corridas (cada una sobre una flota nueva): una sola corrida varía ~±15%
+    import random
+    import statistics
+    from AquaKeeper.entidades.modelo import Pileta
+    from AquaKeeper.servicios.pileta_service import PiletaService
+
+    def flota() -> PiletaService:
+        svc = PiletaService()
+        for i in range(n_piletas):
+            svc.registrar_pileta(Pileta(id_pileta=f"P{i}", litros=25000, cliente_dni=str(i % 1000)))
+        return svc
+
+    rnd = random.Random(0)
+    datos = []
+    for k in range(lotes):
+        ids = [f"P{rnd.randrange(n_piletas)}" for _ in range(tam_lote)]
+        # lecturas alrededor de valores normales: solo una parte cruza algún umbral de alerta
+        datos.append((ids, [1e9 + k + rnd.random() for _ in ids], [rnd.gauss(7.4, 0.12) for _ in ids],
+                      [abs(rnd.gauss(15.0, 6.0)) for _ in ids], [min(1.0, abs(rnd.gauss(0.2, 0.12))) for _ in ids]))
+    total = tam_lote * lotes
+
+    def uno_a_uno() -> float:
+        svc = flota()
+        t0 = time.perf_counter()
+        for ids, _ts, ph, turb, algas in datos:
+            for i, a, b, c in zip(ids, ph, turb, algas):
+                svc.actualizar_lectura(i, a, b, c)
+        return total / (time.perf_counter() - t0)
+
+    def por_lote() -> float:
+        nonlocal reevaluadas
+        svc = flota()
+        t0 = time.perf_counter()
+        reevaluadas = sum(len(svc.aplicar_lecturas(*lote).reevaluadas) for lote in datos)
+        return total / (time.perf_counter() - t0)
+
+    reevaluadas = 0
+    tasas = {nombre: statistics.median(medir() for _ in range(repeticiones))
+             for nombre, medir in (("uno_a_uno", uno_a_uno), ("por_lote", por_lote))}
+    print(f"[ingesta-lecturas] {n_piletas} piletas, {lotes} lotes x {tam_lote} lecturas, mediana de {repeticiones}")
+    print(f"  actualizar_lectura (una a una): {tasas['uno_a_uno']:12.0f} lecturas/s")
+    print(f"  aplicar_lecturas (por lote)   : {tasas['por_lote']:12.0f} lecturas/s  "
+          f"({tasas['por_lote'] / tasas['uno_a_uno']:.2f}x, {reevaluadas} reevaluaciones)")
+
+def metricas_overhead(n: int = 200000) -> None:
+    from AquaKeeper import metricas
+    from AquaKeeper.entidades.modelo import Pileta
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    from AquaKeeper.patrones.strategy.dosificacion import estrategia_para
+
+    svc = PiletaService()
+    p = Pileta(id_pileta="P", litros=25000, cliente_dni="1")
+    strat = estrategia_para("mantenimiento")
+
+    def medir() -> Dict[str, float]:
+        res = {}
+        for nombre, llamar in (("estado_agua_porcentual", lambda: svc.estado_agua_porcentual(p)),
+                               ("calcular_dosis", lambda: strat.calcular_dosis(p))):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                llamar()
+            res[nombre] = (time.perf_counter() - t0) / n * 1e9
+        return res
+
+    activas = metricas.activas()
+    metricas.desactivar()
+    apagado = medir()
+    metricas.activar()
+    prendido = medir()
+    if not activas:
+        metricas.desactivar()
+    print(f"[metricas] {n} llamadas por método (ns/llamada)")
+    for nombre in apagado:
+        print(f"  {nombre:24s} apagadas={apagado[nombre]:8.1f}  activas={prendido[nombre]:8.1f}")
+
+def _vender(args) -> int:
+    ruta, n = args
+    from AquaKeeper.web.estado import crear_estado_sqlite
+    est = crear_estado_sqlite(ruta)
+    vendidas = 0
+    for _ in range(n):
+        try:
+            est.inv.descontar("CL-GR-1", 1.0)
+            vendidas += 1
+        except ValueError:
+            pass
+    return vendidas
+
+def sqlite_workers(workers: int = 4, intentos: int = 500) -> None:
+    # Varios procesos descontando del mismo SKU: ninguna unidad se vende dos veces
+    import multiprocessing
+    from AquaKeeper.web.estado import crear_estado_sqlite
+    ruta = os.path.join(tempfile.mkdtemp(prefix="aquakeeper-bench-"), "aquakeeper.db")
+    est = crear_estado_sqlite(ruta)
+    inicial = workers * intentos // 2
+    est.inv.reponer("CL-GR-1", inicial - est.inv.disponible("CL-GR-1"))
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        vendidas = pool.map(_vender, [(ruta, intentos)] * workers)
+    dt = time.perf_counter() - t0
+    print(f"[sqlite-workers] {workers} procesos x {intentos} descuentos de 1 sobre stock {inicial}")
+    print(f"  vendidas={sum(vendidas)} (por worker {vendidas})  quedan={est.inv.disponible('CL-GR-1')}  "
+          f"{workers * intentos / dt:.0f} descuentos/s")
+
+def repositorios(n_piletas: int = 1_000_000) -> None:
+    # Importar la flota a SQLite en una transacción, recorrerla con cursor y consultar por índice
+    from AquaKeeper.entidades.modelo import Pileta
+    from AquaKeeper.persistencia.repositorios import RepositoriosSQLite
+    repos = RepositoriosSQLite(os.path.join(tempfile.mkdtemp(prefix="aquakeeper-bench-"), "aquakeeper.db"))
+    piletas = (Pileta(f"P{i:07d}", 8000 + (i % 50) * 1000, str(i % (n_piletas // 5 or 1)), 7.4, 1.0, 0.1)
+               for i in range(n_piletas))
+    t0 = time.perf_counter()
+    repos.piletas.importar(piletas)
+    t1 = time.perf_counter()
+    n = sum(1 for _ in repos.piletas.iterar())
+    t2 = time.perf_counter()
+    for d in range(1000):
+        sum(1 for _ in repos.piletas.de_cliente(str(d)))
+    t3 = time.perf_counter()
+    print(f"[repositorios] {n_piletas} piletas")
+    print(f"  importar={t1 - t0:.2f}s ({n_piletas / (t1 - t0):.0f}/s)  recorrer={t2 - t1:.2f}s ({n} filas)  "
+          f"de_cliente x1000={(t3 - t2) * 1000:.0f}ms")
+
+def libro_stock(movimientos: int = 305000, clientes: int = 1000) -> None:
+    # Registrar movimientos en el libro y reabrirlo: snapshot + cola vs reproducir toda la historia
+    from pathlib import Path
+    from AquaKeeper.servicios.libro_stock import LibroStock
+    d = Path(tempfile.mkdtemp(prefix="aquakeeper-bench-"))
+    libro = LibroStock(d)
+    stocks = [libro.stock("local")] + [libro.stock(f"cliente:{i}") for i in range(clientes)]
+    t0 = time.perf_counter()
+    for i in range(movimientos):
+        stocks[i % len(stocks)].disponer("cloro-granulado", 1.0)
+    t1 = time.perf_counter()
+    libro.cerrar()
+    t2 = time.perf_counter()
+    libro = LibroStock(d)
+    t3 = time.perf_counter()
+    libro.reproducir()
+    t4 = time.perf_counter()
+    print(f"[libro-stock] {movimientos} movimientos, {clientes + 1} dueños, snapshot cada {libro.snapshot_cada}")
+    print(f"  registrar={movimientos / (t1 - t0):.0f} mov/s  abrir={1000 * (t3 - t2):.1f}ms "
+          f"(cola {libro.reaplicados})  reproducir todo={1000 * (t4 - t3):.0f}ms")
+
+def series_lecturas(piletas: int = 200, dias: int = 14, tam_lote: int = 5000) -> None:
+    # Historial por minuto: ingesta por lotes (intercalando piletas) y consultas de rango por mmap
+    from pathlib import Path
+    import numpy as np
+    from AquaKeeper.servicios.series_lecturas import SeriesLecturas
+    series = SeriesLecturas(Path(tempfile.mkdtemp(prefix="aquakeeper-bench-")), retencion_cruda_s=None)
+    minutos = dias * 24 * 60
+    inicio = 1735689600.0                       # 2025-01-01 UTC
+    ids = np.array([f"P{i:04d}" for i in range(piletas)], dtype=object)
+    rng = np.random.default_rng(0)
+    total = piletas * minutos
+    t0 = time.perf_counter()
+    for ini in range(0, total, tam_lote):
+        k = np.arange(ini, min(ini + tam_lote, total))
+        series.agregar_lote(ids[k % piletas].tolist(), inicio + 60.0 * (k // piletas), rng.normal(7.4, 0.2, len(k)),
+                            rng.gamma(2.0, 2.0, len(k)), rng.uniform(0, 0.3, len(k)))
+    t1 = time.perf_counter()
+    consultas = 2000
+    desde = inicio + 86400.0 * rng.integers(0, dias - 1, consultas)
+    t2 = time.perf_counter()
+    n = 0
+    for i, d in enumerate(desde.tolist()):
+        for v in series.rango(str(ids[i % piletas]), d, d + 86400.0):
+            n += len(v)
+    t3 = time.perf_counter()
+    # Tablero de toda la temporada por hora: resumen ya mantenido vs re-agregar los puntos crudos
+    from AquaKeeper.servicios.series_lecturas import resumir
+    fin = inicio + minutos * 60.0
+    t4 = time.perf_counter()
+    for i in range(100):
+        nivel, vistas = series.serie(str(ids[i % piletas]), inicio, fin, paso=3600)
+    t5 = time.perf_counter()
+    for i in range(100):
+        resumir(np.concatenate(series.rango(str(ids[i % piletas]), inicio, fin)), 3600)
+    t6 = time.perf_counter()
+    print(f"[series-lecturas] {piletas} piletas x {minutos} lecturas ({total * 20 / 2**20:.0f} MB)")
+    print(f"  ingesta={total / (t1 - t0):.0f} lecturas/s (con resúmenes hora/día)  rango de 1 día="
+          f"{(t3 - t2) / consultas * 1e6:.0f}us ({n // consultas} lecturas por consulta, sin copia)")
+    print(f"  {dias} días por hora: nivel={nivel} {(t5 - t4) * 10:.2f}ms  vs re-agregar crudo {(t6 - t5) * 10:.2f}ms")
+
+def guardar_cambios(n_piletas: int = 200_000, cambiadas: float = 0.01) -> None:
+    # Un día típico sobre una flota ya guardada: lecturas en ~1% de las piletas, movimientos de
+    # stock de algunos clientes y visitas. Checkpoint incremental vs volcar todo de nuevo.
+    import numpy as np
+    from AquaKeeper.entidades.modelo import Cliente, Pileta
+    from AquaKeeper.patrones.strategy.dosificacion import EstrategiaMantenimiento
+    from AquaKeeper.persistencia.repositorios import RepositoriosSQLite, volcar_servicios, guardar_cambios as guardar
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    repos = RepositoriosSQLite(os.path.join(tempfile.mkdtemp(prefix="aquakeeper-bench-"), "aquakeeper.db"))
+    inv, svc = InventarioLocal(), PiletaService()
+    n_clientes = max(1, n_piletas // 5)
+    for d in range(n_clientes):
+        svc.registrar_cliente(Cliente(str(d), f"Cliente {d}", "Calle 1"))
+    for i in range(n_piletas):
+        svc.cargar_pileta(Pileta(f"P{i:07d}", 8000 + (i % 50) * 1000, str(i % n_clientes)))
+    t0 = time.perf_counter()
+    volcar_servicios(repos, inv, svc)
+    t1 = time.perf_counter()
+    rng = np.random.default_rng(0)
+    k = max(1, int(n_piletas * cambiadas))
+    ids = [f"P{i:07d}" for i in rng.choice(n_piletas, k, replace=False).tolist()]
+    svc.aplicar_lecturas(ids, np.full(k, time.time()), rng.normal(7.4, 0.3, k), rng.gamma(2.0, 2.0, k), rng.uniform(0, 0.3, k))
+    for d in rng.choice(n_clientes, max(1, k // 5), replace=False).tolist():
+        svc.clientes[str(d)].stock.disponer("cloro-granulado", 500.0)
+    s = EstrategiaMantenimiento()
+    for i in ids[:k // 2]:
+        svc.evaluar_visita(i, "mantenimiento", s)
+    t2 = time.perf_counter()
+    cambios = guardar(repos, inv, svc, verificar=False)
+    t3 = time.perf_counter()
+    svc.resincronizar()                  # lo que agrega verificar=True (sin ediciones directas)
+    t4 = time.perf_counter()
+    volcar_servicios(repos, inv, svc)
+    t5 = time.perf_counter()
+    print(f"[guardar-cambios] {n_piletas} piletas, {n_clientes} clientes; cambios del día: {len(cambios)} "
+          f"({len(cambios.piletas)} piletas, {len(cambios.clientes)} clientes, "
+          f"{cambios.visitas_hasta - cambios.visitas_desde} visitas)")
+    print(f"  volcado inicial={t1 - t0:.2f}s  incremental={1000 * (t3 - t2):.0f}ms "
+          f"(+{1000 * (t4 - t3):.0f}ms con verificar)  volcar todo de nuevo={1000 * (t5 - t4):.0f}ms")
+
+def _flota_con_clientes(n_piletas: int, seed: int = 0):
+    # Flota con clientes (stock en casa), 50 volúmenes distintos y lecturas variadas
+    import random
+    from AquaKeeper.entidades.modelo import Cliente, Pileta
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    rnd = random.Random(seed)
+    svc = PiletaService()
+    n_clientes = max(1, n_piletas // 5)
+    for d in range(n_clientes):
+        c = Cliente(str(d), f"Cliente {d}", "Calle 1")
+        for tipo in TIPOS_PRODUCTO:
+            c.stock.disponer(tipo, float(rnd.randrange(0, 400)))
+        svc.registrar_cliente(c)
+    for i in range(n_piletas):
+        svc.cargar_pileta(Pileta(f"P{i}", 8000 + (i % 50) * 1000, str(i % n_clientes), ph=rnd.gauss(7.4, 0.3),
+                                 turbidez=abs(rnd.gauss(12.0, 8.0)), algas=min(1.0, abs(rnd.gauss(0.2, 0.2)))))
+    return svc
+
+def cache_dosis(n_piletas: int = 100_000, visitas: int = 20_000) -> None:
+    # Visitas como las pide la API (estrategia_para por request) y plan de flota: aciertos de la caché
+    from AquaKeeper.entidades.modelo import Pileta
+    from AquaKeeper.patrones.strategy.cache_dosis import CACHE_DOSIS
+    from AquaKeeper.patrones.strategy.dosificacion import estrategia_para, EstrategiaChoque
+    svc = _flota_con_clientes(n_piletas)
+    ids = list(svc.piletas)[:visitas]
+    CACHE_DOSIS.limpiar()
+    t0 = time.perf_counter()
+    for i in ids:
+        svc.evaluar_visita(i, "mantenimiento", estrategia_para("mantenimiento"))
+    t1 = time.perf_counter()
+    por_visita = CACHE_DOSIS.estadisticas()
+    svc.planificar_visitas("choque", EstrategiaChoque(), registrar=False)
+    t2 = time.perf_counter()
+    total = CACHE_DOSIS.estadisticas()
+    # costo por cálculo de dosis: estrategia directa vs servida por la caché (ya caliente)
+    p = Pileta("P", 25000, "0")
+    directa, cacheada = EstrategiaChoque(), estrategia_para("choque")
+    tiempos = {}
+    for nombre, strat in (("directa", directa), ("cacheada", cacheada)):
+        t = time.perf_counter()
+        for _ in range(200_000):
+            strat.calcular_dosis(p)
+        tiempos[nombre] = (time.perf_counter() - t) / 200_000 * 1e9
+    print(f"[cache-dosis] {n_piletas} piletas (50 volúmenes), {visitas} visitas con estrategia_para por visita")
+    print(f"  evaluar_visita: {1e6 * (t1 - t0) / visitas:.1f}us/visita  aciertos={por_visita['aciertos']} "
+          f"fallos={por_visita['fallos']} tasa={por_visita['tasa_aciertos']:.4f}")
+    print(f"  planificar_visitas: {1000 * (t2 - t1):.0f}ms  acumulado tasa={total['tasa_aciertos']:.4f} "
+          f"({total['entradas']} entradas)")
+    print(f"  calcular_dosis: directa={tiempos['directa']:.0f}ns  cacheada={tiempos['cacheada']:.0f}ns")
+
+def planificar_visitas(n_piletas: int = 100_000) -> None:
+    # Plan de la flota entera: planificar_visitas (columnar) vs evaluar_visita pileta por pileta.
+    # evaluar_visita siempre registra la visita en la bitácora; el plan se mide con y sin registrar
+    from AquaKeeper.patrones.strategy.dosificacion import EstrategiaChoque
+    svc = _flota_con_clientes(n_piletas)
+    strat = EstrategiaChoque()
+    t0 = time.perf_counter()
+    plan = svc.planificar_visitas("choque", strat, registrar=False)
+    t1 = time.perf_counter()
+    svc.planificar_visitas("choque", strat)
+    t2 = time.perf_counter()
+    debo_ir = {i for i in svc.piletas if svc.evaluar_visita(i, "choque", strat)[1]}
+    t3 = time.perf_counter()
+    if debo_ir != {i for i, d in zip(plan.ids, plan.debo_ir.tolist()) if d}:
+        raise AssertionError("planificar_visitas y evaluar_visita no coinciden en DEBO IR")
+    print(f"[planificar-visitas] {n_piletas} piletas, razón choque, {len(debo_ir)} con DEBO IR")
+    print(f"  evaluar_visita (una a una, registra): {1000 * (t3 - t2):.0f}ms")
+    print(f"  planificar_visitas (registra):        {1000 * (t2 - t1):.0f}ms  ({(t3 - t2) / (t2 - t1):.1f}x)")
+    print(f"  planificar_visitas (sin registrar):   {1000 * (t1 - t0):.0f}ms  ({(t3 - t2) / (t1 - t0):.1f}x)")
+
+def estado_agua_lote(n_piletas: int = 1_000_000) -> None:
+    # Puntaje de la flota entera: estado_agua_lote (columnar) vs estado_agua_porcentual pileta por pileta
+    import numpy as np
+    svc = _flota_con_clientes(n_piletas)
+    piletas = list(svc.piletas.values())
+    svc.estado_agua_lote()                     # arma la vista columnar una vez (fuera de la medición)
+    t0 = time.perf_counter()
+    lote = svc.estado_agua_lote()
+    t1 = time.perf_counter()
+    una_a_una = [svc.estado_agua_porcentual(p) for p in piletas]
+    t2 = time.perf_counter()
+    if not np.array_equal(lote, np.asarray(una_a_una)):
+        raise AssertionError("estado_agua_lote no coincide con estado_agua_porcentual")
+    print(f"[estado-agua-lote] {n_piletas} piletas")
+    print(f"  estado_agua_porcentual (una a una): {1000 * (t2 - t1):.0f}ms")
+    print(f"  estado_agua_lote (flota):           {1000 * (t1 - t0):.1f}ms  ({(t2 - t1) / (t1 - t0):.0f}x)")
+
+CASOS: Dict[str, Callable[[], None]] = {
+    "memoria-stock": memoria_stock,
+    "web-latencia": web_latencia,
+    "web-carga": web_carga,
+    "ingesta-lecturas": ingesta_lecturas,
+    "metricas": metricas_overhead,
+    "sqlite-workers": sqlite_workers,
+    "repositorios": repositorios,
+    "libro-stock": libro_stock,
+    "series-lecturas": series_lecturas,
+    "guardar-cambios": guardar_cambios,
+    "cache-dosis": cache_dosis,
+    "planificar-visitas": planificar_visitas,
+    "estado-agua-lote": estado_agua_lote,
+}
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmarks de AquaKeeper")
+    ap.add_argument("casos", nargs="*", help=f"casos a correr (default: todos): {', '.join(CASOS)}")
+    args = ap.parse_args()
+    desconocidos = [c for c in args.casos if c not in CASOS]
+    if desconocidos:
+        ap.error(f"caso desconocido: {', '.join(desconocidos)}")
+    for nombre in args.casos or CASOS:
+        CASOS[nombre]()
+
+if __name__ == "__main__":
+    main()
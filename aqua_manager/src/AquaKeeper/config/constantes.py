@@ -2,16 +2,52 @@ PISCINA_CHICA_L   = 12000
 PISCINA_MEDIANA_L = 25000
 PISCINA_GRANDE_L  = 45000
 
+TIPOS_PRODUCTO = ("cloro-granulado", "cloro-pastilla", "clarificador", "alguicida", "antisarro")
+
 DOSIS_CLORO_MANTENIMIENTO_G_10K = 30
 DOSIS_CLORO_CHOQUE_G_10K        = 120
 DOSIS_CLARIFICADOR_ML_10K       = 40
 DOSIS_ALGUICIDA_ML_10K          = 25
 DOSIS_ANTISARRO_ML_10K          = 35
+DOSIS_CONFIG_VERSION            = 1
+DOSIS_CACHE_MAX                 = 4096
 
 PH_IDEAL_MIN = 7.2
 PH_IDEAL_MAX = 7.6
 TURBIDEZ_MAX_PERMITIDA = 30.0
 ALGAS_UMBRAL_ALERTA    = 0.5
 
+LECTURA_PH_MIN = 0.0
+LECTURA_PH_MAX = 14.0
+LECTURAS_MAX_POR_LOTE = 50000
+SERIES_RUTA = "data/series"   # historial de lecturas por pileta y mes (servicios/series_lecturas.py)
+SERIES_RETENCION_CRUDA_S = 90 * 86400.0   # los puntos crudos se borran por mes; los resúmenes hora/día quedan
+
 STOCK_MIN_LOCAL   = 2
 STOCK_MIN_CLIENTE = 1
+
+POLITICA_SKU_DEFAULT = "primero"
+
+VISITAS_EN_MEMORIA   = 10000
+VISITAS_POR_SEGMENTO = 1000
+
+REGISTRO_CODEC = "zlib"
+
+LIBRO_STOCK_SNAPSHOT_CADA = 10000    # movimientos entre snapshots del libro de stock
+LIBRO_STOCK_POR_SEGMENTO  = 100000   # movimientos por archivo de segmento
+
+WEB_WORKERS = 4
+WEB_CACHE_MAX   = 256
+WEB_CACHE_TTL_S = 300.0
+SNAPSHOT_RUTA   = "data/estado_web.json"
+VISITAS_RUTA    = "data/visitas"   # segmentos de la bitácora de visitas de la API (backend memoria)
+WS_COLA_ALERTAS = 100
+PAGINA_PILETAS     = 100     # tamaño de página por defecto de /api/piletas
+PAGINA_PILETAS_MAX = 1000
+
+BACKEND_ALMACENAMIENTO = "memoria"
+SQLITE_RUTA            = "data/aquakeeper.db"
+REPOSITORIO_LOTE       = 10000    # filas por fetchmany al recorrer un repositorio
+
+METRICAS_ACTIVAS  = False
+METRICAS_BUCKETS_S = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
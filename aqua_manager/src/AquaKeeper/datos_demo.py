@@ -0,0 +1,52 @@
+# aqua_manager/src/AquaKeeper/datos_demo.py
+# Datos de ejemplo compartidos por demo() y la API web
+from __future__ import annotations
+from typing import List, Tuple
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto
+from AquaKeeper.patrones.factory.producto_factory import ProductoFactory
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.config.constantes import PISCINA_CHICA_L, PISCINA_MEDIANA_L, PISCINA_GRANDE_L
+
+STOCK_INICIAL_LOCAL = 5  # unidades por producto
+
+# (razón, id_pileta) que recorre la demo
+CASOS_DEMO: List[Tuple[str, str]] = [
+    ("mantenimiento", "P-CHICA"),
+    ("choque",        "P-MED"),
+    ("mantenimiento", "P-GRANDE"),
+]
+
+def productos_demo() -> List[Producto]:
+    return [
+        ProductoFactory.crear("cloro-granulado", "CL-GR-1", "Cloro Granulado Premium", "1kg"),
+        ProductoFactory.crear("cloro-pastilla",  "CL-PA-2", "Pastillas de Cloro 200g", "200g"),
+        ProductoFactory.crear("clarificador",    "CL-AR-3", "Clarificador Ultra", "1L"),
+        ProductoFactory.crear("alguicida",       "AL-GI-4", "Alguicida Shock", "1L"),
+        ProductoFactory.crear("antisarro",       "AN-SA-5", "Antisarro Plus", "1L"),
+    ]
+
+def clientes_demo() -> List[Cliente]:
+    c1 = Cliente(dni="111", nombre="Laura",  direccion="San Martín 123")
+    c2 = Cliente(dni="222", nombre="Diego",  direccion="Belgrano 456")
+    # El cliente guarda stock por TIPO como “sku” simple (tipo==clave)
+    for tipo in ["cloro-granulado","clarificador","alguicida","antisarro","cloro-pastilla"]:
+        c1.stock.disponer(tipo, 50.0)  # 50 g/ml/pastillas (ejemplo)
+        c2.stock.disponer(tipo, 10.0)  # 10 g/ml/pastillas (bajo para ver faltantes)
+    return [c1, c2]
+
+def piletas_demo() -> List[Pileta]:
+    return [
+        Pileta(id_pileta="P-CHICA",   litros=PISCINA_CHICA_L,  cliente_dni="111", ph=7.6, turbidez=15.0, algas=0.2),
+        Pileta(id_pileta="P-MED",     litros=PISCINA_MEDIANA_L,cliente_dni="111", ph=7.1, turbidez=35.0, algas=0.6),
+        Pileta(id_pileta="P-GRANDE",  litros=PISCINA_GRANDE_L, cliente_dni="222", ph=7.5, turbidez=12.0, algas=0.0),
+    ]
+
+# Inventario + servicio de piletas ya cargados con los datos de ejemplo
+def cargar_demo(inv: InventarioLocal, svc: PiletaService) -> None:
+    for p in productos_demo():
+        inv.registrar_producto(p, cantidad_inicial=STOCK_INICIAL_LOCAL)
+    for c in clientes_demo():
+        svc.registrar_cliente(c)
+    for p in piletas_demo():
+        svc.registrar_pileta(p)
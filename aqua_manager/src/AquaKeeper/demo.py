@@ -1,18 +1,15 @@
 from __future__ import annotations
 from typing import Optional, Dict, Callable
-from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto
-from AquaKeeper.patrones.factory.producto_factory import ProductoFactory
+from AquaKeeper.entidades.modelo import Producto
 from AquaKeeper.patrones.strategy.dosificacion import (
     EstrategiaMantenimiento, EstrategiaChoque, EstrategiaAlguicida, EstrategiaAntisarro
 )
+from AquaKeeper.datos_demo import productos_demo, clientes_demo, piletas_demo, STOCK_INICIAL_LOCAL
 from AquaKeeper.patrones.observer.observer import Observer
 from AquaKeeper.servicios.inventario_service import InventarioLocal, EventoStock
 from AquaKeeper.servicios.pileta_service import PiletaService
 from AquaKeeper.servicios.registro_service import RegistroService, RegistroOperacion
-from AquaKeeper.config.constantes import (
-    PISCINA_CHICA_L, PISCINA_MEDIANA_L, PISCINA_GRANDE_L,
-    STOCK_MIN_CLIENTE, STOCK_MIN_LOCAL
-)
+from AquaKeeper.config.constantes import STOCK_MIN_CLIENTE, STOCK_MIN_LOCAL
 
 # ---------- Singleton: formateo (sin lambdas) ----------
 def _fmt_producto(p: Producto) -> str:
@@ -44,36 +41,20 @@ def demo():
     inv = InventarioLocal()
     inv.suscribir(Alertas())
 
-    productos = [
-        ProductoFactory.crear("cloro-granulado", "CL-GR-1", "Cloro Granulado Premium", "1kg"),
-        ProductoFactory.crear("cloro-pastilla",  "CL-PA-2", "Pastillas de Cloro 200g", "200g"),
-        ProductoFactory.crear("clarificador",    "CL-AR-3", "Clarificador Ultra", "1L"),
-        ProductoFactory.crear("alguicida",       "AL-GI-4", "Alguicida Shock", "1L"),
-        ProductoFactory.crear("antisarro",       "AN-SA-5", "Antisarro Plus", "1L"),
-    ]
+    productos = productos_demo()
     for p in productos:
-        inv.registrar_producto(p, cantidad_inicial=5)  # 5 unidades
+        inv.registrar_producto(p, cantidad_inicial=STOCK_INICIAL_LOCAL)  # 5 unidades
         print("Producto:", regfmt.mostrar(p))
 
     print(f"\n[INFO] Stock local mínimo = {STOCK_MIN_LOCAL}, stock cliente mínimo = {STOCK_MIN_CLIENTE}")
 
     # 2) Clientes + piletas (tus clientes con su stock en casa)
     svc = PiletaService()
-    c1 = Cliente(dni="111", nombre="Laura",  direccion="San Martín 123")
-    c2 = Cliente(dni="222", nombre="Diego",  direccion="Belgrano 456")
-
-    # El cliente guarda stock por TIPO como “sku” simple (tipo==clave)
-    for tipo in ["cloro-granulado","clarificador","alguicida","antisarro","cloro-pastilla"]:
-        c1.stock.disponer(tipo, 50.0)  # 50 g/ml/pastillas (ejemplo)
-        c2.stock.disponer(tipo, 10.0)  # 10 g/ml/pastillas (bajo para ver faltantes)
-
+    c1, c2 = clientes_demo()
     svc.registrar_cliente(c1)
     svc.registrar_cliente(c2)
 
-    p1 = Pileta(id_pileta="P-CHICA",   litros=PISCINA_CHICA_L,  cliente_dni=c1.dni, ph=7.6, turbidez=15.0, algas=0.2)
-    p2 = Pileta(id_pileta="P-MED",     litros=PISCINA_MEDIANA_L,cliente_dni=c1.dni, ph=7.1, turbidez=35.0, algas=0.6)
-    p3 = Pileta(id_pileta="P-GRANDE",  litros=PISCINA_GRANDE_L, cliente_dni=c2.dni, ph=7.5, turbidez=12.0, algas=0.0)
-
+    p1, p2, p3 = piletas_demo()
     for pp in (p1,p2,p3): svc.registrar_pileta(pp)
 
     # 3) Estrategias según necesidad (Strategy)
@@ -122,10 +103,11 @@ def demo():
         except ValueError as e:
             print(f"  [STOCK] {e}")
 
-    # 5) Persistencia de un resumen
+    # 5) Persistencia de un resumen: solo lo modificado desde el último checkpoint (acá, todo)
+    cambios = svc.tomar_cambios()
     salida = {
-        "piletas": [p1.__dict__, p2.__dict__, p3.__dict__],
-        "visitas": [v.__dict__ for v in svc.visitas],
+        "piletas": [svc.piletas[i].__dict__ for i in cambios.piletas],
+        "visitas": [v.__dict__ for v in svc.visitas.desde(cambios.visitas_desde)],
     }
     pfile = RegistroService().guardar("resumen_aquakeeper", RegistroOperacion("resumen", salida))
     print(f"\n[OK] Resumen persistido en {pfile}")
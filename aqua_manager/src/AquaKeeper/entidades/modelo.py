@@ -1,6 +1,8 @@
 # aqua_manager/src/AquaKeeper/entidades/modelo.py
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from AquaKeeper.config.constantes import TIPOS_PRODUCTO
 
 @dataclass
 class Producto:
@@ -9,23 +11,145 @@ class Producto:
     tipo: str            # "cloro-granulado", "cloro-pastilla", "clarificador", "alguicida", "antisarro"
     unidad: str          # "g" o "ml" o "pastillas"
     presentacion: str = ""  # opcional, por ejemplo "1kg", "1L"
+    precio: float = 0.0     # precio de lista (para elegir el SKU más barato de un tipo)
 
 @dataclass
 class Stock:
     cantidades: Dict[str, float] = field(default_factory=dict)  # sku -> cantidad (en unidad del producto)
+    # se llama después de cada movimiento (p. ej. para marcar al dueño como modificado)
+    al_cambiar: Optional[Callable[[], None]] = field(default=None, repr=False, compare=False)
 
     def disponer(self, sku: str, cant: float) -> None:
         self.cantidades[sku] = self.cantidades.get(sku, 0.0) + cant
+        if self.al_cambiar is not None:
+            self.al_cambiar()
 
     def descontar(self, sku: str, cant: float) -> None:
         actual = self.cantidades.get(sku, 0.0)
         if cant > actual:
             raise ValueError(f"Stock insuficiente para {sku} (tiene {actual}, pide {cant})")
         self.cantidades[sku] = actual - cant
+        if self.al_cambiar is not None:
+            self.al_cambiar()
 
     def disponible(self, sku: str) -> float:
         return self.cantidades.get(sku, 0.0)
 
+# ---------- Stock compacto: muchos stocks en una sola matriz ----------
+class TablaIds:
+    """Interna nombres (SKU o tipo) a enteros chicos y consecutivos."""
+    def __init__(self, nombres: Sequence[str] = ()):
+        self.nombres: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for n in nombres:
+            self.id(n)
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    def id(self, nombre: str) -> int:
+        i = self._ids.get(nombre)
+        if i is None:
+            i = self._ids[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return i
+
+    def buscar(self, nombre: str) -> Optional[int]:
+        return self._ids.get(nombre)
+
+class MatrizStock:
+    """
+    Cantidades de muchos dueños (p. ej. todos los clientes) en un único array float64
+    dueño × columna. Las columnas son SKUs/tipos internados en `columnas`; las de
+    TIPOS_PRODUCTO ocupan siempre las primeras posiciones. Cada `StockCompacto` es una
+    fila de esta matriz. `_movido` marca qué (dueño, columna) tuvo algún movimiento, para
+    que `cantidades` liste las mismas claves que Stock (incluidas las que quedaron en 0).
+    """
+    def __init__(self, columnas: Sequence[str] = TIPOS_PRODUCTO, filas_iniciales: int = 1024):
+        self.columnas = TablaIds(columnas)
+        forma = (max(1, filas_iniciales), max(8, len(self.columnas)))
+        self._datos = np.zeros(forma)
+        self._movido = np.zeros(forma, dtype=bool)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def datos(self) -> np.ndarray:
+        return self._datos[:self._n, :len(self.columnas)]
+
+    def nuevo_stock(self) -> "StockCompacto":
+        if self._n == self._datos.shape[0]:
+            self._redimensionar(self._n * 2, self._datos.shape[1])
+        self._n += 1
+        return StockCompacto(self, self._n - 1)
+
+    def columna(self, nombre: str) -> int:
+        j = self.columnas.id(nombre)
+        if j >= self._datos.shape[1]:
+            self._redimensionar(self._datos.shape[0], self._datos.shape[1] * 2)
+        return j
+
+    # Submatriz filas × nombres (copia; nombres sin columna -> 0, sin agregarles una al leer)
+    def submatriz(self, filas: Sequence[int], nombres: Sequence[str]) -> np.ndarray:
+        filas = np.asarray(filas, dtype=np.int64)
+        cols = [self.columnas.buscar(n) for n in nombres]
+        conocidas = [k for k, j in enumerate(cols) if j is not None]
+        res = np.zeros((len(filas), len(cols)))
+        res[:, conocidas] = self._datos[np.ix_(filas, [cols[k] for k in conocidas])]
+        return res
+
+    def _redimensionar(self, filas: int, cols: int) -> None:
+        f, c = self._datos.shape
+        nuevo = np.zeros((filas, cols))
+        nuevo[:f, :c] = self._datos
+        movido = np.zeros((filas, cols), dtype=bool)
+        movido[:f, :c] = self._movido
+        self._datos, self._movido = nuevo, movido
+
+class StockCompacto:
+    """Misma API que Stock (disponer/descontar/disponible) sobre una fila de MatrizStock."""
+    __slots__ = ("matriz", "fila", "al_cambiar")
+
+    def __init__(self, matriz: MatrizStock, fila: int):
+        self.matriz = matriz
+        self.fila = fila
+        self.al_cambiar: Optional[Callable[[], None]] = None   # como Stock.al_cambiar
+
+    def disponer(self, sku: str, cant: float) -> None:
+        j = self.matriz.columna(sku)
+        self.matriz._datos[self.fila, j] += cant
+        self.matriz._movido[self.fila, j] = True
+        if self.al_cambiar is not None:
+            self.al_cambiar()
+
+    def descontar(self, sku: str, cant: float) -> None:
+        actual = self.disponible(sku)
+        if cant > actual:
+            raise ValueError(f"Stock insuficiente para {sku} (tiene {actual}, pide {cant})")
+        j = self.matriz.columna(sku)
+        self.matriz._datos[self.fila, j] = actual - cant
+        self.matriz._movido[self.fila, j] = True
+        if self.al_cambiar is not None:
+            self.al_cambiar()
+
+    def disponible(self, sku: str) -> float:
+        j = self.matriz.columnas.buscar(sku)
+        return 0.0 if j is None else float(self.matriz._datos[self.fila, j])
+
+    # Vista dict como Stock.cantidades: las claves con algún movimiento (también las que quedaron
+    # en 0), en orden de columna
+    @property
+    def cantidades(self) -> Dict[str, float]:
+        n = len(self.matriz.columnas)
+        fila = self.matriz._datos[self.fila, :n]
+        nombres = self.matriz.columnas.nombres
+        return {nombres[j]: float(fila[j]) for j in np.flatnonzero(self.matriz._movido[self.fila, :n]).tolist()}
+
+    def __repr__(self) -> str:
+        return f"StockCompacto({self.cantidades})"
+
 @dataclass
 class Pileta:
     id_pileta: str
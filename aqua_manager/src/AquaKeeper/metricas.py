@@ -0,0 +1,212 @@
+# aqua_manager/src/AquaKeeper/metricas.py
+# Contadores + histogramas de latencia (servicios, estrategias y rutas web) en formato texto de Prometheus.
+# Apagado no cuesta nada: los métodos se envuelven recién en activar() y el middleware solo se monta si está activo.
+from __future__ import annotations
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import functools
+import os
+import threading
+from AquaKeeper.config.constantes import METRICAS_ACTIVAS, METRICAS_BUCKETS_S
+
+def _env_activas() -> bool:
+    valor = os.environ.get("AQUA_METRICAS")
+    if valor is None:
+        return METRICAS_ACTIVAS
+    return valor.strip().lower() in ("1", "true", "si", "sí", "on")
+
+class Histograma:
+    def __init__(self, buckets: Tuple[float, ...] = METRICAS_BUCKETS_S):
+        self.buckets = buckets
+        self.cuentas = [0] * (len(buckets) + 1)   # la última es +Inf
+        self.suma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float) -> None:
+        with self._lock:
+            self.cuentas[bisect_left(self.buckets, valor)] += 1
+            self.suma += valor
+            self.total += 1
+
+    def leer(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.cuentas), self.suma, self.total
+
+class RegistroMetricas:
+    """Histogramas por (métrica, etiquetas) y contadores de errores."""
+    def __init__(self, buckets: Tuple[float, ...] = METRICAS_BUCKETS_S):
+        self.buckets = buckets
+        self._hist: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histograma] = {}
+        self._errores: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+        self._lock = threading.Lock()
+
+    def histograma(self, metrica: str, etiquetas: Tuple[Tuple[str, str], ...]) -> Histograma:
+        clave = (metrica, etiquetas)
+        with self._lock:
+            h = self._hist.get(clave)
+            if h is None:
+                h = self._hist[clave] = Histograma(self.buckets)
+            return h
+
+    def observar(self, metrica: str, etiquetas: Tuple[Tuple[str, str], ...], segundos: float) -> None:
+        self.histograma(metrica, etiquetas).observar(segundos)
+
+    def contar_error(self, metrica: str, etiquetas: Tuple[Tuple[str, str], ...]) -> None:
+        clave = (metrica, etiquetas)
+        with self._lock:
+            self._errores[clave] = self._errores.get(clave, 0) + 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._errores.clear()
+        _histogramas_por_clase.clear()
+
+    def exponer(self) -> str:
+        with self._lock:
+            hist = dict(self._hist)
+            errores = dict(self._errores)
+        hist = {k: h.leer() for k, h in hist.items()}
+        lineas = ["# HELP aquakeeper_metricas_activas 1 si la instrumentación está activa",
+                  "# TYPE aquakeeper_metricas_activas gauge",
+                  f"aquakeeper_metricas_activas {1 if activas() else 0}"]
+        for metrica in sorted({m for m, _ in hist}):
+            lineas += [f"# HELP {metrica} {_AYUDA.get(metrica, metrica)}", f"# TYPE {metrica} histogram"]
+            for (m, etiquetas), (cuentas, suma, total) in sorted(hist.items()):
+                if m != metrica:
+                    continue
+                acumulado = 0
+                for le, c in zip(self.buckets + (float("inf"),), cuentas):
+                    acumulado += c
+                    lineas.append(f"{m}_bucket{_etiquetas(etiquetas + (('le', _num(le)),))} {acumulado}")
+                lineas.append(f"{m}_sum{_etiquetas(etiquetas)} {suma!r}")
+                lineas.append(f"{m}_count{_etiquetas(etiquetas)} {total}")
+        for metrica in sorted({m for m, _ in errores}):
+            lineas += [f"# HELP {metrica} {_AYUDA.get(metrica, metrica)}", f"# TYPE {metrica} counter"]
+            for (m, etiquetas), n in sorted(errores.items()):
+                if m == metrica:
+                    lineas.append(f"{m}{_etiquetas(etiquetas)} {n}")
+        return "\n".join(lineas) + "\n"
+
+_AYUDA = {
+    "aquakeeper_servicio_segundos": "Latencia de métodos de servicios y estrategias",
+    "aquakeeper_servicio_errores_total": "Excepciones en métodos de servicios y estrategias",
+    "aquakeeper_http_segundos": "Latencia de requests HTTP por ruta",
+}
+
+def _num(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+def _etiquetas(etiquetas: Tuple[Tuple[str, str], ...]) -> str:
+    def esc(v: str) -> str:
+        return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in etiquetas) + "}"
+
+registro = RegistroMetricas()
+
+# ---------- Instrumentación de métodos ----------
+# (clase, métodos). Los generadores (iterar_evaluacion) no se miden: solo se cronometraría su creación.
+def _objetivos() -> List[Tuple[type, Tuple[str, ...]]]:
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.patrones.strategy.dosificacion import DosificacionStrategy, _EstrategiaPorLitros
+    from AquaKeeper.patrones.strategy.cache_dosis import EstrategiaCacheada
+    return [
+        (PiletaService, ("registrar_cliente", "registrar_pileta", "actualizar_lectura", "aplicar_lecturas",
+                         "piletas_de_cliente", "piletas_por_banda", "piletas_en_alerta",
+                         "estado_agua_porcentual", "estado_agua_lote", "cobertura_productos_cliente",
+                         "faltantes_cliente", "evaluar_visita", "matriz_stock_clientes",
+                         "planificar_visitas", "salud_productos_en_pileta")),
+        (InventarioLocal, ("registrar_producto", "reponer", "descontar", "resolver_dosis")),
+        (DosificacionStrategy, ("calcular_dosis_lote",)),
+        (_EstrategiaPorLitros, ("calcular_dosis", "calcular_dosis_lote")),
+        (EstrategiaCacheada, ("calcular_dosis", "calcular_dosis_lote")),
+    ]
+
+# (clase real, método) -> histograma, para no armar etiquetas en cada llamada
+_histogramas_por_clase: Dict[Tuple[type, str], Histograma] = {}
+
+def _histograma_de(clase: type, metodo: str) -> Histograma:
+    h = _histogramas_por_clase.get((clase, metodo))
+    if h is None:
+        h = _histogramas_por_clase[(clase, metodo)] = registro.histograma(
+            "aquakeeper_servicio_segundos", (("clase", clase.__name__), ("metodo", metodo)))
+    return h
+
+def _medido(fn: Callable[..., Any], metodo: str) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def envoltura(self, *args, **kwargs):
+        t0 = perf_counter()
+        try:
+            return fn(self, *args, **kwargs)
+        except Exception:
+            registro.contar_error("aquakeeper_servicio_errores_total", (("clase", type(self).__name__), ("metodo", metodo)))
+            raise
+        finally:
+            # se etiqueta con la clase real (EstrategiaChoque, ...) y no con la que define el método
+            dt = perf_counter() - t0
+            h = _histogramas_por_clase.get((type(self), metodo)) or _histograma_de(type(self), metodo)
+            h.observar(dt)
+    return envoltura
+
+_originales: Dict[Tuple[type, str], Callable[..., Any]] = {}
+_estado_lock = threading.Lock()
+
+def activas() -> bool:
+    return bool(_originales)
+
+def activar() -> None:
+    with _estado_lock:
+        if _originales:
+            return
+        for clase, metodos in _objetivos():
+            for m in metodos:
+                fn = clase.__dict__[m]
+                _originales[(clase, m)] = fn
+                setattr(clase, m, _medido(fn, m))
+
+def desactivar() -> None:
+    with _estado_lock:
+        for (clase, m), fn in _originales.items():
+            setattr(clase, m, fn)
+        _originales.clear()
+
+# Activa según AQUA_METRICAS (o METRICAS_ACTIVAS); devuelve si quedó activa
+def activar_desde_entorno() -> bool:
+    if _env_activas():
+        activar()
+    return activas()
+
+# ---------- Middleware ASGI por ruta ----------
+class MiddlewareMetricas:
+    """
+    Mide cada request HTTP y la etiqueta con la plantilla de la ruta (/api/piletas/{id_pileta},
+    no el id concreto) para acotar la cantidad de series. Las rutas sin match van como "<sin_ruta>".
+    """
+    def __init__(self, app: Callable[..., Any]):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        estado = {"codigo": 500}
+
+        async def enviar(msg: Dict[str, Any]) -> None:
+            if msg["type"] == "http.response.start":
+                estado["codigo"] = msg["status"]
+            await send(msg)
+
+        t0 = perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            ruta = scope.get("route")
+            registro.observar("aquakeeper_http_segundos",
+                              (("metodo", scope["method"]), ("ruta", getattr(ruta, "path", "<sin_ruta>")),
+                               ("codigo", str(estado["codigo"]))), perf_counter() - t0)
+
+def texto_prometheus(reg: Optional[RegistroMetricas] = None) -> str:
+    return (reg or registro).exponer()
@@ -23,7 +23,7 @@ class ProductoFactory:
         return Producto(sku, nombre, "antisarro", "ml", presentacion)
 
     @staticmethod
-    def crear(tipo: str, sku: str, nombre: str, presentacion: str="") -> Producto:
+    def crear(tipo: str, sku: str, nombre: str, presentacion: str="", precio: float=0.0) -> Producto:
         dispatch = {
             "cloro-granulado": ProductoFactory._crear_cloro_granulado,
             "cloro-pastilla":  ProductoFactory._crear_cloro_pastilla,
@@ -34,4 +34,6 @@ class ProductoFactory:
         key = (tipo or "").lower()
         if key not in dispatch:
             raise ValueError(f"Tipo de producto desconocido: {tipo}")
-        return dispatch[key](sku, nombre, presentacion or "")
+        prod = dispatch[key](sku, nombre, presentacion or "")
+        prod.precio = precio
+        return prod
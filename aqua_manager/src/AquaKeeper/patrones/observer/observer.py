@@ -1,19 +1,91 @@
 # aqua_manager/src/AquaKeeper/patrones/observer/observer.py
-from typing import Generic, List, TypeVar
+from typing import Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+import logging
+import threading
 T = TypeVar("T")
+_log = logging.getLogger(__name__)
 
 class Observer(Generic[T]):
     def actualizar(self, valor: T) -> None:
         raise NotImplementedError
 
+    # Hook opcional para el despacho por lotes: por defecto entrega de a uno
+    def actualizar_lote(self, valores: List[T]) -> None:
+        for v in valores:
+            self.actualizar(v)
+
+class DespachoPorLotes(Generic[T]):
+    """
+    Cola de eventos que se coalescen por `clave(evento)` (queda solo el último de cada
+    clave, en el orden de su primera aparición) y se entregan juntos a los observadores
+    con `flush()`, o cada `intervalo` segundos desde un hilo de fondo (`iniciar`).
+    Cada lote se entrega una sola vez: si `entregar` falla el lote se descarta y `flush()`
+    propaga el error; el hilo de fondo lo registra y sigue con los eventos siguientes.
+    (Observable entrega con _entregar_lote, que aísla y registra los errores de cada observador.)
+    """
+    def __init__(self, clave: Callable[[T], Hashable], entregar: Callable[[List[T]], None],
+                 intervalo: Optional[float] = None):
+        self._clave = clave
+        self._entregar = entregar
+        self.intervalo = intervalo
+        self._pendientes: Dict[Hashable, T] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()     # serializa entregas (orden entre lotes)
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._pendientes)
+
+    def encolar(self, v: T) -> None:
+        with self._lock:
+            self._pendientes[self._clave(v)] = v
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                lote = list(self._pendientes.values())
+                self._pendientes = {}
+            if lote:
+                self._entregar(lote)
+            return len(lote)
+
+    def iniciar(self) -> None:
+        if self.intervalo is None:
+            raise ValueError("Se requiere intervalo para despachar en segundo plano")
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._despertar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="despacho-lotes", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        hilo = self._hilo
+        if hilo is not None:
+            self._despertar.set()
+            hilo.join()
+            self._hilo = None
+        self.flush()
+
+    def _bucle(self) -> None:
+        while not self._despertar.wait(self.intervalo):
+            try:
+                self.flush()
+            except Exception:
+                _log.exception("Falló la entrega de un lote; se descarta")
+
 class Observable(Generic[T]):
     def __init__(self) -> None:
         self._obs: List[Observer[T]] = []
+        self._despacho: Optional[DespachoPorLotes[T]] = None
 
     # nombres "clásicos"
     def suscribir(self, o: "Observer[T]") -> None: self._obs.append(o)
     def desuscribir(self, o: "Observer[T]") -> None: self._obs = [x for x in self._obs if x is not o]
     def notificar(self, v: T) -> None:
+        if self._despacho is not None:
+            self._despacho.encolar(v)
+            return
         for o in list(self._obs):
             o.actualizar(v)
 
@@ -21,3 +93,33 @@ class Observable(Generic[T]):
     def agregar_observador(self, o: "Observer[T]")->None: self.suscribir(o)
     def eliminar_observador(self, o: "Observer[T]")->None: self.desuscribir(o)
     def notificar_observadores(self, e: T)->None: self.notificar(e)
+
+    # Modo por lotes (opcional): notificar() solo encola; se entrega con flush() o desde un hilo
+    def activar_lotes(self, clave: Callable[[T], Hashable], intervalo: Optional[float] = None) -> DespachoPorLotes[T]:
+        self.desactivar_lotes()
+        self._despacho = DespachoPorLotes(clave, self._entregar_lote, intervalo)
+        if intervalo is not None:
+            self._despacho.iniciar()
+        return self._despacho
+
+    def desactivar_lotes(self) -> None:
+        despacho, self._despacho = self._despacho, None
+        if despacho is not None:
+            despacho.detener()
+
+    def flush(self) -> int:
+        return self._despacho.flush() if self._despacho is not None else 0
+
+    # Un observador que falla no corta la entrega a los demás; su lote se pierde (queda en el log) y
+    # no se reintenta: reencolar reenviaría el lote también a los que ya lo recibieron
+    def _entregar_lote(self, lote: List[T]) -> None:
+        for o in list(self._obs):
+            try:
+                por_lote = getattr(o, "actualizar_lote", None)
+                if por_lote is not None:
+                    por_lote(lote)
+                else:
+                    for v in lote:
+                        o.actualizar(v)
+            except Exception:
+                _log.exception("El observador %r falló con un lote de %d eventos; se descarta para él", o, len(lote))
@@ -0,0 +1,108 @@
+from __future__ import annotations
+from collections import OrderedDict
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, Hashable, Mapping, Optional, Tuple
+import numpy as np
+from AquaKeeper.entidades.modelo import Pileta
+from AquaKeeper.patrones.strategy.dosificacion import DosificacionStrategy, COLUMNA_TIPO
+from AquaKeeper.config.constantes import DOSIS_CONFIG_VERSION, DOSIS_CACHE_MAX, TIPOS_PRODUCTO
+
+class CacheDosis:
+    """
+    Caché LRU de planes de dosis por (strat.clave_cache(), litros, versión de config).
+
+    Solo se cachean las estrategias que declaran clave_cache() (las de dosificacion.py:
+    clase + BASES, así estrategia_para() puede crear una instancia por llamada). Las que
+    devuelven None se calculan siempre directo. Si cambian las constantes hay que llamar a
+    `cambiar_version`. Los resultados son de solo lectura.
+    """
+    def __init__(self, max_entradas: int = DOSIS_CACHE_MAX, version: Hashable = DOSIS_CONFIG_VERSION):
+        if max_entradas < 1:
+            raise ValueError("max_entradas debe ser >= 1")
+        self.max_entradas = max_entradas
+        self.version = version
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos: "OrderedDict[Tuple[Hashable, float, Hashable], Mapping[str, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def obtener(self, strat: DosificacionStrategy, p: Pileta) -> Mapping[str, float]:
+        clave_strat = strat.clave_cache()
+        if clave_strat is None:
+            return strat.calcular_dosis(p)
+        clave = (clave_strat, p.litros, self.version)
+        with self._lock:
+            res = self._datos.get(clave)
+            if res is not None:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return res
+            self.fallos += 1
+        # se calcula fuera del lock; si dos hilos fallan a la vez, gana el último (mismo valor)
+        res = MappingProxyType(dict(strat.calcular_dosis(p)))
+        with self._lock:
+            self._datos[clave] = res
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+        return res
+
+    def cambiar_version(self, version: Hashable) -> None:
+        with self._lock:
+            self.version = version
+            self._datos.clear()
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+            self.aciertos = self.fallos = 0
+
+    def estadisticas(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+            }
+
+# Caché compartida por las estrategias de estrategia_para() y las que envuelve PiletaService
+CACHE_DOSIS = CacheDosis()
+
+class EstrategiaCacheada(DosificacionStrategy):
+    """Envuelve otra estrategia y sirve calcular_dosis (y el lote, por volumen distinto) desde una CacheDosis."""
+    def __init__(self, base: DosificacionStrategy, cache: Optional[CacheDosis] = None):
+        self.base = base
+        self.cache = cache if cache is not None else CACHE_DOSIS
+
+    def calcular_dosis(self, p: Pileta) -> Mapping[str, float]:
+        return self.cache.obtener(self.base, p)
+
+    def clave_cache(self) -> Optional[Hashable]:
+        return self.base.clave_cache()
+
+    def tipos(self, dosis: Optional[np.ndarray] = None) -> Tuple[str, ...]:
+        return self.base.tipos(dosis)
+
+    # Una consulta a la caché por volumen distinto; si hay más volúmenes que entradas, directo a la base
+    def calcular_dosis_lote(self, litros: np.ndarray) -> np.ndarray:
+        unicos, inversa = np.unique(np.asarray(litros), return_inverse=True)
+        if len(unicos) > self.cache.max_entradas:
+            return self.base.calcular_dosis_lote(litros)
+        filas = np.zeros((len(unicos), len(TIPOS_PRODUCTO)))
+        for i, l in enumerate(unicos.tolist()):
+            for tipo, cant in self.calcular_dosis(Pileta(id_pileta="", litros=l, cliente_dni="")).items():
+                filas[i, COLUMNA_TIPO[tipo]] = cant
+        return filas[inversa.reshape(-1)]
+
+def cacheada(strat: DosificacionStrategy) -> DosificacionStrategy:
+    """La estrategia servida desde CACHE_DOSIS; sin clave_cache() (o ya envuelta) se devuelve tal cual."""
+    if isinstance(strat, EstrategiaCacheada) or strat.clave_cache() is None:
+        return strat
+    return EstrategiaCacheada(strat)
@@ -1,38 +1,122 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Hashable, Optional, Tuple, Type
+import numpy as np
 from AquaKeeper.entidades.modelo import Pileta
 from AquaKeeper.config.constantes import (
     DOSIS_CLORO_MANTENIMIENTO_G_10K, DOSIS_CLORO_CHOQUE_G_10K,
-    DOSIS_CLARIFICADOR_ML_10K, DOSIS_ALGUICIDA_ML_10K, DOSIS_ANTISARRO_ML_10K
+    DOSIS_CLARIFICADOR_ML_10K, DOSIS_ALGUICIDA_ML_10K, DOSIS_ANTISARRO_ML_10K,
+    TIPOS_PRODUCTO
 )
 
+# Columnas fijas de las matrices de dosis en lote (pileta × tipo de producto)
+COLUMNA_TIPO: Dict[str, int] = {t: i for i, t in enumerate(TIPOS_PRODUCTO)}
+
 class DosificacionStrategy(ABC):
     @abstractmethod
     def calcular_dosis(self, p: Pileta) -> Dict[str, float]: ...
 
+    # Clave para servir las dosis desde una caché por litros (cache_dosis.CacheDosis), o None si la
+    # dosis puede depender de otra cosa que `p.litros` (parámetros de instancia, lecturas, etc.)
+    def clave_cache(self) -> Optional[Hashable]:
+        return None
+
+    # Tipos que devuelve calcular_dosis, en su orden. Las estrategias que los conocen de antemano los
+    # declaran (ver _EstrategiaPorLitros); si no, salen de las columnas no nulas de `dosis`, la matriz de
+    # calcular_dosis_lote para los litros que se van a evaluar (los tipos pueden depender del volumen).
+    def tipos(self, dosis: Optional[np.ndarray] = None) -> Tuple[str, ...]:
+        if dosis is None:
+            raise ValueError(f"{type(self).__name__} no declara sus tipos: hay que pasar la matriz de dosis")
+        return tuple(TIPOS_PRODUCTO[j] for j in np.flatnonzero(np.asarray(dosis).any(axis=0)).tolist())
+
+    def calcular_dosis_lote(self, litros: np.ndarray) -> np.ndarray:
+        # Fallback genérico para estrategias que solo implementan calcular_dosis:
+        # una llamada por volumen distinto (las piletas se agrupan en pocos tamaños).
+        litros = np.asarray(litros)
+        unicos, inversa = np.unique(litros, return_inverse=True)
+        filas = np.zeros((len(unicos), len(TIPOS_PRODUCTO)))
+        for i, l in enumerate(unicos.tolist()):
+            dosis = self.calcular_dosis(Pileta(id_pileta="", litros=l, cliente_dni=""))
+            for tipo, cant in dosis.items():
+                if tipo not in COLUMNA_TIPO:
+                    raise ValueError(f"Tipo de producto desconocido: {tipo}")
+                filas[i, COLUMNA_TIPO[tipo]] = cant
+        return filas[inversa.reshape(-1)]
+
 def _escala_por_litros(base_por_10k: float, litros: int) -> float:
     return round(base_por_10k * (litros / 10000.0), 2)
 
-class EstrategiaMantenimiento(DosificacionStrategy):
-    def calcular_dosis(self, p: Pileta) -> Dict[str, float]:
-        return {
-            "cloro-granulado": _escala_por_litros(DOSIS_CLORO_MANTENIMIENTO_G_10K, p.litros),
-            "clarificador":    _escala_por_litros(DOSIS_CLARIFICADOR_ML_10K, p.litros),
-        }
+# round(x, 2) de Python sobre un array. np.round redondea x*100 ya pasado a float, que puede caer del
+# otro lado de un .5; los valores a pocos ulp de un .5 se recalculan con round() para que el resultado
+# sea idéntico al de _escala_por_litros.
+def _redondear_2(x: np.ndarray) -> np.ndarray:
+    plano = np.ascontiguousarray(x, dtype=float).reshape(-1)
+    m = plano * 100.0
+    res = np.rint(m) / 100.0
+    borde = np.flatnonzero(np.abs(m - np.floor(m) - 0.5) <= 4 * np.abs(np.spacing(m)))
+    if len(borde):
+        res[borde] = [round(v, 2) for v in plano[borde].tolist()]
+    return res.reshape(np.shape(x))
 
-class EstrategiaChoque(DosificacionStrategy):
-    def calcular_dosis(self, p: Pileta) -> Dict[str, float]:
-        return {
-            "cloro-granulado": _escala_por_litros(DOSIS_CLORO_CHOQUE_G_10K, p.litros),
-            "clarificador":    _escala_por_litros(DOSIS_CLARIFICADOR_ML_10K*2, p.litros),
-            "alguicida":       _escala_por_litros(DOSIS_ALGUICIDA_ML_10K, p.litros),
-        }
+# Una fila por volumen distinto: bases × litros/10000 con un solo producto (mismo orden de operaciones
+# que _escala_por_litros) y el redondeo de round()
+def _escala_por_litros_lote(bases: Dict[str, float], litros: np.ndarray) -> np.ndarray:
+    unicos, inversa = np.unique(np.asarray(litros), return_inverse=True)
+    filas = np.zeros((len(unicos), len(TIPOS_PRODUCTO)))
+    cols = [COLUMNA_TIPO[t] for t in bases]
+    valores = np.fromiter(bases.values(), dtype=float, count=len(bases))
+    filas[:, cols] = _redondear_2(valores * (unicos / 10000.0)[:, None])
+    return filas[inversa.reshape(-1)]
 
-class EstrategiaAlguicida(DosificacionStrategy):
-    def calcular_dosis(self, p: Pileta) -> Dict[str, float]:
-        return { "alguicida": _escala_por_litros(DOSIS_ALGUICIDA_ML_10K, p.litros) }
+# Estrategias cuya dosis es solo base_por_10k escalada por litros (tipo -> base)
+class _EstrategiaPorLitros(DosificacionStrategy):
+    BASES: Dict[str, float] = {}
+
+    # La dosis depende solo de litros y de BASES: alcanza la clase, salvo que la instancia tenga sus BASES
+    def clave_cache(self) -> Optional[Hashable]:
+        propias = self.__dict__.get("BASES")
+        return type(self) if propias is None else (type(self), tuple(propias.items()))
+
+    def tipos(self, dosis: Optional[np.ndarray] = None) -> Tuple[str, ...]:
+        return tuple(self.BASES)
 
-class EstrategiaAntisarro(DosificacionStrategy):
     def calcular_dosis(self, p: Pileta) -> Dict[str, float]:
-        return { "antisarro": _escala_por_litros(DOSIS_ANTISARRO_ML_10K, p.litros) }
+        return {tipo: _escala_por_litros(base, p.litros) for tipo, base in self.BASES.items()}
+
+    def calcular_dosis_lote(self, litros: np.ndarray) -> np.ndarray:
+        return _escala_por_litros_lote(self.BASES, litros)
+
+class EstrategiaMantenimiento(_EstrategiaPorLitros):
+    BASES = {
+        "cloro-granulado": DOSIS_CLORO_MANTENIMIENTO_G_10K,
+        "clarificador":    DOSIS_CLARIFICADOR_ML_10K,
+    }
+
+class EstrategiaChoque(_EstrategiaPorLitros):
+    BASES = {
+        "cloro-granulado": DOSIS_CLORO_CHOQUE_G_10K,
+        "clarificador":    DOSIS_CLARIFICADOR_ML_10K*2,
+        "alguicida":       DOSIS_ALGUICIDA_ML_10K,
+    }
+
+class EstrategiaAlguicida(_EstrategiaPorLitros):
+    BASES = { "alguicida": DOSIS_ALGUICIDA_ML_10K }
+
+class EstrategiaAntisarro(_EstrategiaPorLitros):
+    BASES = { "antisarro": DOSIS_ANTISARRO_ML_10K }
+
+# Estrategia por razón de visita (la API recibe la razón como texto)
+ESTRATEGIAS: Dict[str, Type[DosificacionStrategy]] = {
+    "mantenimiento": EstrategiaMantenimiento,
+    "choque":        EstrategiaChoque,
+    "alguicida":     EstrategiaAlguicida,
+    "antisarro":     EstrategiaAntisarro,
+}
+
+# Las dosis se sirven desde la caché compartida (cache_dosis.CACHE_DOSIS)
+def estrategia_para(razon: str) -> DosificacionStrategy:
+    from AquaKeeper.patrones.strategy.cache_dosis import cacheada
+    key = (razon or "").lower()
+    if key not in ESTRATEGIAS:
+        raise ValueError(f"Razón de visita desconocida: {razon}")
+    return cacheada(ESTRATEGIAS[key]())
@@ -0,0 +1,364 @@
+# aqua_manager/src/AquaKeeper/persistencia/repositorios.py
+# Repositorios de Cliente, Pileta, Visita, Producto y Stock (guardar / obtener / recorrer),
+# con implementación SQLite sobre el mismo esquema que el backend de la web (persistencia/sqlite.py)
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from copy import copy
+from itertools import groupby, islice
+from typing import TYPE_CHECKING, Generic, Iterable, Iterator, Optional, Sequence, Tuple, TypeVar
+import sqlite3
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto, Stock, Visita
+from AquaKeeper.persistencia.sqlite import ConexionesSQLite, _siguiente
+from AquaKeeper.servicios.cambios import Cambios
+from AquaKeeper.config.constantes import SQLITE_RUTA, REPOSITORIO_LOTE
+
+if TYPE_CHECKING:
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+
+T = TypeVar("T")
+
+class Repositorio(ABC, Generic[T]):
+    """
+    Contrato común: `guardar_lote` hace upsert de todo el lote de una vez (una transacción en
+    SQLite) y devuelve cuántos guardó; `iterar` recorre sin cargar la colección entera.
+    """
+    @abstractmethod
+    def guardar_lote(self, objetos: Iterable[T]) -> int: ...
+
+    def guardar(self, obj: T) -> None:
+        self.guardar_lote((obj,))
+
+    @abstractmethod
+    def obtener(self, clave) -> Optional[T]: ...
+
+    @abstractmethod
+    def iterar(self) -> Iterator[T]: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+class RepositorioProductos(Repositorio[Producto]):
+    @abstractmethod
+    def de_tipo(self, tipo: str) -> Iterator[Producto]: ...
+
+class RepositorioClientes(Repositorio[Cliente]):
+    """El stock en casa del cliente se guarda y se trae junto con el cliente."""
+
+class RepositorioPiletas(Repositorio[Pileta]):
+    @abstractmethod
+    def de_cliente(self, dni: str) -> Iterator[Pileta]: ...
+
+    # (pileta, timestamp de su última lectura), para reconstruir PiletaService
+    @abstractmethod
+    def iterar_con_lectura(self) -> Iterator[Tuple[Pileta, float]]: ...
+
+class RepositorioVisitas(Repositorio[Visita]):
+    """Append-only: guardar agrega y la clave es el número de secuencia (0, 1, ...)."""
+    @abstractmethod
+    def de_pileta(self, id_pileta: str) -> Iterator[Visita]: ...
+
+class RepositorioStock(Repositorio[Tuple[str, Stock]]):
+    """Stock por dueño ("local" o "cliente:<dni>"); guardar reemplaza todas las cantidades del dueño."""
+    @abstractmethod
+    def por_sku(self, sku: str) -> Iterator[Tuple[str, float]]: ...
+
+def duenio_cliente(dni: str) -> str:
+    return f"cliente:{dni}"
+
+# ---------- SQLite ----------
+_UPSERT_PRODUCTO = ("INSERT INTO productos (sku, nombre, tipo, unidad, presentacion, precio, modificado) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (sku) DO UPDATE SET nombre = excluded.nombre, "
+                    "tipo = excluded.tipo, unidad = excluded.unidad, presentacion = excluded.presentacion, "
+                    "precio = excluded.precio, modificado = excluded.modificado")
+_UPSERT_CLIENTE = ("INSERT INTO clientes (dni, nombre, direccion, modificado) VALUES (?, ?, ?, ?) "
+                   "ON CONFLICT (dni) DO UPDATE SET nombre = excluded.nombre, direccion = excluded.direccion, "
+                   "modificado = excluded.modificado")
+# sin ts: una pileta ya guardada conserva el timestamp de su última lectura
+_UPSERT_PILETA = ("INSERT INTO piletas (id_pileta, litros, cliente_dni, ph, turbidez, algas, ts_lectura, modificado) "
+                  "VALUES (?, ?, ?, ?, ?, ?, 0.0, ?) ON CONFLICT (id_pileta) DO UPDATE SET litros = excluded.litros, "
+                  "cliente_dni = excluded.cliente_dni, ph = excluded.ph, turbidez = excluded.turbidez, "
+                  "algas = excluded.algas, modificado = excluded.modificado")
+_UPSERT_PILETA_TS = ("INSERT INTO piletas (id_pileta, litros, cliente_dni, ph, turbidez, algas, ts_lectura, modificado) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id_pileta) DO UPDATE SET litros = excluded.litros, "
+                     "cliente_dni = excluded.cliente_dni, ph = excluded.ph, turbidez = excluded.turbidez, "
+                     "algas = excluded.algas, ts_lectura = excluded.ts_lectura, modificado = excluded.modificado")
+_INSERT_VISITA = "INSERT INTO visitas (id_pileta, razon, realizado, observacion) VALUES (?, ?, ?, ?)"
+_BORRAR_STOCK = "DELETE FROM stock WHERE duenio = ?"
+_INSERT_STOCK = "INSERT INTO stock (duenio, sku, cantidad) VALUES (?, ?, ?)"
+
+_COLS_PRODUCTO = "sku, nombre, tipo, unidad, presentacion, precio"
+_COLS_PILETA = "id_pileta, litros, cliente_dni, ph, turbidez, algas"
+_COLS_VISITA = "id_pileta, razon, realizado, observacion"
+
+class _SQLite:
+    def __init__(self, conexiones: ConexionesSQLite, tam_lote: int = REPOSITORIO_LOTE):
+        if tam_lote < 1:
+            raise ValueError("tam_lote debe ser >= 1")
+        self.conexiones = conexiones
+        self.tam_lote = tam_lote
+
+    # Cursor en streaming: de a `tam_lote` filas, nunca la tabla entera en memoria
+    def _filas(self, sql: str, args: Sequence = ()) -> Iterator[tuple]:
+        cur = self.conexiones.conexion().execute(sql, args)
+        try:
+            while True:
+                filas = cur.fetchmany(self.tam_lote)
+                if not filas:
+                    return
+                yield from filas
+        finally:
+            cur.close()
+
+    def _uno(self, sql: str, args: Sequence) -> Optional[tuple]:
+        return self.conexiones.conexion().execute(sql, args).fetchone()
+
+    # Carga masiva: los índices secundarios de `tabla` se borran y se recrean al final (dentro de
+    # la transacción de `con`), más barato que mantenerlos fila por fila con claves desordenadas
+    @contextmanager
+    def _sin_indices(self, con: sqlite3.Connection, tabla: str) -> Iterator[None]:
+        indices = con.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                              "AND sql IS NOT NULL", (tabla,)).fetchall()
+        for nombre, _ in indices:
+            con.execute(f"DROP INDEX {nombre}")
+        yield
+        for _, sql in indices:
+            con.execute(sql)
+
+    def _contar(self, tabla: str) -> int:
+        return self.conexiones.conexion().execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+class ProductosSQLite(_SQLite, RepositorioProductos):
+    def guardar_lote(self, productos: Iterable[Producto]) -> int:
+        with self.conexiones.transaccion() as con:
+            n = _siguiente(con)
+            filas = [(p.sku, p.nombre, p.tipo, p.unidad, p.presentacion, p.precio, n) for p in productos]
+            con.executemany(_UPSERT_PRODUCTO, filas)
+        return len(filas)
+
+    def obtener(self, sku: str) -> Optional[Producto]:
+        f = self._uno(f"SELECT {_COLS_PRODUCTO} FROM productos WHERE sku = ?", (sku,))
+        return None if f is None else Producto(*f)
+
+    def iterar(self) -> Iterator[Producto]:
+        return (Producto(*f) for f in self._filas(f"SELECT {_COLS_PRODUCTO} FROM productos ORDER BY sku"))
+
+    def de_tipo(self, tipo: str) -> Iterator[Producto]:
+        return (Producto(*f) for f in self._filas(f"SELECT {_COLS_PRODUCTO} FROM productos WHERE tipo = ? "
+                                                  "ORDER BY sku", (tipo,)))
+
+    def __len__(self) -> int:
+        return self._contar("productos")
+
+class StockRepoSQLite(_SQLite, RepositorioStock):
+    def guardar_lote(self, stocks: Iterable[Tuple[str, Stock]]) -> int:
+        with self.conexiones.transaccion() as con:
+            _siguiente(con)
+            return self._reemplazar(con, stocks)
+
+    # Sin transacción propia: también lo usa ClientesSQLite dentro de la suya
+    def _reemplazar(self, con: sqlite3.Connection, stocks: Iterable[Tuple[str, Stock]]) -> int:
+        n = 0
+        for lote in _lotes(stocks, self.tam_lote):
+            con.executemany(_BORRAR_STOCK, [(d,) for d, _ in lote])
+            con.executemany(_INSERT_STOCK, [(d, sku, c) for d, st in lote for sku, c in st.cantidades.items()])
+            n += len(lote)
+        return n
+
+    def obtener(self, duenio: str) -> Optional[Tuple[str, Stock]]:
+        filas = self.conexiones.conexion().execute("SELECT sku, cantidad FROM stock WHERE duenio = ?", (duenio,)).fetchall()
+        return (duenio, Stock(dict(filas))) if filas else None
+
+    def iterar(self) -> Iterator[Tuple[str, Stock]]:
+        filas = self._filas("SELECT duenio, sku, cantidad FROM stock ORDER BY duenio, sku")
+        for duenio, grupo in groupby(filas, key=lambda f: f[0]):
+            yield duenio, Stock({sku: c for _, sku, c in grupo})
+
+    def por_sku(self, sku: str) -> Iterator[Tuple[str, float]]:
+        return self._filas("SELECT duenio, cantidad FROM stock WHERE sku = ? ORDER BY duenio", (sku,))
+
+    def __len__(self) -> int:
+        return self.conexiones.conexion().execute("SELECT COUNT(DISTINCT duenio) FROM stock").fetchone()[0]
+
+class ClientesSQLite(_SQLite, RepositorioClientes):
+    def __init__(self, conexiones: ConexionesSQLite, stock: StockRepoSQLite, tam_lote: int = REPOSITORIO_LOTE):
+        super().__init__(conexiones, tam_lote)
+        self.stock = stock
+
+    def guardar_lote(self, clientes: Iterable[Cliente]) -> int:
+        total = 0
+        with self.conexiones.transaccion() as con:
+            n = _siguiente(con)
+            for lote in _lotes(clientes, self.tam_lote):
+                con.executemany(_UPSERT_CLIENTE, [(c.dni, c.nombre, c.direccion, n) for c in lote])
+                self.stock._reemplazar(con, [(duenio_cliente(c.dni), c.stock) for c in lote])
+                total += len(lote)
+        return total
+
+    def obtener(self, dni: str) -> Optional[Cliente]:
+        f = self._uno("SELECT dni, nombre, direccion FROM clientes WHERE dni = ?", (dni,))
+        if f is None:
+            return None
+        st = self.stock.obtener(duenio_cliente(dni))
+        return Cliente(*f, stock=st[1] if st is not None else Stock())
+
+    # Un solo recorrido: clientes con su stock (LEFT JOIN ordenado por dni)
+    def iterar(self) -> Iterator[Cliente]:
+        filas = self._filas("SELECT c.dni, c.nombre, c.direccion, s.sku, s.cantidad FROM clientes c "
+                            "LEFT JOIN stock s ON s.duenio = 'cliente:' || c.dni ORDER BY c.dni")
+        for (dni, nombre, direccion), grupo in groupby(filas, key=lambda f: f[:3]):
+            yield Cliente(dni, nombre, direccion, Stock({f[3]: f[4] for f in grupo if f[3] is not None}))
+
+    def __len__(self) -> int:
+        return self._contar("clientes")
+
+class PiletasSQLite(_SQLite, RepositorioPiletas):
+    # ts_lectura (alineado con piletas): timestamp de la última lectura de cada una
+    def guardar_lote(self, piletas: Iterable[Pileta], ts_lectura: Optional[Iterable[float]] = None) -> int:
+        with self.conexiones.transaccion() as con:
+            n = _siguiente(con)
+            antes = con.total_changes
+            if ts_lectura is None:
+                con.executemany(_UPSERT_PILETA, ((p.id_pileta, p.litros, p.cliente_dni, p.ph, p.turbidez, p.algas, n)
+                                                 for p in piletas))
+            else:
+                con.executemany(_UPSERT_PILETA_TS, ((p.id_pileta, p.litros, p.cliente_dni, p.ph, p.turbidez, p.algas, ts, n)
+                                                    for p, ts in zip(piletas, ts_lectura)))
+            return con.total_changes - antes
+
+    # Igual que guardar_lote, para lotes grandes (p. ej. importar la flota entera a una base nueva)
+    def importar(self, piletas: Iterable[Pileta], ts_lectura: Optional[Iterable[float]] = None) -> int:
+        with self.conexiones.transaccion() as con, self._sin_indices(con, "piletas"):
+            return self.guardar_lote(piletas, ts_lectura)
+
+    def obtener(self, id_pileta: str) -> Optional[Pileta]:
+        f = self._uno(f"SELECT {_COLS_PILETA} FROM piletas WHERE id_pileta = ?", (id_pileta,))
+        return None if f is None else Pileta(*f)
+
+    def iterar(self) -> Iterator[Pileta]:
+        return (Pileta(*f) for f in self._filas(f"SELECT {_COLS_PILETA} FROM piletas"))
+
+    def iterar_con_lectura(self) -> Iterator[Tuple[Pileta, float]]:
+        return ((Pileta(*f[:6]), f[6]) for f in self._filas(f"SELECT {_COLS_PILETA}, ts_lectura FROM piletas"))
+
+    def de_cliente(self, dni: str) -> Iterator[Pileta]:
+        return (Pileta(*f) for f in self._filas(f"SELECT {_COLS_PILETA} FROM piletas WHERE cliente_dni = ?", (dni,)))
+
+    def __len__(self) -> int:
+        return self._contar("piletas")
+
+def _visita(f: tuple) -> Visita:
+    return Visita(id_pileta=f[0], razon=f[1], realizado=bool(f[2]), observacion=f[3])
+
+class VisitasRepoSQLite(_SQLite, RepositorioVisitas):
+    def guardar_lote(self, visitas: Iterable[Visita]) -> int:
+        with self.conexiones.transaccion() as con:
+            _siguiente(con)
+            antes = con.total_changes
+            con.executemany(_INSERT_VISITA, ((v.id_pileta, v.razon, int(v.realizado), v.observacion) for v in visitas))
+            return con.total_changes - antes
+
+    # seq en la base arranca en 1 (INTEGER PRIMARY KEY, sin borrados); acá la clave es la posición desde 0
+    def obtener(self, seq: int) -> Optional[Visita]:
+        f = self._uno(f"SELECT {_COLS_VISITA} FROM visitas WHERE seq = ?", (seq + 1,))
+        return None if f is None else _visita(f)
+
+    def iterar(self) -> Iterator[Visita]:
+        return (_visita(f) for f in self._filas(f"SELECT {_COLS_VISITA} FROM visitas ORDER BY seq"))
+
+    def de_pileta(self, id_pileta: str) -> Iterator[Visita]:
+        return (_visita(f) for f in self._filas(f"SELECT {_COLS_VISITA} FROM visitas WHERE id_pileta = ? ORDER BY seq",
+                                                (id_pileta,)))
+
+    def __len__(self) -> int:
+        return self._contar("visitas")
+
+def _lotes(it: Iterable[T], n: int) -> Iterator[list]:
+    it = iter(it)
+    while True:
+        lote = list(islice(it, n))
+        if not lote:
+            return
+        yield lote
+
+class RepositoriosSQLite:
+    """Los cinco repositorios sobre una misma base; `transaccion()` agrupa escrituras de varios."""
+    def __init__(self, ruta: str = SQLITE_RUTA, tam_lote: int = REPOSITORIO_LOTE):
+        self.conexiones = ConexionesSQLite(ruta)
+        self.productos = ProductosSQLite(self.conexiones, tam_lote)
+        self.stock = StockRepoSQLite(self.conexiones, tam_lote)
+        self.clientes = ClientesSQLite(self.conexiones, self.stock, tam_lote)
+        self.piletas = PiletasSQLite(self.conexiones, tam_lote)
+        self.visitas = VisitasRepoSQLite(self.conexiones, tam_lote)
+
+    @contextmanager
+    def transaccion(self) -> Iterator[sqlite3.Connection]:
+        with self.conexiones.transaccion() as con:
+            yield con
+
+    def cerrar(self) -> None:
+        self.conexiones.cerrar()
+
+# ---------- Guardar / recuperar el estado de los servicios ----------
+# Todo en una transacción. Las visitas son append-only: solo se agregan las que el repo no tiene.
+# Es un checkpoint completo: lo marcado en svc.cambios hasta acá deja de estar pendiente.
+def volcar_servicios(repos: RepositoriosSQLite, inv: InventarioLocal, svc: PiletaService) -> None:
+    cambios = svc.tomar_cambios(inv.version)
+    try:
+        with repos.transaccion():
+            repos.productos.guardar_lote(inv.productos.values())
+            repos.stock.guardar_lote([("local", inv.stock)])
+            repos.clientes.guardar_lote(svc.clientes.values())
+            with svc.lock:
+                flota = svc.flota
+                ids = list(svc.piletas)
+                ts = flota.ts_lectura[flota.filas(ids)].tolist()
+                repos.piletas.guardar_lote([svc.piletas[i] for i in ids], ts)
+            repos.visitas.guardar_lote(svc.visitas.desde(len(repos.visitas)))
+    except BaseException:
+        svc.cambios.devolver(cambios)
+        raise
+
+# Checkpoint incremental: solo lo modificado desde el anterior (svc.tomar_cambios), en una
+# transacción con un executemany por tabla. Si la escritura falla, los cambios vuelven a quedar
+# pendientes. Solo se marca lo que pasa por los servicios: con `verificar` (default) antes se
+# buscan piletas cambiadas directo sobre el objeto (svc.resincronizar, recorre la flota); sin él
+# el costo depende solo de los cambios, y una edición directa no se guarda hasta el próximo volcado.
+def guardar_cambios(repos: RepositoriosSQLite, inv: InventarioLocal, svc: PiletaService,
+                    verificar: bool = True) -> Cambios:
+    with svc.lock:
+        if verificar:
+            svc.resincronizar()
+        cambios = svc.tomar_cambios(inv.version)
+        flota = svc.flota
+        piletas = [copy(svc.piletas[i]) for i in cambios.piletas]    # fotos coherentes con ts_lectura
+        ts = flota.ts_lectura[flota.filas(cambios.piletas)].tolist()
+    try:
+        with repos.transaccion():
+            if cambios.inventario:
+                repos.productos.guardar_lote(inv.productos.values())
+                repos.stock.guardar_lote([("local", inv.stock)])
+            repos.clientes.guardar_lote(svc.clientes[d] for d in cambios.clientes)
+            repos.piletas.guardar_lote(piletas, ts)
+            nuevas = islice(svc.visitas.desde(cambios.visitas_desde), cambios.visitas_hasta - cambios.visitas_desde)
+            repos.visitas.guardar_lote(nuevas)
+    except BaseException:
+        svc.cambios.devolver(cambios)
+        raise
+    return cambios
+
+# Carga en inv/svc (recién creados) lo guardado, sin volver a escribirlo
+def cargar_servicios(repos: RepositoriosSQLite, inv: InventarioLocal, svc: PiletaService) -> None:
+    local = repos.stock.obtener("local")
+    cantidades = dict(local[1].cantidades) if local is not None else {}
+    for p in repos.productos.iterar():
+        inv.registrar_producto(p, cantidad_inicial=cantidades.pop(p.sku, 0.0), persistir=False)
+    for sku, cant in cantidades.items():     # stock de SKUs sin producto registrado
+        inv.stock.disponer(sku, cant)
+    for c in repos.clientes.iterar():
+        svc.registrar_cliente(c, persistir=False)
+    for p, ts in repos.piletas.iterar_con_lectura():
+        svc.cargar_pileta(p, ts)
+    svc.visitas.extend(repos.visitas.iterar())
+    svc.tomar_cambios(inv.version)     # lo recién cargado ya está guardado
@@ -0,0 +1,345 @@
+# aqua_manager/src/AquaKeeper/persistencia/sqlite.py
+# Backend SQLite (WAL) compartido entre workers: clientes, piletas, productos, visitas y stock
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+import os
+import sqlite3
+import threading
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto, Visita
+from AquaKeeper.config.constantes import SQLITE_RUTA
+
+if TYPE_CHECKING:
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor INTEGER NOT NULL) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta (clave, valor) VALUES ('version', 0);
+CREATE TABLE IF NOT EXISTS productos (
+    sku TEXT PRIMARY KEY, nombre TEXT NOT NULL, tipo TEXT NOT NULL, unidad TEXT NOT NULL,
+    presentacion TEXT NOT NULL, precio REAL NOT NULL, modificado INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS clientes (
+    dni TEXT PRIMARY KEY, nombre TEXT NOT NULL, direccion TEXT NOT NULL, modificado INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS piletas (
+    id_pileta TEXT PRIMARY KEY, litros REAL NOT NULL, cliente_dni TEXT NOT NULL,
+    ph REAL NOT NULL, turbidez REAL NOT NULL, algas REAL NOT NULL, ts_lectura REAL NOT NULL,
+    modificado INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS visitas (
+    seq INTEGER PRIMARY KEY, id_pileta TEXT NOT NULL, razon TEXT NOT NULL,
+    realizado INTEGER NOT NULL, observacion TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS stock (
+    duenio TEXT NOT NULL, sku TEXT NOT NULL, cantidad REAL NOT NULL,
+    PRIMARY KEY (duenio, sku)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS productos_modificado ON productos (modificado);
+CREATE INDEX IF NOT EXISTS clientes_modificado ON clientes (modificado);
+CREATE INDEX IF NOT EXISTS piletas_modificado ON piletas (modificado);
+CREATE INDEX IF NOT EXISTS piletas_cliente ON piletas (cliente_dni);
+CREATE INDEX IF NOT EXISTS visitas_pileta ON visitas (id_pileta, seq);
+CREATE INDEX IF NOT EXISTS productos_tipo ON productos (tipo);
+CREATE INDEX IF NOT EXISTS stock_sku ON stock (sku);
+"""
+
+# Sentencias fijas: sqlite3 guarda compiladas las últimas `cached_statements` de cada conexión
+_SIGUIENTE = "UPDATE meta SET valor = valor + 1 WHERE clave = 'version'"
+_VERSION = "SELECT valor FROM meta WHERE clave = 'version'"
+_STOCK_SUMAR = ("INSERT INTO stock (duenio, sku, cantidad) VALUES (?, ?, ?) "
+                "ON CONFLICT (duenio, sku) DO UPDATE SET cantidad = cantidad + excluded.cantidad")
+_STOCK_FIJAR = ("INSERT INTO stock (duenio, sku, cantidad) VALUES (?, ?, ?) "
+                "ON CONFLICT (duenio, sku) DO UPDATE SET cantidad = excluded.cantidad")
+_STOCK_BORRAR = "DELETE FROM stock WHERE duenio = ?"
+_STOCK_DESCONTAR = "UPDATE stock SET cantidad = cantidad - ? WHERE duenio = ? AND sku = ? AND cantidad >= ?"
+_STOCK_LEER = "SELECT cantidad FROM stock WHERE duenio = ? AND sku = ?"
+_STOCK_DUENIO = "SELECT sku, cantidad FROM stock WHERE duenio = ? AND cantidad != 0"
+_PRODUCTO = ("INSERT OR REPLACE INTO productos (sku, nombre, tipo, unidad, presentacion, precio, modificado) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_CLIENTE = "INSERT OR REPLACE INTO clientes (dni, nombre, direccion, modificado) VALUES (?, ?, ?, ?)"
+_PILETA = ("INSERT OR REPLACE INTO piletas (id_pileta, litros, cliente_dni, ph, turbidez, algas, ts_lectura, modificado) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+# una lectura más vieja que la guardada (otro worker ya aplicó una más nueva) no pisa
+_LECTURA = ("UPDATE piletas SET ts_lectura = ?, ph = ?, turbidez = ?, algas = ?, modificado = ? "
+            "WHERE id_pileta = ? AND ts_lectura < ?")
+_VISITA = "INSERT INTO visitas (id_pileta, razon, realizado, observacion) VALUES (?, ?, ?, ?)"
+
+class ConexionesSQLite:
+    """
+    Una conexión por hilo y por proceso (si el worker se forkea, abre conexiones nuevas).
+    Modo autocommit de sqlite3; `transaccion()` abre BEGIN IMMEDIATE (toma el lock de
+    escritura al empezar, así dos workers no se cruzan en leer-y-escribir) y es reentrante.
+    Como nadie más escribe mientras dura, los números de cambio que sube (meta.version) son
+    todos de este proceso: quedan en `propias` para que sincronizar no relea lo ya aplicado.
+    """
+    def __init__(self, ruta: str = SQLITE_RUTA):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._propias: Set[int] = set()
+        self._propias_lock = threading.Lock()
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.conexion().executescript(ESQUEMA)
+
+    def conexion(self) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            self._local = threading.local()
+            self._pid = os.getpid()
+            self._propias = set()       # las del padre no las escribió este worker
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30.0, isolation_level=None,
+                                  check_same_thread=True, cached_statements=256)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA foreign_keys=OFF")
+            self._local.con = con
+            self._local.profundidad = 0
+        return con
+
+    @contextmanager
+    def transaccion(self) -> Iterator[sqlite3.Connection]:
+        con = self.conexion()
+        if self._local.profundidad:
+            self._local.profundidad += 1
+            try:
+                yield con
+            finally:
+                self._local.profundidad -= 1
+            return
+        con.execute("BEGIN IMMEDIATE")
+        self._local.profundidad = 1
+        try:
+            antes = con.execute(_VERSION).fetchone()[0]
+            yield con
+            escritas = range(antes + 1, con.execute(_VERSION).fetchone()[0] + 1)
+        except BaseException:
+            self._local.profundidad = 0
+            con.execute("ROLLBACK")
+            raise
+        self._local.profundidad = 0
+        with self._propias_lock:
+            self._propias.update(escritas)
+        try:
+            con.execute("COMMIT")
+        except BaseException:
+            with self._propias_lock:
+                self._propias.difference_update(escritas)
+            raise
+
+    # Números de cambio de este proceso en (desde, hasta]
+    def propias(self, desde: int, hasta: int) -> Set[int]:
+        with self._propias_lock:
+            return {v for v in self._propias if desde < v <= hasta}
+
+    # Descarta los ya cubiertos por sincronizar (<= hasta)
+    def olvidar_propias(self, hasta: int) -> None:
+        with self._propias_lock:
+            self._propias = {v for v in self._propias if v > hasta}
+
+    def cerrar(self) -> None:
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+# Número de cambio: cada transacción de escritura sube meta.version y marca sus filas con ese valor
+def _siguiente(con: sqlite3.Connection) -> int:
+    con.execute(_SIGUIENTE)
+    return con.execute(_VERSION).fetchone()[0]
+
+class StockSQLite:
+    """
+    Misma API que Stock (disponer/descontar/disponible/cantidades) sobre la tabla `stock`,
+    filtrada por dueño ("local" o "cliente:<dni>"). Cada operación es atómica en la base:
+    el descuento es un UPDATE condicionado, así dos workers no pueden vender la misma unidad.
+    """
+    __slots__ = ("conexiones", "duenio")
+
+    def __init__(self, conexiones: ConexionesSQLite, duenio: str):
+        self.conexiones = conexiones
+        self.duenio = duenio
+
+    def disponer(self, sku: str, cant: float) -> None:
+        with self.conexiones.transaccion() as con:
+            _siguiente(con)
+            con.execute(_STOCK_SUMAR, (self.duenio, sku, cant))
+
+    def descontar(self, sku: str, cant: float) -> None:
+        with self.conexiones.transaccion() as con:
+            if con.execute(_STOCK_DESCONTAR, (cant, self.duenio, sku, cant)).rowcount != 1:
+                actual = self.disponible(sku)
+                if cant > actual:
+                    raise ValueError(f"Stock insuficiente para {sku} (tiene {actual}, pide {cant})")
+                con.execute(_STOCK_SUMAR, (self.duenio, sku, -cant))   # sin fila todavía y cant <= 0
+            _siguiente(con)
+
+    def fijar(self, sku: str, cant: float) -> None:
+        with self.conexiones.transaccion() as con:
+            _siguiente(con)
+            con.execute(_STOCK_FIJAR, (self.duenio, sku, cant))
+
+    def disponible(self, sku: str) -> float:
+        fila = self.conexiones.conexion().execute(_STOCK_LEER, (self.duenio, sku)).fetchone()
+        return 0.0 if fila is None else fila[0]
+
+    @property
+    def cantidades(self) -> Dict[str, float]:
+        return dict(self.conexiones.conexion().execute(_STOCK_DUENIO, (self.duenio,)).fetchall())
+
+    def __repr__(self) -> str:
+        return f"StockSQLite({self.duenio!r}, {self.cantidades})"
+
+class VisitasSQLite:
+    """Reemplazo de BitacoraVisitas sobre la tabla `visitas` (compartida entre workers)."""
+    def __init__(self, conexiones: ConexionesSQLite):
+        self.conexiones = conexiones
+
+    def __len__(self) -> int:
+        return self.conexiones.conexion().execute("SELECT COUNT(*) FROM visitas").fetchone()[0]
+
+    def append(self, v: Visita) -> None:
+        self.extend((v,))
+
+    def extend(self, visitas: Iterable[Visita]) -> None:
+        filas = [(v.id_pileta, v.razon, int(v.realizado), v.observacion) for v in visitas]
+        if filas:
+            with self.conexiones.transaccion() as con:
+                _siguiente(con)
+                con.executemany(_VISITA, filas)
+
+    def __iter__(self) -> Iterator[Visita]:
+        cur = self.conexiones.conexion().execute("SELECT id_pileta, razon, realizado, observacion FROM visitas ORDER BY seq")
+        for fila in cur:
+            yield _visita(fila)
+
+    # seq de la tabla = posición + 1
+    def desde(self, seq: int) -> Iterator[Visita]:
+        cur = self.conexiones.conexion().execute(
+            "SELECT id_pileta, razon, realizado, observacion FROM visitas WHERE seq > ? ORDER BY seq", (max(0, seq),))
+        for fila in cur:
+            yield _visita(fila)
+
+    def recientes(self, n: Optional[int] = None) -> List[Visita]:
+        sql = "SELECT id_pileta, razon, realizado, observacion FROM visitas ORDER BY seq DESC"
+        filas = self.conexiones.conexion().execute(sql + (" LIMIT ?" if n is not None else ""),
+                                                   (max(0, n),) if n is not None else ()).fetchall()
+        return [_visita(f) for f in reversed(filas)]
+
+    def historial(self, id_pileta: str, limite: Optional[int] = None) -> List[Visita]:
+        sql = "SELECT id_pileta, razon, realizado, observacion FROM visitas WHERE id_pileta = ? ORDER BY seq DESC"
+        args = (id_pileta,) if limite is None else (id_pileta, max(0, limite))
+        filas = self.conexiones.conexion().execute(sql + (" LIMIT ?" if limite is not None else ""), args).fetchall()
+        return [_visita(f) for f in reversed(filas)]
+
+    def volcar(self) -> None:
+        pass    # ya está en la base
+
+def _visita(fila: Sequence) -> Visita:
+    return Visita(id_pileta=fila[0], razon=fila[1], realizado=bool(fila[2]), observacion=fila[3])
+
+class AlmacenSQLite:
+    """
+    Backend compartido de InventarioLocal y PiletaService. El stock vive solo en la base
+    (StockSQLite); clientes, piletas y productos se escriben a la base y además quedan en
+    memoria en cada worker, que trae lo que cambiaron los demás con `sincronizar()`.
+    """
+    def __init__(self, ruta: str = SQLITE_RUTA):
+        self.conexiones = ConexionesSQLite(ruta)
+        self._visto = 0                 # último meta.version aplicado en memoria
+        self._sinc_lock = threading.Lock()
+
+    @property
+    def ruta(self) -> str:
+        return self.conexiones.ruta
+
+    def transaccion(self):
+        return self.conexiones.transaccion()
+
+    def version(self) -> int:
+        return self.conexiones.conexion().execute(_VERSION).fetchone()[0]
+
+    def vacio(self) -> bool:
+        con = self.conexiones.conexion()
+        return con.execute("SELECT EXISTS (SELECT 1 FROM productos) OR EXISTS (SELECT 1 FROM clientes)").fetchone()[0] == 0
+
+    def stock(self, duenio: str) -> StockSQLite:
+        return StockSQLite(self.conexiones, duenio)
+
+    def visitas(self) -> VisitasSQLite:
+        return VisitasSQLite(self.conexiones)
+
+    # Escrituras (las llaman los servicios)
+    def guardar_producto(self, p: Producto) -> None:
+        with self.transaccion() as con:
+            con.execute(_PRODUCTO, (p.sku, p.nombre, p.tipo, p.unidad, p.presentacion, p.precio, _siguiente(con)))
+
+    # Alta de cliente: el stock que traiga el objeto reemplaza al guardado (los SKUs que no trae se
+    # borran); si ya es el StockSQLite de la base queda como está
+    def guardar_cliente(self, c: Cliente) -> StockSQLite:
+        st = self.stock(f"cliente:{c.dni}")
+        with self.transaccion() as con:
+            con.execute(_CLIENTE, (c.dni, c.nombre, c.direccion, _siguiente(con)))
+            if not isinstance(c.stock, StockSQLite):
+                con.execute(_STOCK_BORRAR, (st.duenio,))
+                con.executemany(_STOCK_FIJAR, [(st.duenio, sku, cant) for sku, cant in c.stock.cantidades.items()])
+        return st
+
+    def guardar_pileta(self, p: Pileta, ts_lectura: float = 0.0) -> None:
+        with self.transaccion() as con:
+            con.execute(_PILETA, (p.id_pileta, p.litros, p.cliente_dni, p.ph, p.turbidez, p.algas,
+                                  ts_lectura, _siguiente(con)))
+
+    def guardar_lecturas(self, ids: Sequence[str], ts: Sequence[float], ph: Sequence[float],
+                         turbidez: Sequence[float], algas: Sequence[float]) -> None:
+        if not len(ids):
+            return
+        with self.transaccion() as con:
+            n = _siguiente(con)
+            con.executemany(_LECTURA, ((t, a, b, c, n, i, t) for i, t, a, b, c in zip(ids, ts, ph, turbidez, algas)))
+
+    # Trae a memoria lo que otros workers cambiaron desde la última vez (sin volver a escribirlo).
+    # Las filas marcadas con un número de cambio propio ya están en memoria y se saltean; si todos
+    # los cambios nuevos son propios, solo avanza la marca. Devuelve si aplicó algo.
+    def sincronizar(self, inv: InventarioLocal, svc: PiletaService) -> bool:
+        con = self.conexiones.conexion()
+        if con.execute(_VERSION).fetchone()[0] == self._visto:
+            return False
+        with self._sinc_lock:
+            fuera_de_tx = not con.in_transaction
+            if fuera_de_tx:
+                con.execute("BEGIN")    # lectura consistente de las tres tablas
+            try:
+                hasta = con.execute(_VERSION).fetchone()[0]
+                desde = self._visto
+                propias = self.conexiones.propias(desde, hasta)
+                if len(propias) == hasta - desde:
+                    productos, clientes, piletas = [], [], []
+                else:
+                    productos = con.execute("SELECT sku, nombre, tipo, unidad, presentacion, precio, modificado "
+                                            "FROM productos WHERE modificado > ? ORDER BY modificado", (desde,)).fetchall()
+                    clientes = con.execute("SELECT dni, nombre, direccion, modificado FROM clientes WHERE modificado > ? "
+                                           "ORDER BY modificado", (desde,)).fetchall()
+                    piletas = con.execute("SELECT id_pileta, litros, cliente_dni, ph, turbidez, algas, ts_lectura, "
+                                          "modificado FROM piletas WHERE modificado > ? ORDER BY modificado",
+                                          (desde,)).fetchall()
+            finally:
+                if fuera_de_tx:
+                    con.execute("COMMIT")
+            aplicadas = 0
+            for *f, m in productos:
+                if m not in propias:
+                    inv.registrar_producto(Producto(*f), persistir=False)
+                    aplicadas += 1
+            for dni, nombre, direccion, m in clientes:
+                if m not in propias:
+                    svc.registrar_cliente(Cliente(dni=dni, nombre=nombre, direccion=direccion,
+                                                  stock=self.stock(f"cliente:{dni}")), persistir=False)
+                    aplicadas += 1
+            for i, litros, dni, ph, turb, algas, ts, m in piletas:
+                if m not in propias:
+                    svc.cargar_pileta(Pileta(id_pileta=i, litros=litros, cliente_dni=dni, ph=ph, turbidez=turb,
+                                             algas=algas), ts)
+                    aplicadas += 1
+            self._visto = max(self._visto, hasta)
+            self.conexiones.olvidar_propias(self._visto)
+        return aplicadas > 0
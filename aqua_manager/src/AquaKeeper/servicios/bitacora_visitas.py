@@ -0,0 +1,207 @@
+# aqua_manager/src/AquaKeeper/servicios/bitacora_visitas.py
+# Bitácora de visitas acotada: últimas N en memoria, el resto en segmentos append-only en disco
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+import json
+import shutil
+import tempfile
+import threading
+import weakref
+from AquaKeeper.entidades.modelo import Visita
+from AquaKeeper.config.constantes import VISITAS_EN_MEMORIA, VISITAS_POR_SEGMENTO
+
+class BitacoraVisitas:
+    """
+    Reemplazo de la lista `PiletaService.visitas` (append / extend / len / iteración).
+
+    Cada visita recibe un número de secuencia. Las `capacidad` más recientes quedan en
+    memoria; al superarla, las `tam_segmento` más viejas se escriben (una vez, sin
+    reescrituras) en un archivo JSONL `visitas-<primer_seq>.jsonl`. Por pileta se guardan
+    solo los números de secuencia, y por cada visita volcada su offset en el segmento,
+    así `historial(id)` lee únicamente las líneas de esa pileta.
+
+    Sin `directorio` los segmentos van a un directorio temporal creado al primer volcado, que
+    es de la bitácora: se borra con `cerrar()`, al liberarla o al salir del intérprete. Con
+    `directorio` se retoman los segmentos que ya existan allí (y nunca se borran); una última
+    línea a medio escribir (corte durante un volcado) se descarta al retomar.
+
+    Es segura entre hilos: altas y volcados van bajo un lock propio, y las lecturas toman bajo
+    ese lock una foto del estado y leen los segmentos (que no se reescriben) fuera de él.
+    """
+    def __init__(self, directorio: Optional[Path] = None,
+                 capacidad: int = VISITAS_EN_MEMORIA, tam_segmento: int = VISITAS_POR_SEGMENTO):
+        if capacidad < 1 or not (1 <= tam_segmento <= capacidad):
+            raise ValueError("Se requiere 1 <= tam_segmento <= capacidad")
+        self.capacidad = capacidad
+        self.tam_segmento = tam_segmento
+        self._dir = Path(directorio) if directorio is not None else None
+        self._ring: Deque[Visita] = deque()
+        self._seq_ring = 0                          # seq de self._ring[0]
+        self._segmentos: List[int] = []             # primer seq de cada segmento (ordenado)
+        self._offsets = array("q")                  # seq volcada -> offset dentro de su segmento
+        self._por_pileta: Dict[str, array] = {}     # id_pileta -> seqs
+        self._borrar_temporal: Optional[weakref.finalize] = None
+        self._lock = threading.Lock()
+        if self._dir is not None:
+            self._reanudar()
+
+    # API tipo lista
+    def __len__(self) -> int:
+        return self._seq_ring + len(self._ring)
+
+    def append(self, v: Visita) -> None:
+        self.extend((v,))
+
+    # Todas de una vez: un solo paso por el lock y los volcados que hagan falta al final
+    def extend(self, visitas: Iterable[Visita]) -> None:
+        with self._lock:
+            seq = len(self)
+            ring = self._ring
+            por_pileta = self._por_pileta
+            for v in visitas:
+                ring.append(v)
+                seqs = por_pileta.get(v.id_pileta)
+                if seqs is None:
+                    seqs = por_pileta[v.id_pileta] = array("q")
+                seqs.append(seq)
+                seq += 1
+            while len(ring) > self.capacidad:
+                self._volcar(self.tam_segmento)
+
+    def __iter__(self) -> Iterator[Visita]:
+        with self._lock:
+            segmentos, ring = list(self._segmentos), list(self._ring)
+        for primero in segmentos:
+            with open(self._ruta(primero), "rb") as f:
+                for linea in f:
+                    yield _decodificar(linea)
+        yield from ring
+
+    # Visitas desde el número de secuencia `seq` (p. ej. las nuevas desde un checkpoint): de disco
+    # se leen solo los segmentos que las contienen, desde el offset de la primera
+    def desde(self, seq: int) -> Iterator[Visita]:
+        seq = max(0, seq)
+        with self._lock:
+            seq_ring, ring = self._seq_ring, list(self._ring)
+            segmentos: List[int] = []
+            if seq < seq_ring:
+                segmentos = self._segmentos[bisect_right(self._segmentos, seq) - 1:]
+                offset = self._offsets[seq]
+        for k, primero in enumerate(segmentos):
+            with open(self._ruta(primero), "rb") as f:
+                if k == 0:
+                    f.seek(offset)
+                for linea in f:
+                    yield _decodificar(linea)
+        yield from ring[max(0, seq - seq_ring):]
+
+    # Consultas
+    def recientes(self, n: Optional[int] = None) -> List[Visita]:
+        with self._lock:
+            ring = list(self._ring)
+        if n is None:
+            return ring
+        return ring[-n:] if n > 0 else []
+
+    def historial(self, id_pileta: str, limite: Optional[int] = None) -> List[Visita]:
+        with self._lock:
+            seqs = self._por_pileta.get(id_pileta, array("q"))
+            if limite is None:
+                seqs = array("q", seqs)             # copia: las altas siguen fuera del lock
+            else:
+                seqs = seqs[-limite:] if limite > 0 else array("q")
+            seq_ring, ring = self._seq_ring, list(self._ring)
+            segmentos = list(self._segmentos)
+            offsets = [self._offsets[seq] for seq in seqs if seq < seq_ring]
+        res: List[Visita] = []
+        f = None
+        abierto = -1
+        try:
+            for k, seq in enumerate(seqs):
+                if seq >= seq_ring:
+                    res.append(ring[seq - seq_ring])
+                    continue
+                primero = segmentos[bisect_right(segmentos, seq) - 1]
+                if primero != abierto:
+                    if f is not None:
+                        f.close()
+                    f = open(self._ruta(primero), "rb")
+                    abierto = primero
+                f.seek(offsets[k])
+                res.append(_decodificar(f.readline()))
+        finally:
+            if f is not None:
+                f.close()
+        return res
+
+    # Vuelca a disco todo lo que está en memoria (p. ej. al apagar el server)
+    def volcar(self) -> None:
+        with self._lock:
+            if self._ring:
+                self._volcar(len(self._ring))
+
+    # Borra el directorio temporal propio (si se creó); las visitas volcadas allí se pierden
+    def cerrar(self) -> None:
+        if self._borrar_temporal is not None:
+            self._borrar_temporal()
+
+    # Internos
+    def _ruta(self, primer_seq: int) -> Path:
+        return self._dir / f"visitas-{primer_seq:012d}.jsonl"
+
+    # Se llama con self._lock tomado
+    def _volcar(self, n: int) -> None:
+        if self._dir is None:
+            self._dir = Path(tempfile.mkdtemp(prefix="aquakeeper-visitas-"))
+            self._borrar_temporal = weakref.finalize(self, shutil.rmtree, str(self._dir), True)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        primero = self._seq_ring
+        offset = 0
+        lineas = []
+        for _ in range(n):
+            linea = _codificar(self._ring.popleft())
+            self._offsets.append(offset)
+            offset += len(linea)
+            lineas.append(linea)
+        with open(self._ruta(primero), "ab") as f:
+            f.write(b"".join(lineas))
+        self._segmentos.append(primero)
+        self._seq_ring += n
+
+    def _reanudar(self) -> None:
+        if not self._dir.is_dir():
+            return
+        for ruta in sorted(self._dir.glob("visitas-*.jsonl")):
+            primero = int(ruta.stem.split("-", 1)[1])
+            if primero != self._seq_ring:
+                raise ValueError(f"Segmento fuera de secuencia en la bitácora: {ruta}")
+            offset = 0
+            with open(ruta, "r+b") as f:
+                for linea in f:
+                    if not linea.endswith(b"\n"):
+                        # cola de un volcado cortado a la mitad: se descarta (los volcados siguientes
+                        # van a un segmento nuevo, así que este queda como está)
+                        f.truncate(offset)
+                        break
+                    seq = self._seq_ring
+                    self._offsets.append(offset)
+                    self._por_pileta.setdefault(json.loads(linea)["id_pileta"], array("q")).append(seq)
+                    offset += len(linea)
+                    self._seq_ring += 1
+            if offset == 0:
+                ruta.unlink()                   # ni una línea completa: su primer seq lo toma el próximo volcado
+                continue
+            self._segmentos.append(primero)
+
+_JSON = json.JSONEncoder(ensure_ascii=False)     # uno solo (json.dumps con opciones arma uno por llamada)
+
+# Los campos de Visita son escalares: se serializa su __dict__ tal cual (asdict copiaría cada valor)
+def _codificar(v: Visita) -> bytes:
+    return _JSON.encode(v.__dict__).encode("utf-8") + b"\n"
+
+def _decodificar(linea: bytes) -> Visita:
+    return Visita(**json.loads(linea))
@@ -0,0 +1,66 @@
+# aqua_manager/src/AquaKeeper/servicios/cambios.py
+# Seguimiento de cambios entre checkpoints: qué piletas, clientes (y su stock) y visitas guardar
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+import threading
+
+@dataclass
+class Cambios:
+    """Lo pendiente de guardar al tomar un checkpoint."""
+    piletas: List[str] = field(default_factory=list)     # ids, en orden de primera modificación
+    clientes: List[str] = field(default_factory=list)    # dnis (alta o movimiento de su stock)
+    visitas_desde: int = 0                               # visitas [desde, hasta) agregadas (append-only)
+    visitas_hasta: int = 0
+    inventario: bool = False                             # productos / stock del local
+
+    def __len__(self) -> int:
+        return len(self.piletas) + len(self.clientes) + self.visitas_hasta - self.visitas_desde + int(self.inventario)
+
+class RegistroCambios:
+    """
+    Marcas de lo modificado desde el último checkpoint (dict como conjunto ordenado). Las
+    visitas no se marcan: como solo se agregan, alcanza con recordar cuántas había. El
+    inventario del local se compara por su `version`.
+
+    `tomar` devuelve lo pendiente y arranca el checkpoint siguiente; si la escritura falla,
+    `devolver` lo vuelve a dejar pendiente (junto con lo marcado mientras tanto).
+    """
+    def __init__(self):
+        self._piletas: Dict[str, None] = {}
+        self._clientes: Dict[str, None] = {}
+        self.visitas_guardadas = 0
+        self.version_inventario = -1
+        self._lock = threading.Lock()
+
+    def marcar_pileta(self, id_pileta: str) -> None:
+        with self._lock:
+            self._piletas[id_pileta] = None
+
+    def marcar_piletas(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._piletas.update(dict.fromkeys(ids))
+
+    def marcar_cliente(self, dni: str) -> None:
+        with self._lock:
+            self._clientes[dni] = None
+
+    def pendientes(self) -> int:
+        return len(self._piletas) + len(self._clientes)
+
+    def tomar(self, total_visitas: int, version_inventario: int = -1) -> Cambios:
+        with self._lock:
+            c = Cambios(list(self._piletas), list(self._clientes), self.visitas_guardadas, total_visitas,
+                        version_inventario != self.version_inventario)
+            self._piletas, self._clientes = {}, {}
+            self.visitas_guardadas = total_visitas
+            self.version_inventario = version_inventario
+            return c
+
+    def devolver(self, c: Cambios) -> None:
+        with self._lock:
+            self._piletas = {**dict.fromkeys(c.piletas), **self._piletas}
+            self._clientes = {**dict.fromkeys(c.clientes), **self._clientes}
+            self.visitas_guardadas = min(self.visitas_guardadas, c.visitas_desde)
+            if c.inventario:
+                self.version_inventario = -1
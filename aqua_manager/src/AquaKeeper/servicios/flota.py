@@ -0,0 +1,166 @@
+# aqua_manager/src/AquaKeeper/servicios/flota.py
+# Almacén columnar de piletas (una fila por pileta) para operar sobre toda la flota con NumPy
+from __future__ import annotations
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from AquaKeeper.entidades.modelo import Pileta, Visita
+from AquaKeeper.config.constantes import PH_IDEAL_MIN, PH_IDEAL_MAX, TURBIDEZ_MAX_PERMITIDA, ALGAS_UMBRAL_ALERTA
+
+def estado_agua_lote(ph: np.ndarray, turbidez: np.ndarray, algas: np.ndarray) -> np.ndarray:
+    # Misma regla que PiletaService.estado_agua_porcentual, aplicada a arrays completos
+    score = np.full(ph.shape, 100.0)
+    score -= np.where((ph >= PH_IDEAL_MIN) & (ph <= PH_IDEAL_MAX), 0.0, 25.0)
+    score -= np.where(turbidez > TURBIDEZ_MAX_PERMITIDA, 25.0, 0.0)
+    score -= np.where(algas > ALGAS_UMBRAL_ALERTA, 50.0, 0.0)
+    return np.clip(score, 0.0, 100.0)
+
+# Alertas como máscara de bits (1=ph, 2=turbidez, 4=algas; mismo orden que pileta_service.ALERTAS)
+def mascara_alertas(ph: np.ndarray, turbidez: np.ndarray, algas: np.ndarray) -> np.ndarray:
+    m = np.where((ph >= PH_IDEAL_MIN) & (ph <= PH_IDEAL_MAX), 0, 1)
+    m |= np.where(turbidez > TURBIDEZ_MAX_PERMITIDA, 2, 0)
+    m |= np.where(algas > ALGAS_UMBRAL_ALERTA, 4, 0)
+    return m.astype(np.uint8)
+
+@dataclass
+class PlanVisitas:
+    """
+    Resultado del planificador de flota, ordenado por urgencia (peor estado primero).
+    `visitas` (solo las piletas con debo_ir) se arma con `armar` la primera vez que se pide.
+    """
+    ids: List[str]               # id_pileta en orden de urgencia
+    estado: np.ndarray           # % estado del agua
+    n_faltantes: np.ndarray      # cantidad de tipos de producto que faltan en casa del cliente
+    debo_ir: np.ndarray          # bool
+    armar: Optional[Callable[[], List[Visita]]] = field(default=None, repr=False, compare=False)
+    _visitas: Optional[List[Visita]] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def visitas(self) -> List[Visita]:
+        if self._visitas is None:
+            self._visitas = self.armar() if self.armar is not None else []
+            self.armar = None
+        return self._visitas
+
+@dataclass
+class ResultadoIngesta:
+    """Resultado de PiletaService.aplicar_lecturas."""
+    recibidas: int
+    aplicadas: int                           # lecturas que quedaron como la última de su pileta
+    descartadas: int                         # válidas pero pisadas por otra más nueva (del lote o ya aplicada)
+    rechazadas: List[Tuple[int, str]]        # (posición en el lote, motivo)
+    reevaluadas: Dict[str, float]            # id_pileta -> % estado del agua, solo si cambiaron sus alertas
+    segundos: float
+
+    @property
+    def lecturas_por_s(self) -> float:
+        return self.recibidas / self.segundos if self.segundos > 0 else 0.0
+
+class FlotaPiletas:
+    """
+    Columnas NumPy (litros, ph, turbidez, algas, cliente) con una fila por pileta.
+    Las filas se asignan en orden de alta y no se reutilizan: volver a registrar
+    un id pisa su fila. Los clientes se guardan como índice entero (ver `clientes`).
+    """
+    def __init__(self, capacidad_inicial: int = 1024):
+        cap = max(1, capacidad_inicial)
+        self.ids: List[str] = []                 # fila -> id_pileta
+        self.piletas: List[Pileta] = []          # fila -> Pileta (la misma instancia que PiletaService.piletas)
+        self.clientes: List[str] = []            # índice -> dni
+        self._fila: Dict[str, int] = {}          # id_pileta -> fila
+        self._idx_cliente: Dict[str, int] = {}   # dni -> índice
+        self._litros = np.zeros(cap, dtype=np.float64)   # float: volúmenes no enteros tal cual
+        self._ph = np.zeros(cap, dtype=np.float64)
+        self._turbidez = np.zeros(cap, dtype=np.float64)
+        self._algas = np.zeros(cap, dtype=np.float64)
+        self._cliente = np.zeros(cap, dtype=np.int64)
+        self._ts = np.zeros(cap, dtype=np.float64)   # timestamp de la última lectura (0 = la del alta)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, id_pileta: str) -> bool:
+        return id_pileta in self._fila
+
+    def fila(self, id_pileta: str) -> int:
+        return self._fila[id_pileta]
+
+    # Fila de cada id (-1 si no está en la flota)
+    def filas(self, ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter(map(self._fila.get, ids, repeat(-1)), dtype=np.int64, count=len(ids))
+
+    def indice_cliente(self, dni: str) -> int:
+        idx = self._idx_cliente.get(dni)
+        if idx is None:
+            idx = self._idx_cliente[dni] = len(self.clientes)
+            self.clientes.append(dni)
+        return idx
+
+    def _crecer(self, minimo: int) -> None:
+        cap = len(self._litros)
+        if minimo <= cap:
+            return
+        nueva = max(minimo, cap * 2)
+        for nombre in ("_litros", "_ph", "_turbidez", "_algas", "_cliente", "_ts"):
+            viejo = getattr(self, nombre)
+            arr = np.zeros(nueva, dtype=viejo.dtype)
+            arr[:cap] = viejo
+            setattr(self, nombre, arr)
+
+    # Altas / actualizaciones
+    def upsert(self, p: Pileta) -> int:
+        f = self._fila.get(p.id_pileta)
+        if f is None:
+            f = len(self.ids)
+            self._crecer(f + 1)
+            self._fila[p.id_pileta] = f
+            self.ids.append(p.id_pileta)
+            self.piletas.append(p)
+        else:
+            self.piletas[f] = p
+        self._litros[f] = p.litros
+        self._cliente[f] = self.indice_cliente(p.cliente_dni)
+        self.actualizar_lectura(f, p.ph, p.turbidez, p.algas)
+        return f
+
+    def actualizar_lectura(self, fila: int, ph: float, turbidez: float, algas: float) -> None:
+        self._ph[fila] = ph
+        self._turbidez[fila] = turbidez
+        self._algas[fila] = algas
+
+    # Lecturas de varias filas a la vez (filas sin repetir)
+    def actualizar_lecturas(self, filas: np.ndarray, ts: np.ndarray, ph: np.ndarray,
+                            turbidez: np.ndarray, algas: np.ndarray) -> None:
+        self._ts[filas] = ts
+        self._ph[filas] = ph
+        self._turbidez[filas] = turbidez
+        self._algas[filas] = algas
+
+    # Vistas (sin copia) de las filas ocupadas
+    @property
+    def litros(self) -> np.ndarray: return self._litros[:len(self.ids)]
+    @property
+    def ph(self) -> np.ndarray: return self._ph[:len(self.ids)]
+    @property
+    def turbidez(self) -> np.ndarray: return self._turbidez[:len(self.ids)]
+    @property
+    def algas(self) -> np.ndarray: return self._algas[:len(self.ids)]
+    @property
+    def cliente(self) -> np.ndarray: return self._cliente[:len(self.ids)]
+    @property
+    def ts_lectura(self) -> np.ndarray: return self._ts[:len(self.ids)]
+
+    # Puntaje 0..100 de toda la flota (o de las filas pedidas), en orden de fila
+    def estado_agua(self, filas: Optional[np.ndarray] = None) -> np.ndarray:
+        if filas is None:
+            return estado_agua_lote(self.ph, self.turbidez, self.algas)
+        return estado_agua_lote(self.ph[filas], self.turbidez[filas], self.algas[filas])
+
+    def alertas(self, filas: Optional[np.ndarray] = None) -> np.ndarray:
+        if filas is None:
+            return mascara_alertas(self.ph, self.turbidez, self.algas)
+        return mascara_alertas(self.ph[filas], self.turbidez[filas], self.algas[filas])
@@ -1,8 +1,15 @@
 # aqua_manager/src/AquaKeeper/servicios/inventario_service.py
-from typing import Dict
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Tuple
 from AquaKeeper.entidades.modelo import Producto, Stock
-from AquaKeeper.patrones.observer.observer import Observable
-from AquaKeeper.config.constantes import STOCK_MIN_LOCAL, STOCK_MIN_CLIENTE  # STOCK_MIN_CLIENTE por si querés usarlo luego
+from AquaKeeper.patrones.observer.observer import Observable, DespachoPorLotes
+from AquaKeeper.config.constantes import STOCK_MIN_LOCAL, STOCK_MIN_CLIENTE, POLITICA_SKU_DEFAULT  # STOCK_MIN_CLIENTE por si querés usarlo luego
+
+if TYPE_CHECKING:
+    from AquaKeeper.persistencia.sqlite import AlmacenSQLite
+
+# Cómo elegir el SKU cuando se pide por tipo y hay varios registrados
+POLITICAS_SKU = ("primero", "mayor_stock", "mas_barato")
 
 class EventoStock:
     def __init__(self, origen: str, sku: str, nuevo: float, minimo: float):
@@ -11,30 +18,76 @@ class EventoStock:
         self.nuevo = nuevo
         self.minimo = minimo
 
+# Clave de coalescencia: por lote solo interesa el último nivel de cada (origen, sku)
+def clave_evento(ev: EventoStock) -> Tuple[str, str]:
+    return (ev.origen, ev.sku)
+
 class InventarioLocal(Observable[EventoStock]):
-    def __init__(self):
+    # Con `almacen` (backend SQLite) el stock vive en la base y los productos se escriben ahí
+    def __init__(self, politica_sku: str = POLITICA_SKU_DEFAULT, almacen: Optional["AlmacenSQLite"] = None):
         super().__init__()
+        if politica_sku not in POLITICAS_SKU:
+            raise ValueError(f"Política de SKU desconocida: {politica_sku} (esperaba {', '.join(POLITICAS_SKU)})")
+        self.politica_sku = politica_sku
         self.productos: Dict[str, Producto] = {}  # sku -> Producto
-        self.stock = Stock()                      # sku -> cantidad
+        self.almacen = almacen
+        self.stock = almacen.stock("local") if almacen is not None else Stock()  # sku -> cantidad
+        self._skus_por_tipo: Dict[str, List[str]] = {}  # tipo -> SKUs en orden de alta
+        self.version = 0                                # sube con cada alta/movimiento de stock
 
-    def registrar_producto(self, p: Producto, cantidad_inicial: float=0.0) -> None:
+    def registrar_producto(self, p: Producto, cantidad_inicial: float=0.0, persistir: bool = True) -> None:
+        persistir = persistir and self.almacen is not None
+        with self.almacen.transaccion() if persistir else nullcontext():
+            if persistir:
+                self.almacen.guardar_producto(p)
+            if cantidad_inicial:
+                self.stock.disponer(p.sku, cantidad_inicial)
+        previo = self.productos.get(p.sku)
+        if previo is not None and previo.tipo != p.tipo:
+            self._skus_por_tipo[previo.tipo].remove(p.sku)
+            if not self._skus_por_tipo[previo.tipo]:
+                del self._skus_por_tipo[previo.tipo]
+        if previo is None or previo.tipo != p.tipo:
+            self._skus_por_tipo.setdefault(p.tipo, []).append(p.sku)
         self.productos[p.sku] = p
-        if cantidad_inicial:
-            self.stock.disponer(p.sku, cantidad_inicial)
+        self.version += 1
+
+    def skus_de_tipo(self, tipo: str) -> List[str]:
+        return list(self._skus_por_tipo.get(tipo, ()))
+
+    def _precio(self, sku: str) -> float:
+        return self.productos[sku].precio
 
     def _resolver_sku(self, sku_o_tipo: str) -> str:
         if sku_o_tipo in self.productos:
             return sku_o_tipo
-        # si vino un tipo, tomamos el primer SKU de ese tipo
-        for sku, prod in self.productos.items():
-            if prod.tipo == sku_o_tipo:
-                return sku
-        # si no existe, devolvemos tal cual (dejará fallar donde corresponda)
-        return sku_o_tipo
+        # si vino un tipo, elegimos entre sus SKUs según la política
+        skus = self._skus_por_tipo.get(sku_o_tipo)
+        if not skus:
+            # si no existe, devolvemos tal cual (dejará fallar donde corresponda)
+            return sku_o_tipo
+        if len(skus) == 1 or self.politica_sku == "primero":
+            return skus[0]
+        if self.politica_sku == "mayor_stock":
+            return max(skus, key=self.stock.disponible)   # empate -> el primero registrado
+        return min(skus, key=self._precio)
+
+    # Resuelve de una vez un dict de dosis (tipo o sku -> cantidad) a sku -> cantidad
+    def resolver_dosis(self, dosis: Mapping[str, float]) -> Dict[str, float]:
+        res: Dict[str, float] = {}
+        for sku_o_tipo, cant in dosis.items():
+            sku = self._resolver_sku(sku_o_tipo)
+            res[sku] = res.get(sku, 0.0) + cant
+        return res
+
+    # Alertas de stock encoladas y coalescidas por (origen, sku); intervalo=None -> entregar con flush()
+    def activar_alertas_por_lote(self, intervalo: Optional[float] = None) -> DespachoPorLotes[EventoStock]:
+        return self.activar_lotes(clave_evento, intervalo)
 
     def reponer(self, sku_o_tipo: str, cant: float) -> None:
         sku = self._resolver_sku(sku_o_tipo)
         self.stock.disponer(sku, cant)
+        self.version += 1
 
     def obtener(self, sku: str) -> Producto:
         return self.productos[sku]
@@ -46,5 +99,6 @@ class InventarioLocal(Observable[EventoStock]):
     def descontar(self, sku_o_tipo: str, cant: float) -> None:
         sku = self._resolver_sku(sku_o_tipo)
         self.stock.descontar(sku, cant)
+        self.version += 1
         if self.disponible(sku) <= STOCK_MIN_LOCAL:
             self.notificar(EventoStock("local", sku, self.disponible(sku), STOCK_MIN_LOCAL))
@@ -0,0 +1,224 @@
+# aqua_manager/src/AquaKeeper/servicios/libro_stock.py
+# Libro de movimientos de stock (local y de cada cliente): log append-only en segmentos + snapshots
+from __future__ import annotations
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+import json
+import os
+import threading
+import time
+from AquaKeeper.entidades.modelo import Cliente, Stock
+from AquaKeeper.config.constantes import LIBRO_STOCK_SNAPSHOT_CADA, LIBRO_STOCK_POR_SEGMENTO
+
+if TYPE_CHECKING:
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+
+SNAPSHOTS_A_CONSERVAR = 2
+
+@dataclass
+class Movimiento:
+    seq: int
+    ts: float
+    duenio: str          # "local" o "cliente:<dni>"
+    sku: str
+    delta: float         # + entra, - sale
+    operacion: str       # "apertura", "disponer", "descontar"
+
+class LibroStock:
+    """
+    Cada movimiento de stock se agrega (nunca se reescribe) a `movimientos-<primer_seq>.jsonl`;
+    al llegar a `tam_segmento` movimientos se abre un segmento nuevo. Cada `snapshot_cada`
+    movimientos se guarda `snapshot-<seq>.json` con las cantidades de todos los dueños, así
+    al abrir el directorio se carga el último snapshot y solo se aplica la cola posterior
+    (sin parsear las líneas anteriores del segmento). La historia completa queda en los
+    segmentos para auditar (`movimientos`) o reconstruir a cualquier punto (`reproducir`).
+    """
+    def __init__(self, directorio: Path, snapshot_cada: int = LIBRO_STOCK_SNAPSHOT_CADA,
+                 tam_segmento: int = LIBRO_STOCK_POR_SEGMENTO):
+        if snapshot_cada < 1 or tam_segmento < 1:
+            raise ValueError("snapshot_cada y tam_segmento deben ser >= 1")
+        self.dir = Path(directorio)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.snapshot_cada = snapshot_cada
+        self.tam_segmento = tam_segmento
+        self.estado: Dict[str, Dict[str, float]] = {}   # dueño -> sku -> cantidad
+        self.seq = 0                                    # movimientos registrados
+        self._seq_snapshot = 0
+        self._segmentos: List[int] = []                 # primer seq de cada segmento
+        self._archivo = None
+        self._en_segmento = 0
+        self._lock = threading.RLock()
+        self.reaplicados = 0                            # movimientos de la cola aplicados al abrir
+        self._reanudar()
+
+    def __len__(self) -> int:
+        return self.seq
+
+    # Stock de un dueño que registra sus movimientos en este libro
+    def stock(self, duenio: str) -> StockRegistrado:
+        return StockRegistrado(self, duenio)
+
+    def registrar(self, duenio: str, sku: str, delta: float, operacion: str) -> None:
+        with self._lock:
+            if self._archivo is None or self._en_segmento >= self.tam_segmento:
+                self._rotar()
+            linea = json.dumps([self.seq, time.time(), duenio, sku, delta, operacion], ensure_ascii=False)
+            self._archivo.write(linea + "\n")
+            self._archivo.flush()
+            self._en_segmento += 1
+            self.seq += 1
+            cant = self.estado.setdefault(duenio, {})
+            cant[sku] = cant.get(sku, 0.0) + delta
+            if self.seq - self._seq_snapshot >= self.snapshot_cada:
+                self.snapshot()
+
+    # Escritura atómica (tmp + replace); se conservan los últimos SNAPSHOTS_A_CONSERVAR
+    def snapshot(self) -> Path:
+        with self._lock:
+            ruta = self._ruta_snapshot(self.seq)
+            tmp = ruta.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"seq": self.seq, "estado": self.estado}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, ruta)
+            self._seq_snapshot = self.seq
+            for viejo in self._snapshots()[:-SNAPSHOTS_A_CONSERVAR]:
+                viejo.unlink()
+            return ruta
+
+    # Auditoría: movimientos desde `desde` (opcionalmente de un dueño), leyendo solo los segmentos necesarios
+    def movimientos(self, desde: int = 0, duenio: Optional[str] = None) -> Iterator[Movimiento]:
+        with self._lock:
+            segmentos = list(self._segmentos)
+            hasta = self.seq
+        i = max(0, bisect_right(segmentos, desde) - 1)
+        for primero in segmentos[i:]:
+            for seq, linea in self._lineas(primero, desde):
+                if seq >= hasta:
+                    return
+                m = Movimiento(*json.loads(linea))
+                if duenio is None or m.duenio == duenio:
+                    yield m
+
+    # Cantidades reconstruidas desde cero aplicando los movimientos con seq < hasta
+    def reproducir(self, hasta: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        estado: Dict[str, Dict[str, float]] = {}
+        for m in self.movimientos():
+            if hasta is not None and m.seq >= hasta:
+                break
+            cant = estado.setdefault(m.duenio, {})
+            cant[m.sku] = cant.get(m.sku, 0.0) + m.delta
+        return estado
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+    # Internos
+    def _ruta_segmento(self, primer_seq: int) -> Path:
+        return self.dir / f"movimientos-{primer_seq:012d}.jsonl"
+
+    def _ruta_snapshot(self, seq: int) -> Path:
+        return self.dir / f"snapshot-{seq:012d}.json"
+
+    def _snapshots(self) -> List[Path]:
+        return sorted(self.dir.glob("snapshot-*.json"))
+
+    def _rotar(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+        self._segmentos.append(self.seq)
+        self._archivo = open(self._ruta_segmento(self.seq), "a", encoding="utf-8")
+        self._en_segmento = 0
+
+    # (seq, línea) del segmento desde `desde`; las anteriores se saltean sin parsear
+    def _lineas(self, primero: int, desde: int = 0) -> Iterator[tuple]:
+        with open(self._ruta_segmento(primero), "rb") as f:
+            for k, linea in enumerate(f):
+                if primero + k >= desde:
+                    yield primero + k, linea
+
+    def _reanudar(self) -> None:
+        self._segmentos = sorted(int(r.stem.split("-", 1)[1]) for r in self.dir.glob("movimientos-*.jsonl"))
+        for r in self._snapshots()[::-1]:
+            try:
+                with open(r, encoding="utf-8") as f:
+                    datos = json.load(f)
+            except ValueError:
+                continue    # snapshot dañado: se prueba con el anterior
+            self.estado, self.seq = datos["estado"], datos["seq"]
+            self._seq_snapshot = self.seq
+            break
+        if not self._segmentos:
+            return
+        ultimo = self._segmentos[-1]
+        self._recortar_cola(self._ruta_segmento(ultimo))
+        i = max(0, bisect_right(self._segmentos, self.seq) - 1)
+        esperado = self._segmentos[i]
+        for primero in self._segmentos[i:]:
+            if primero != esperado:
+                raise ValueError(f"Segmento fuera de secuencia en el libro de stock: {self._ruta_segmento(primero)}")
+            n = 0
+            for seq, linea in self._lineas(primero):
+                n += 1
+                if seq < self.seq:
+                    continue
+                _, _, duenio, sku, delta, _ = json.loads(linea)
+                cant = self.estado.setdefault(duenio, {})
+                cant[sku] = cant.get(sku, 0.0) + delta
+                self.seq = seq + 1
+                self.reaplicados += 1
+            esperado = primero + n
+        self._en_segmento = n
+        self._archivo = open(self._ruta_segmento(ultimo), "a", encoding="utf-8")
+
+    # Un corte a mitad de escritura deja una última línea sin \n: se descarta
+    @staticmethod
+    def _recortar_cola(ruta: Path) -> None:
+        with open(ruta, "rb+") as f:
+            datos = f.read()
+            if datos and not datos.endswith(b"\n"):
+                f.truncate(datos.rfind(b"\n") + 1)
+
+class StockRegistrado(Stock):
+    """Stock cuyas cantidades son las del libro: cada disponer/descontar queda como movimiento."""
+    def __init__(self, libro: LibroStock, duenio: str):
+        super().__init__(libro.estado.setdefault(duenio, {}))
+        self.libro = libro
+        self.duenio = duenio
+
+    def disponer(self, sku: str, cant: float) -> None:
+        self.libro.registrar(self.duenio, sku, cant, "disponer")
+        if self.al_cambiar is not None:
+            self.al_cambiar()
+
+    def descontar(self, sku: str, cant: float) -> None:
+        with self.libro._lock:
+            actual = self.cantidades.get(sku, 0.0)
+            if cant > actual:
+                raise ValueError(f"Stock insuficiente para {sku} (tiene {actual}, pide {cant})")
+            self.libro.registrar(self.duenio, sku, -cant, "descontar")
+        if self.al_cambiar is not None:
+            self.al_cambiar()
+
+# Pasa el stock del local y de cada cliente por el libro, también el de los clientes que se registren
+# después (vía svc.al_registrar_cliente). Los dueños que el libro ya conoce toman sus cantidades de
+# ahí (snapshot + cola); los nuevos abren con lo que tienen ahora.
+def conectar_libro(libro: LibroStock, inv: InventarioLocal, svc: PiletaService) -> None:
+    def conectar(duenio: str, actual) -> StockRegistrado:
+        if duenio not in libro.estado:
+            for sku, cant in actual.cantidades.items():
+                libro.registrar(duenio, sku, cant, "apertura")
+        st = libro.stock(duenio)
+        st.al_cambiar = getattr(actual, "al_cambiar", None)    # sigue avisando a RegistroCambios
+        return st
+    def conectar_cliente(c: Cliente) -> None:
+        c.stock = conectar(f"cliente:{c.dni}", c.stock)
+    inv.stock = conectar("local", inv.stock)
+    for c in svc.clientes.values():
+        conectar_cliente(c)
+    svc.al_registrar_cliente = conectar_cliente
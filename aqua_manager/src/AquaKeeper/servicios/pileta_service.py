@@ -1,22 +1,380 @@
 # aqua_manager/src/AquaKeeper/servicios/pileta_service.py
 from __future__ import annotations
-from typing import Dict, List, Tuple
-from AquaKeeper.entidades.modelo import Pileta, Cliente, Visita
-from AquaKeeper.patrones.strategy.dosificacion import DosificacionStrategy
-from AquaKeeper.config.constantes import PH_IDEAL_MIN, PH_IDEAL_MAX, TURBIDEZ_MAX_PERMITIDA, ALGAS_UMBRAL_ALERTA, STOCK_MIN_CLIENTE
+from functools import partial
+from operator import attrgetter
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import threading
+import time
+import numpy as np
+from AquaKeeper.entidades.modelo import Pileta, Cliente, Visita, StockCompacto
+from AquaKeeper.patrones.strategy.dosificacion import DosificacionStrategy, COLUMNA_TIPO, estrategia_para
+from AquaKeeper.patrones.strategy.cache_dosis import cacheada
+from AquaKeeper.servicios.flota import FlotaPiletas, PlanVisitas, ResultadoIngesta
+from AquaKeeper.servicios.bitacora_visitas import BitacoraVisitas
+from AquaKeeper.servicios.cambios import Cambios, RegistroCambios
+from AquaKeeper.config.constantes import (
+    PH_IDEAL_MIN, PH_IDEAL_MAX, TURBIDEZ_MAX_PERMITIDA, ALGAS_UMBRAL_ALERTA, TIPOS_PRODUCTO,
+    PISCINA_CHICA_L, PISCINA_MEDIANA_L, PISCINA_GRANDE_L, LECTURA_PH_MIN, LECTURA_PH_MAX
+)
+
+if TYPE_CHECKING:
+    from AquaKeeper.persistencia.sqlite import AlmacenSQLite
+    from AquaKeeper.servicios.series_lecturas import SeriesLecturas
+
+BANDAS = ("chica", "mediana", "grande")
+ALERTAS = ("ph", "turbidez", "algas")
+# Filtro por estado de alerta en pagina_piletas: una alerta puntual, cualquiera o ninguna
+ESTADOS_ALERTA = ALERTAS + ("alguna", "ninguna")
+# máscara de flota.mascara_alertas -> tupla de alertas (igual que alertas_pileta)
+_ALERTAS_POR_MASCARA = [tuple(a for k, a in enumerate(ALERTAS) if m >> k & 1) for m in range(1 << len(ALERTAS))]
+# Validaciones de aplicar_lecturas, en orden: cada lectura se rechaza por el primer motivo que cumpla
+_MOTIVOS_RECHAZO = ("pileta desconocida", "timestamp inválido", "ph fuera de rango",
+                    "turbidez inválida", "algas fuera de rango")
+
+# Banda de tamaño: el preset más cercano (corte en el punto medio entre presets)
+def banda_tamano(litros: float) -> str:
+    if litros < (PISCINA_CHICA_L + PISCINA_MEDIANA_L) / 2:
+        return "chica"
+    if litros < (PISCINA_MEDIANA_L + PISCINA_GRANDE_L) / 2:
+        return "mediana"
+    return "grande"
+
+# Alertas activas de una pileta (mismos umbrales que estado_agua_porcentual)
+def alertas_pileta(p: Pileta) -> Tuple[str, ...]:
+    res = []
+    if not (PH_IDEAL_MIN <= p.ph <= PH_IDEAL_MAX):
+        res.append("ph")
+    if p.turbidez > TURBIDEZ_MAX_PERMITIDA:
+        res.append("turbidez")
+    if p.algas > ALGAS_UMBRAL_ALERTA:
+        res.append("algas")
+    return tuple(res)
+
+# Visitas de planificar_visitas (observación igual a la de evaluar_visita), fuera del lock del servicio
+def _armar_visitas(razon: str, ids: List[str], estado: np.ndarray, tipos: List[str],
+                   faltante: np.ndarray, falta: np.ndarray) -> List[Visita]:
+    visitas = []
+    for id_pileta, est, cant, hay in zip(ids, estado.tolist(), faltante.tolist(), falta.tolist()):
+        faltan = {t: round(c, 2) for t, c, h in zip(tipos, cant, hay) if h}
+        visitas.append(Visita(id_pileta, razon, False, f"Estado agua {est:.1f}%. Faltantes: {faltan}"))
+    return visitas
 
 class PiletaService:
-    def __init__(self):
+    # Con `almacen` (backend SQLite) las altas, lecturas y visitas se escriben también en la base,
+    # compartida entre workers; lo que escriben los demás se trae con almacen.sincronizar().
+    # Con `series`, aplicar_lecturas guarda además cada lectura válida en el historial.
+    # `visitas`: bitácora a usar sin almacén (p. ej. con directorio propio para que sobreviva reinicios).
+    def __init__(self, almacen: Optional["AlmacenSQLite"] = None, series: Optional["SeriesLecturas"] = None,
+                 visitas: Optional[BitacoraVisitas] = None):
+        self.almacen = almacen
+        self.series = series
         self.piletas: Dict[str, Pileta] = {}  # id -> Pileta
         self.clientes: Dict[str, Cliente] = {}  # dni -> Cliente
-        self.visitas: List[Visita] = []
+        # últimas en memoria y el resto en disco, o todas en la base
+        if almacen is not None:
+            self.visitas = almacen.visitas()
+        else:
+            self.visitas = visitas if visitas is not None else BitacoraVisitas()
+        self.flota = FlotaPiletas()             # vista columnar de self.piletas
+        self.version = 0                        # sube con cada alta/lectura/visita (para cachés)
+        # Piletas/clientes modificados desde el último checkpoint (ver tomar_cambios). Igual que los
+        # índices, cuenta lo que pasa por el servicio; el stock de cada cliente avisa solo. Los
+        # cambios directos sobre un objeto Pileta no se ven hasta llamar a resincronizar().
+        self.cambios = RegistroCambios()
+        # se llama con cada cliente registrado (p. ej. para pasar su stock por el libro de stock)
+        self.al_registrar_cliente: Optional[Callable[[Cliente], None]] = None
+        self.lock = threading.RLock()           # altas y lecturas de piletas
+        # Índices secundarios (dict como conjunto ordenado de ids). Solo se mantienen si las
+        # altas pasan por registrar_pileta y las mediciones por actualizar_lectura.
+        self._por_cliente: Dict[str, Dict[str, None]] = {}
+        self._por_banda: Dict[str, Dict[str, None]] = {b: {} for b in BANDAS}
+        self._por_alerta: Dict[str, Dict[str, None]] = {a: {} for a in ALERTAS}
+        self._claves: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {}  # id -> (dni, banda, alertas) indexados
+        # Filas ordenadas por alerta (y "alguna") y (litros ordenados, fila): se arman al consultar y se descartan al cambiar
+        self._filas_alerta: Dict[str, np.ndarray] = {}
+        self._por_litros: Optional[Tuple[np.ndarray, np.ndarray]] = None
 
     # Altas
-    def registrar_cliente(self, c: Cliente) -> None:
+    def registrar_cliente(self, c: Cliente, persistir: bool = True) -> None:
+        if persistir and self.almacen is not None:
+            c.stock = self.almacen.guardar_cliente(c)
         self.clientes[c.dni] = c
+        if self.almacen is None:      # con almacén el stock ya se escribe en la base en cada movimiento
+            c.stock.al_cambiar = partial(self.cambios.marcar_cliente, c.dni)
+        if self.al_registrar_cliente is not None:
+            self.al_registrar_cliente(c)
+        self.cambios.marcar_cliente(c.dni)
+        self.version += 1
+
+    def registrar_pileta(self, p: Pileta, persistir: bool = True) -> None:
+        with self.lock:
+            previa = p.id_pileta in self.flota
+            ts = float(self.flota.ts_lectura[self.flota.fila(p.id_pileta)]) if previa else 0.0
+            if persistir and self.almacen is not None:
+                self.almacen.guardar_pileta(p, ts)
+            self.cargar_pileta(p, ts)
+
+    # Alta en memoria con el timestamp de su última lectura (sin escribir en el almacén)
+    def cargar_pileta(self, p: Pileta, ts_lectura: float = 0.0) -> None:
+        with self.lock:
+            self._desindexar(p.id_pileta)
+            self.piletas[p.id_pileta] = p
+            f = self.flota.upsert(p)
+            self.flota.ts_lectura[f] = ts_lectura
+            self._indexar(p)
+            self._por_litros = None
+            self.cambios.marcar_pileta(p.id_pileta)
+            self.version += 1
+
+    # Nueva lectura de sensores/medición: mantiene la pileta y la flota alineadas
+    def actualizar_lectura(self, id_pileta: str, ph: Optional[float] = None,
+                           turbidez: Optional[float] = None, algas: Optional[float] = None) -> Pileta:
+        with self.lock:
+            p = self.piletas[id_pileta]
+            if ph is not None: p.ph = ph
+            if turbidez is not None: p.turbidez = turbidez
+            if algas is not None: p.algas = algas
+            f = self.flota.fila(id_pileta)
+            if self.almacen is not None:
+                self.almacen.guardar_pileta(p, float(self.flota.ts_lectura[f]))
+            self.flota.actualizar_lectura(f, p.ph, p.turbidez, p.algas)
+            self.cambios.marcar_pileta(id_pileta)
+            self.version += 1
+            self._cambiar_alertas(id_pileta, alertas_pileta(p))
+        return p
+
+    # Lote de lecturas de sondas (columnas alineadas: una posición por lectura). Se valida todo
+    # el lote junto, por pileta queda la lectura de timestamp más alto (y solo si es más nueva
+    # que la ya aplicada) y se aplica en una sola actualización bajo el lock. Solo se reevalúan
+    # (índice de alertas + estado del agua) las piletas cuyas alertas cambiaron.
+    def aplicar_lecturas(self, ids: Sequence[str], ts: Sequence[float], ph: Sequence[float],
+                         turbidez: Sequence[float], algas: Sequence[float]) -> ResultadoIngesta:
+        t0 = time.perf_counter()
+        n = len(ids)
+        ts_a, ph_a, turb_a, algas_a = (np.asarray(x, dtype=np.float64) for x in (ts, ph, turbidez, algas))
+        if any(a.shape != (n,) for a in (ts_a, ph_a, turb_a, algas_a)):
+            raise ValueError("ids, ts, ph, turbidez y algas deben tener el mismo largo")
+        with self.lock:
+            flota = self.flota
+            filas = flota.filas(ids)
+            fallas = np.stack([
+                filas < 0,
+                ~np.isfinite(ts_a) | (ts_a <= 0),
+                ~((ph_a >= LECTURA_PH_MIN) & (ph_a <= LECTURA_PH_MAX)),
+                ~((turb_a >= 0) & np.isfinite(turb_a)),
+                ~((algas_a >= 0) & (algas_a <= 1)),
+            ])
+            malas = fallas.any(axis=0)
+            # última lectura válida de cada pileta (lexsort es estable: a igual ts gana la posterior)
+            pos = np.flatnonzero(~malas)
+            pos = pos[np.lexsort((ts_a[pos], filas[pos]))]
+            ultima = np.ones(len(pos), dtype=bool)
+            ultima[:-1] = filas[pos][1:] != filas[pos][:-1]
+            pos = pos[ultima]
+            pos = pos[ts_a[pos] > flota.ts_lectura[filas[pos]]]
+            f = filas[pos]
+            filas_f = f.tolist()
+            ids_f = list(map(flota.ids.__getitem__, filas_f))
+            if self.almacen is not None:
+                self.almacen.guardar_lecturas(ids_f, ts_a[pos].tolist(), ph_a[pos].tolist(),
+                                              turb_a[pos].tolist(), algas_a[pos].tolist())
+
+            antes = flota.alertas(f)
+            flota.actualizar_lecturas(f, ts_a[pos], ph_a[pos], turb_a[pos], algas_a[pos])
+            ahora = flota.alertas(f)
+            # los objetos Pileta se toman por fila (sin buscar cada id en self.piletas)
+            for p, v_ph, v_turb, v_algas in zip(map(flota.piletas.__getitem__, filas_f), ph_a[pos].tolist(),
+                                                turb_a[pos].tolist(), algas_a[pos].tolist()):
+                p.ph = v_ph
+                p.turbidez = v_turb
+                p.algas = v_algas
+            self.cambios.marcar_piletas(ids_f)
+
+            cambio = np.flatnonzero(antes != ahora)
+            for k, m in zip(cambio.tolist(), ahora[cambio].tolist()):
+                self._cambiar_alertas(ids_f[k], _ALERTAS_POR_MASCARA[m])
+            estado = flota.estado_agua(f[cambio]).tolist()
+            if len(pos):
+                self.version += 1
+            # el historial se escribe después de soltar el lock (es I/O por pileta y mes); el turno
+            # se reserva acá para que los lotes lleguen a la serie en el mismo orden que a la flota
+            turno = self.series.turno() if self.series is not None else None
+
+        if turno is not None:
+            ok = np.flatnonzero(~malas)
+            self.series.agregar_lote([ids[k] for k in ok.tolist()], ts_a[ok], ph_a[ok], turb_a[ok], algas_a[ok],
+                                     turno=turno)
+
+        rechazadas = [(k, _MOTIVOS_RECHAZO[int(np.argmax(fallas[:, k]))]) for k in np.flatnonzero(malas).tolist()]
+        return ResultadoIngesta(
+            recibidas=n, aplicadas=len(pos), descartadas=n - len(rechazadas) - len(pos), rechazadas=rechazadas,
+            reevaluadas={ids_f[k]: e for k, e in zip(cambio.tolist(), estado)},
+            segundos=time.perf_counter() - t0,
+        )
+
+    # Checkpoint: lo modificado desde el anterior (y deja de estar pendiente). `version_inventario`
+    # (InventarioLocal.version) indica si hay que guardar también el inventario del local.
+    def tomar_cambios(self, version_inventario: int = -1) -> Cambios:
+        with self.lock:
+            return self.cambios.tomar(len(self.visitas), version_inventario)
+
+    # Piletas cambiadas por fuera del servicio (p. ej. `p.ph = ...` directo sobre el objeto), que ni
+    # la flota, ni los índices, ni self.cambios vieron: las que no coinciden con su fila de la flota.
+    # Las vuelve a cargar (conservando el timestamp de lectura) y quedan marcadas. Recorre toda la
+    # flota; devuelve los ids resincronizados.
+    def resincronizar(self) -> List[str]:
+        with self.lock:
+            flota = self.flota
+            piletas, n = flota.piletas, len(flota)
+            distinta = np.zeros(n, dtype=bool)
+            for campo, columna in (("ph", flota.ph), ("turbidez", flota.turbidez), ("algas", flota.algas),
+                                   ("litros", flota.litros)):
+                distinta |= np.fromiter(map(attrgetter(campo), piletas), dtype=np.float64, count=n) != columna
+            dnis = np.array(flota.clientes, dtype=object)[flota.cliente]
+            distinta |= np.array(list(map(attrgetter("cliente_dni"), piletas)), dtype=object) != dnis
+            ids = []
+            for f in np.flatnonzero(distinta).tolist():
+                self.cargar_pileta(piletas[f], float(flota.ts_lectura[f]))
+                ids.append(flota.ids[f])
+            return ids
+
+    # Índices secundarios
+    def _cambiar_alertas(self, id_pileta: str, ahora: Tuple[str, ...]) -> None:
+        dni, banda, antes = self._claves[id_pileta]
+        if ahora == antes:
+            return
+        for a in antes:
+            del self._por_alerta[a][id_pileta]
+        for a in ahora:
+            self._por_alerta[a][id_pileta] = None
+        self._claves[id_pileta] = (dni, banda, ahora)
+        self._filas_alerta.clear()
+
+    def _indexar(self, p: Pileta) -> None:
+        claves = (p.cliente_dni, banda_tamano(p.litros), alertas_pileta(p))
+        self._por_cliente.setdefault(claves[0], {})[p.id_pileta] = None
+        self._por_banda[claves[1]][p.id_pileta] = None
+        for a in claves[2]:
+            self._por_alerta[a][p.id_pileta] = None
+        self._claves[p.id_pileta] = claves
+        self._filas_alerta.clear()
 
-    def registrar_pileta(self, p: Pileta) -> None:
-        self.piletas[p.id_pileta] = p
+    def _desindexar(self, id_pileta: str) -> None:
+        claves = self._claves.pop(id_pileta, None)
+        if claves is None:
+            return
+        dni, banda, alertas = claves
+        del self._por_cliente[dni][id_pileta]
+        if not self._por_cliente[dni]:
+            del self._por_cliente[dni]
+        del self._por_banda[banda][id_pileta]
+        for a in alertas:
+            del self._por_alerta[a][id_pileta]
+        self._filas_alerta.clear()
+
+    def piletas_de_cliente(self, dni: str) -> List[Pileta]:
+        return [self.piletas[i] for i in self._por_cliente.get(dni, ())]
+
+    def piletas_por_banda(self, banda: str) -> List[Pileta]:
+        if banda not in self._por_banda:
+            raise ValueError(f"Banda desconocida: {banda} (esperaba {', '.join(BANDAS)})")
+        return [self.piletas[i] for i in self._por_banda[banda]]
+
+    def piletas_en_alerta(self, alerta: str) -> List[Pileta]:
+        if alerta not in self._por_alerta:
+            raise ValueError(f"Alerta desconocida: {alerta} (esperaba {', '.join(ALERTAS)})")
+        return [self.piletas[i] for i in self._por_alerta[alerta]]
+
+    # Página de piletas en orden de alta (fila de la flota). `desde` es la fila de la última pileta
+    # de la página anterior: las altas nuevas van al final y las filas no se reutilizan, así que
+    # insertar no corre las páginas ya leídas. Devuelve (piletas, desde de la página siguiente o
+    # None si no hay más). Los filtros se resuelven con el índice más selectivo (cliente, alerta,
+    # litros) y el resto se aplica con NumPy sobre las filas candidatas.
+    def pagina_piletas(self, desde: int = -1, limite: int = 100, cliente_dni: Optional[str] = None,
+                       litros_min: Optional[float] = None, litros_max: Optional[float] = None,
+                       alerta: Optional[str] = None) -> Tuple[List[Pileta], Optional[int]]:
+        if limite < 1:
+            raise ValueError("limite debe ser >= 1")
+        if alerta is not None and alerta not in ESTADOS_ALERTA:
+            raise ValueError(f"Alerta desconocida: {alerta} (esperaba {', '.join(ESTADOS_ALERTA)})")
+        with self.lock:
+            flota = self.flota
+            por_litros = litros_min is not None or litros_max is not None
+            if cliente_dni is not None:
+                filas = self._filas_indice(self._por_cliente.get(cliente_dni, {}))
+            elif alerta in ALERTAS or alerta == "alguna":
+                filas = self._filas_en_alerta(alerta)
+            elif por_litros:
+                filas = self._filas_litros(litros_min, litros_max)
+                por_litros = False
+            else:
+                filas = None
+            if filas is None:
+                filas = np.arange(max(0, desde + 1), len(flota))
+            else:
+                filas = filas[np.searchsorted(filas, desde, side="right"):]
+
+            if por_litros:
+                lit = flota.litros[filas]
+                filas = filas[((lit >= litros_min) if litros_min is not None else True) &
+                              ((lit <= litros_max) if litros_max is not None else True)]
+            if alerta is not None and (cliente_dni is not None or alerta == "ninguna"):
+                m = flota.alertas(filas)
+                if alerta == "ninguna":
+                    filas = filas[m == 0]
+                elif alerta == "alguna":
+                    filas = filas[m != 0]
+                else:
+                    filas = filas[(m & (1 << ALERTAS.index(alerta))) != 0]
+
+            pagina = filas[:limite].tolist()
+            siguiente = pagina[-1] if len(filas) > limite else None
+            return [self.piletas[flota.ids[f]] for f in pagina], siguiente
+
+    # Filas (ordenadas) de los ids de un índice secundario
+    def _filas_indice(self, ids: Dict[str, None]) -> np.ndarray:
+        return np.sort(self.flota.filas(list(ids)))
+
+    def _filas_en_alerta(self, alerta: str) -> np.ndarray:
+        filas = self._filas_alerta.get(alerta)
+        if filas is None:
+            if alerta == "alguna":
+                filas = np.unique(np.concatenate([self._filas_en_alerta(a) for a in ALERTAS]))
+            else:
+                filas = self._filas_indice(self._por_alerta[alerta])
+            self._filas_alerta[alerta] = filas
+        return filas
+
+    # Filas con litros en [minimo, maximo], por búsqueda binaria sobre la flota ordenada por litros
+    def _filas_litros(self, minimo: Optional[float], maximo: Optional[float]) -> np.ndarray:
+        if self._por_litros is None:
+            orden = np.argsort(self.flota.litros, kind="stable")
+            self._por_litros = (self.flota.litros[orden], orden)
+        valores, orden = self._por_litros
+        ini = 0 if minimo is None else np.searchsorted(valores, minimo, side="left")
+        fin = len(valores) if maximo is None else np.searchsorted(valores, maximo, side="right")
+        return np.sort(orden[ini:fin])
+
+    # Recalcula los índices desde self.piletas y falla si no coinciden con los mantenidos
+    def verificar_indices(self) -> None:
+        por_cliente: Dict[str, set] = {}
+        por_banda: Dict[str, set] = {b: set() for b in BANDAS}
+        por_alerta: Dict[str, set] = {a: set() for a in ALERTAS}
+        for id_pileta, p in self.piletas.items():
+            por_cliente.setdefault(p.cliente_dni, set()).add(id_pileta)
+            por_banda[banda_tamano(p.litros)].add(id_pileta)
+            for a in alertas_pileta(p):
+                por_alerta[a].add(id_pileta)
+        checks = [("cliente", por_cliente, self._por_cliente),
+                  ("banda", por_banda, self._por_banda),
+                  ("alerta", por_alerta, self._por_alerta)]
+        for nombre, esperado, actual in checks:
+            if esperado != {k: set(v) for k, v in actual.items() if v or k in esperado}:
+                raise ValueError(f"Índice por {nombre} inconsistente con PiletaService.piletas")
+        if set(self._claves) != set(self.piletas):
+            raise ValueError("Índices secundarios con ids que no están en PiletaService.piletas")
+        if any(self.piletas.get(i) is not p for i, p in zip(self.flota.ids, self.flota.piletas)):
+            raise ValueError("Flota con objetos Pileta distintos de PiletaService.piletas")
 
     # Cálculo de % “estado del agua” (0..100)
     def estado_agua_porcentual(self, p: Pileta) -> float:
@@ -30,6 +388,13 @@ class PiletaService:
             score -= 50.0
         return max(0.0, min(100.0, score))
 
+    # Misma regla sobre toda la flota de una vez (orden de alta) o sobre los ids pedidos
+    def estado_agua_lote(self, ids: Optional[Sequence[str]] = None) -> np.ndarray:
+        if ids is None:
+            return self.flota.estado_agua()
+        filas = np.fromiter((self.flota.fila(i) for i in ids), dtype=np.int64, count=len(ids))
+        return self.flota.estado_agua(filas)
+
     # % de cobertura por producto (en el hogar del cliente) vs lo que requeriría hoy una dosificación
     def cobertura_productos_cliente(self, dni: str, p: Pileta, strat: DosificacionStrategy) -> Dict[str, float]:
         c = self.clientes[dni]
@@ -58,13 +423,128 @@ class PiletaService:
         p = self.piletas[id_pileta]
         c = self.clientes[p.cliente_dni]
         estado = self.estado_agua_porcentual(p)
-        faltan = self.faltantes_cliente(c.dni, p, strat)
+        faltan = self.faltantes_cliente(c.dni, p, cacheada(strat))
         debo_ir = (estado < 70.0) or bool(faltan)
         v = Visita(id_pileta=id_pileta, razon=razon, realizado=False,
                    observacion=f"Estado agua {estado:.1f}%. Faltantes: {faltan}")
         self.visitas.append(v)
+        self.version += 1
         return v, debo_ir
 
+    # Stock en casa de cada cliente de la flota: matriz (índice de cliente de la flota × TIPOS_PRODUCTO)
+    # (o solo de los índices de cliente pedidos). Un dni de pileta sin cliente registrado no tiene
+    # nada en casa: fila en cero (a sus piletas les falta toda la dosis), sin cortar el plan de la flota.
+    def matriz_stock_clientes(self, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        dnis = self.flota.clientes if indices is None else [self.flota.clientes[i] for i in indices]
+        clientes = [self.clientes.get(dni) for dni in dnis]
+        # Camino rápido: todos los clientes con StockCompacto de una misma MatrizStock
+        matriz, filas_matriz = None, []
+        for c in clientes:
+            stock = c.stock if c is not None else None
+            if not isinstance(stock, StockCompacto) or (matriz is not None and stock.matriz is not matriz):
+                break
+            matriz = stock.matriz
+            filas_matriz.append(stock.fila)
+        else:
+            if matriz is not None:
+                return matriz.submatriz(filas_matriz, TIPOS_PRODUCTO)
+        filas = []
+        for c in clientes:
+            if c is None:
+                filas.append([0.0] * len(TIPOS_PRODUCTO))
+                continue
+            disponible = c.stock.disponible
+            filas.append([disponible(tipo) for tipo in TIPOS_PRODUCTO])
+        return np.array(filas, dtype=np.float64).reshape(len(dnis), len(TIPOS_PRODUCTO))
+
+    # Versión de flota de evaluar_visita: decide "debo ir" para todas las piletas en una pasada.
+    # Bajo self.lock solo se calculan el ranking y las columnas de faltantes (NumPy); las Visita
+    # (una por pileta a visitar) se arman después de soltarlo: al registrar, y si no recién
+    # cuando se pide plan.visitas. La bitácora las recibe de una vez, con su propio lock.
+    def planificar_visitas(self, razon: str, strat: DosificacionStrategy, registrar: bool = True) -> PlanVisitas:
+        with self.lock:
+            flota = self.flota
+            ids = list(flota.ids)
+            estado = flota.estado_agua()
+            dosis = cacheada(strat).calcular_dosis_lote(flota.litros)   # pileta × tipo
+            stock = self.matriz_stock_clientes()[flota.cliente]          # pileta × tipo
+            falta = stock < dosis
+            n_falt = falta.sum(axis=1)
+            debo_ir = (estado < 70.0) | (n_falt > 0)
+            orden = np.lexsort((np.arange(len(flota)), -n_falt, estado))
+            # piletas a visitar (en orden de urgencia) y solo las columnas que pueden faltar
+            sel = orden[debo_ir[orden]]
+            cols = np.flatnonzero(falta[sel].any(axis=0))
+            faltante = dosis[np.ix_(sel, cols)] - stock[np.ix_(sel, cols)]
+            falta_sel = falta[np.ix_(sel, cols)]
+
+        plan = PlanVisitas(ids=[ids[f] for f in orden.tolist()], estado=estado[orden],
+                           n_faltantes=n_falt[orden], debo_ir=debo_ir[orden])
+        plan.armar = partial(_armar_visitas, razon, [ids[f] for f in sel.tolist()], estado[sel],
+                             [TIPOS_PRODUCTO[j] for j in cols.tolist()], faltante, falta_sel)
+        if registrar:
+            self.visitas.extend(plan.visitas)
+            with self.lock:
+                self.version += 1
+        return plan
+
+    # Acción sugerida por pileta: choque si hay algas o turbidez fuera de umbral, si no mantenimiento
+    def elegir_razones(self, filas: np.ndarray) -> np.ndarray:
+        flota = self.flota
+        sucia = (flota.algas[filas] > ALGAS_UMBRAL_ALERTA) | (flota.turbidez[filas] > TURBIDEZ_MAX_PERMITIDA)
+        return np.where(sucia, "choque", "mantenimiento")
+
+    # Evaluación de toda la flota como generador, de a `tam_lote` piletas: la memoria depende del
+    # lote y no del tamaño de la flota. Sin `strat`, cada pileta usa la acción de elegir_razones.
+    # Cada item: id_pileta, estado_agua_pct, accion, cobertura y faltantes (como los métodos por pileta).
+    # Recorre las piletas que había al empezar (las altas posteriores no se incluyen, así termina aunque
+    # la flota siga creciendo). Cada lote se arma con self.lock tomado (las lecturas y altas no lo mezclan
+    # a medias) y se entrega después de soltarlo; las filas no se mueven, así que no se saltean ni repiten.
+    def iterar_evaluacion(self, razon: Optional[str] = None, strat: Optional[DosificacionStrategy] = None,
+                          tam_lote: int = 1000) -> Iterator[Dict[str, object]]:
+        if tam_lote < 1:
+            raise ValueError("tam_lote debe ser >= 1")
+        if strat is not None and razon is None:
+            raise ValueError("Con strat hay que indicar la razón")
+        with self.lock:
+            fin = len(self.flota)
+        for inicio in range(0, fin, tam_lote):
+            with self.lock:
+                filas = np.arange(inicio, min(inicio + tam_lote, fin))
+                salida = self._evaluar_filas(filas, razon, strat)
+            yield from salida
+
+    # Un lote de iterar_evaluacion (filas consecutivas); se llama con self.lock tomado
+    def _evaluar_filas(self, filas: np.ndarray, razon: Optional[str],
+                       strat: Optional[DosificacionStrategy]) -> List[Dict[str, object]]:
+        flota = self.flota
+        estado = flota.estado_agua(filas).tolist()
+        ids = flota.ids[filas[0]:filas[-1] + 1]
+        clientes, inversa = np.unique(flota.cliente[filas], return_inverse=True)
+        stock = self.matriz_stock_clientes(clientes.tolist())[inversa.reshape(-1)]
+        if strat is not None:
+            razones = np.full(len(filas), razon, dtype=object)
+            grupos = [(razon, cacheada(strat), np.arange(len(filas)))]
+        else:
+            razones = self.elegir_razones(filas)
+            grupos = [(r, estrategia_para(r), np.flatnonzero(razones == r)) for r in np.unique(razones).tolist()]
+        salida: List[Optional[Dict[str, object]]] = [None] * len(filas)
+        for r, st, pos in grupos:
+            dosis = st.calcular_dosis_lote(flota.litros[filas[pos]])
+            tipos = st.tipos(dosis)
+            cols = [COLUMNA_TIPO[t] for t in tipos]
+            dosis = dosis[:, cols].tolist()
+            disp = stock[np.ix_(pos, cols)].tolist()
+            for k, req_f, disp_f in zip(pos.tolist(), dosis, disp):
+                cobertura, faltantes = {}, {}
+                for tipo, req, d in zip(tipos, req_f, disp_f):
+                    cobertura[tipo] = round(100.0 if req == 0 else max(0.0, min(100.0, (d / req) * 100.0)), 1)
+                    if d < req:
+                        faltantes[tipo] = round(req - d, 2)
+                salida[k] = {"id_pileta": ids[k], "estado_agua_pct": estado[k], "accion": r,
+                             "cobertura": cobertura, "faltantes": faltantes}
+        return salida
+
     # Salud de “productos de la pileta” (porcentajes deseados por tipo respecto a un “target” de mantenimiento)
     def salud_productos_en_pileta(self, p: Pileta, strat: DosificacionStrategy) -> Dict[str, float]:
         # Interpretación: si HOY me pide X de cada producto, 0% = nada, 100% = tengo al menos X “en mano”.
@@ -1,19 +1,246 @@
 # aqua_manager/src/AquaKeeper/servicios/registro_service.py
+from __future__ import annotations
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import json
+import mmap
+import os
 import pickle
+import struct
+import threading
+import time
+import zlib
+from AquaKeeper.config.constantes import REGISTRO_CODEC
+try:
+    import fcntl                    # POSIX
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt                   # Windows
+except ImportError:
+    msvcrt = None
 
 @dataclass
 class RegistroOperacion:
     descripcion: str
     datos: dict
 
+# Cabecera de cada registro en el log: largo del payload, timestamp, codec, largo del nombre
+_CABECERA = struct.Struct("<IdBH")
+CODECS = {"ninguno": 0, "zlib": 1}
+
+def _comprimir(codec: int, datos: bytes) -> bytes:
+    return zlib.compress(datos) if codec == CODECS["zlib"] else datos
+
+def _descomprimir(codec: int, datos: bytes) -> bytes:
+    if codec == CODECS["zlib"]:
+        return zlib.decompress(datos)
+    if codec != CODECS["ninguno"]:
+        raise ValueError(f"Codec de registro desconocido: {codec}")
+    return datos
+
+class AlmacenRegistros:
+    """
+    Log append-only `registros.log` (registros con prefijo de largo) + índice lateral
+    `registros.idx` (JSONL nombre/ts/offset/largo). El índice se escribe después del
+    registro; si quedó atrás (corte a mitad de escritura) se completa leyendo solo las
+    cabeceras del final del log. Las lecturas van por mmap y solo se deserializa el
+    registro pedido.
+
+    Varios procesos (workers) pueden escribir el mismo directorio: cada alta toma un bloqueo
+    exclusivo (flock sobre el log; en Windows msvcrt.locking sobre `registros.lock`), se pone
+    al día con las líneas del índice que agregaron los demás y escribe al final real del
+    archivo. Solo al abrir (también con el bloqueo) se recorta un registro incompleto del final.
+    Sin fcntl ni msvcrt el bloqueo es solo entre hilos (un único proceso).
+    """
+    def __init__(self, base: Path, codec: str = REGISTRO_CODEC):
+        if codec not in CODECS:
+            raise ValueError(f"Codec desconocido: {codec} (esperaba {', '.join(CODECS)})")
+        self.codec = codec
+        self.ruta = Path(base) / "registros.log"
+        self.ruta_indice = Path(base) / "registros.idx"
+        self._indice: Dict[str, List[Tuple[float, int]]] = {}  # nombre -> [(ts, offset)] en orden de alta
+        self._fin = 0                                          # fin del último registro indexado
+        self._pos_indice = 0                                   # bytes del índice ya leídos
+        self._mm: Optional[mmap.mmap] = None
+        self._lock = threading.RLock()
+        self._cargar_indice()
+
+    def nombres(self) -> List[str]:
+        self._ponerse_al_dia()
+        return list(self._indice)
+
+    def agregar(self, nombre: str, reg: RegistroOperacion, ts: Optional[float] = None) -> int:
+        ts = time.time() if ts is None else ts
+        codec = CODECS[self.codec]
+        nombre_b = nombre.encode("utf-8")
+        payload = _comprimir(codec, pickle.dumps(reg, protocol=pickle.HIGHEST_PROTOCOL))
+        registro = _CABECERA.pack(len(payload), ts, codec, len(nombre_b)) + nombre_b + payload
+        with self._lock:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.ruta, "ab") as f, self._bloqueo_exclusivo(f):
+                self._ponerse_al_dia()              # altas de otros procesos
+                offset = os.fstat(f.fileno()).st_size
+                f.write(registro)
+                f.flush()
+                with open(self.ruta_indice, "ab") as fi:
+                    fi.write(_linea_indice(nombre, ts, offset, len(registro)))
+                    self._pos_indice = fi.tell()
+            self._fin = offset + len(registro)
+            self._indice.setdefault(nombre, []).append((ts, offset))
+        return offset
+
+    def leer_ultimo(self, nombre: str) -> Optional[RegistroOperacion]:
+        self._ponerse_al_dia()
+        entradas = self._indice.get(nombre)
+        return self._leer(entradas[-1][1]) if entradas else None
+
+    def historial(self, nombre: str, desde: Optional[float] = None, hasta: Optional[float] = None) -> List[Tuple[float, RegistroOperacion]]:
+        self._ponerse_al_dia()
+        res = []
+        for ts, offset in list(self._indice.get(nombre, ())):
+            if (desde is None or ts >= desde) and (hasta is None or ts <= hasta):
+                res.append((ts, self._leer(offset)))
+        return res
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+
+    # Internos
+    def _leer(self, offset: int) -> RegistroOperacion:
+        with self._lock:
+            if self._mm is None or len(self._mm) < self._fin:
+                if self._mm is not None:
+                    self._mm.close()
+                with open(self.ruta, "rb") as f:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mm = self._mm
+            largo, _ts, codec, largo_nombre = _CABECERA.unpack_from(mm, offset)
+            inicio = offset + _CABECERA.size + largo_nombre
+            datos = mm[inicio:inicio + largo]
+        return pickle.loads(_descomprimir(codec, datos))
+
+    # Entradas del índice agregadas (por este u otro proceso) desde la última lectura; solo
+    # líneas completas. Puede haber huecos en el log (un escritor que murió a mitad de alta):
+    # las entradas se aceptan mientras no retrocedan.
+    def _ponerse_al_dia(self) -> None:
+        try:
+            if os.path.getsize(self.ruta_indice) <= self._pos_indice:
+                return
+            tam = os.path.getsize(self.ruta)
+        except FileNotFoundError:
+            return
+        with self._lock, open(self.ruta_indice, "rb") as f:
+            f.seek(self._pos_indice)
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break               # línea a medio escribir
+                try:
+                    e = json.loads(linea)
+                except ValueError:
+                    e = None            # resto de un escritor que murió: se saltea
+                if e is not None and e["o"] + e["l"] > tam:
+                    break               # el registro es posterior a `tam`: se lee la próxima vez
+                if e is not None and e["o"] >= self._fin:
+                    self._indice.setdefault(e["n"], []).append((e["ts"], e["o"]))
+                    self._fin = e["o"] + e["l"]
+                self._pos_indice += len(linea)
+
+    def _cargar_indice(self) -> None:
+        if not self.ruta.exists():
+            return
+        with open(self.ruta, "ab") as f, self._bloqueo_exclusivo(f):   # nadie escribe mientras se revisa la cola
+            self._ponerse_al_dia()
+            tam = os.fstat(f.fileno()).st_size
+            if self._fin < tam or self._pos_indice < self._tam_indice():
+                self._recuperar_cola(f, tam)
+
+    # Bloqueo entre procesos mientras se escribe el log abierto en `f`. En Windows los bloqueos son
+    # obligatorios y por handle: se bloquea un archivo aparte para no trabar lecturas del log.
+    @contextmanager
+    def _bloqueo_exclusivo(self, f: BinaryIO) -> Iterator[None]:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            with open(self.ruta.with_suffix(".lock"), "a+b") as lf:
+                lf.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lf.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass                    # LK_LOCK se rinde a los 10 s: se sigue esperando
+                try:
+                    yield
+                finally:
+                    lf.seek(0)
+                    msvcrt.locking(lf.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            yield
+
+    def _tam_indice(self) -> int:
+        try:
+            return os.path.getsize(self.ruta_indice)
+        except FileNotFoundError:
+            return 0
+
+    # Reindexa registros que llegaron al log pero no al índice y descarta un registro incompleto
+    # del log o una línea cortada del índice. Solo al abrir, con el bloqueo del log (`log`) tomado.
+    # El índice no se reescribe: se recorta lo ilegible y se le agregan las entradas que faltan.
+    def _recuperar_cola(self, log, tam: int) -> None:
+        recuperados = []
+        with open(self.ruta, "rb") as f:
+            f.seek(self._fin)
+            while self._fin + _CABECERA.size <= tam:
+                largo, ts, _codec, largo_nombre = _CABECERA.unpack(f.read(_CABECERA.size))
+                total = _CABECERA.size + largo_nombre + largo
+                if self._fin + total > tam:
+                    break
+                nombre = f.read(largo_nombre).decode("utf-8")
+                f.seek(largo, os.SEEK_CUR)
+                self._indice.setdefault(nombre, []).append((ts, self._fin))
+                recuperados.append(_linea_indice(nombre, ts, self._fin, total))
+                self._fin += total
+        if self._fin < tam:
+            log.truncate(self._fin)
+        with open(self.ruta_indice, "ab") as fi:
+            fi.truncate(self._pos_indice)
+            fi.write(b"".join(recuperados))
+            self._pos_indice = fi.tell()
+
+def _linea_indice(nombre: str, ts: float, offset: int, largo: int) -> bytes:
+    return (json.dumps({"n": nombre, "ts": ts, "o": offset, "l": largo}, ensure_ascii=False) + "\n").encode("utf-8")
+
 class RegistroService:
     base = Path("./data")
+    _almacenes: Dict[Path, AlmacenRegistros] = {}
+    _almacenes_lock = threading.Lock()
+
+    # Un almacén por directorio, compartido entre instancias (mismo lock de escritura)
+    def almacen(self) -> AlmacenRegistros:
+        clave = self.base.resolve()
+        with self._almacenes_lock:
+            alm = self._almacenes.get(clave)
+            if alm is None:
+                alm = self._almacenes[clave] = AlmacenRegistros(self.base)
+            return alm
 
     def guardar(self, nombre: str, reg: RegistroOperacion) -> Path:
-        self.base.mkdir(exist_ok=True)
-        p = self.base / f"{nombre}.dat"
-        with open(p, "wb") as f:
-            pickle.dump(reg, f)
-        return p
+        alm = self.almacen()
+        alm.agregar(nombre, reg)
+        return alm.ruta
+
+    def leer_ultimo(self, nombre: str) -> Optional[RegistroOperacion]:
+        return self.almacen().leer_ultimo(nombre)
+
+    def historial(self, nombre: str, desde: Optional[float] = None, hasta: Optional[float] = None) -> List[Tuple[float, RegistroOperacion]]:
+        return self.almacen().historial(nombre, desde, hasta)
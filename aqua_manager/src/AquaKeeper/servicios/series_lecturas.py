@@ -0,0 +1,312 @@
+# aqua_manager/src/AquaKeeper/servicios/series_lecturas.py
+# Historial de lecturas de sondas: registros de ancho fijo en archivos por pileta y mes, leídos por mmap,
+# con resúmenes por hora y por día mantenidos al ingresar y retención de los puntos crudos
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+from AquaKeeper.servicios.flota import estado_agua_lote
+from AquaKeeper.config.constantes import SERIES_RUTA, SERIES_RETENCION_CRUDA_S
+
+# Un registro por lectura (20 bytes, sin padding)
+REGISTRO = np.dtype([("ts", "<f8"), ("ph", "<f4"), ("turbidez", "<f4"), ("algas", "<f4")])
+# Resumen de una hora o un día: cantidad de lecturas y min/max/suma de cada medida y del % estado del agua
+MEDIDAS = ("ph", "turbidez", "algas", "estado")
+RESUMEN = np.dtype([("ts", "<f8"), ("n", "<u4")] +
+                   [(f"{m}_{k}", t) for m in MEDIDAS for k, t in (("min", "<f4"), ("max", "<f4"), ("suma", "<f8"))])
+# Nivel -> (segundos por cubeta, sufijo del archivo). Horas y días no cruzan meses: mismo particionado
+NIVELES: Dict[str, Tuple[int, str]] = {"cruda": (0, ""), "hora": (3600, ".hora"), "dia": (86400, ".dia")}
+
+# Cabecera: magia, tamaño de registro, registros confirmados. Los registros van después de la cabecera
+_CABECERA = struct.Struct("<8sQQ8x")
+_MAGIA = b"AQSERIE1"
+
+def mes_de(ts: np.ndarray) -> np.ndarray:
+    """Mes (meses desde 1970-01, UTC) de cada timestamp unix."""
+    return np.asarray(ts, dtype=np.float64).astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+
+def _nombre_mes(mes: int) -> str:
+    return str(np.datetime64(mes, "M"))       # "2025-03"
+
+def _fin_de_mes(nombre: str) -> float:
+    return float((np.datetime64(nombre, "M") + 1).astype("datetime64[s]").astype(np.int64))
+
+# Nivel a usar para graficar con un punto cada `paso` segundos: el más grueso que no pierda detalle.
+# Si la consulta empieza antes del horizonte de retención, los puntos crudos ya no están: por hora.
+def nivel_para(paso: float, desde: Optional[float] = None, horizonte: Optional[float] = None) -> str:
+    if paso >= NIVELES["dia"][0]:
+        return "dia"
+    if paso >= NIVELES["hora"][0] or (desde is not None and horizonte is not None and desde < horizonte):
+        return "hora"
+    return "cruda"
+
+def promedio(resumen: np.ndarray, medida: str) -> np.ndarray:
+    """Media por cubeta de una medida de un resumen (copia)."""
+    return resumen[f"{medida}_suma"] / resumen["n"]
+
+def resumir(regs: np.ndarray, paso: int, estado: Optional[np.ndarray] = None) -> np.ndarray:
+    """Resumen por cubetas de `paso` segundos de registros ordenados por ts. `estado` (% estado del
+    agua de cada registro) por defecto se calcula de los registros, ya redondeados a float32."""
+    cubeta = np.floor(regs["ts"] / paso) * paso
+    if estado is None:
+        estado = estado_agua_lote(regs["ph"], regs["turbidez"], regs["algas"])
+    return _resumir_cubetas(regs, cubeta, np.r_[0, np.flatnonzero(cubeta[1:] != cubeta[:-1]) + 1], estado)
+
+# `ini`: posición donde empieza cada cubeta dentro de regs; `estado`: alineado con regs
+def _resumir_cubetas(regs: np.ndarray, cubeta: np.ndarray, ini: np.ndarray, estado: np.ndarray) -> np.ndarray:
+    res = np.zeros(len(ini), dtype=RESUMEN)
+    res["ts"] = cubeta[ini]
+    res["n"] = np.diff(np.r_[ini, len(regs)])
+    columnas = {m: regs[m] for m in MEDIDAS[:3]}
+    columnas["estado"] = estado
+    for m, v in columnas.items():
+        res[f"{m}_min"] = np.minimum.reduceat(v, ini)
+        res[f"{m}_max"] = np.maximum.reduceat(v, ini)
+        res[f"{m}_suma"] = np.add.reduceat(v.astype(np.float64), ini)
+    return res
+
+def _combinar(a: tuple, b: tuple) -> tuple:
+    """Une dos resúmenes de la misma cubeta (como tuplas, en el orden de RESUMEN)."""
+    res = [a[0], a[1] + b[1]]
+    for i in range(2, len(a), 3):
+        res += [min(a[i], b[i]), max(a[i + 1], b[i + 1]), a[i + 2] + b[i + 2]]
+    return tuple(res)
+
+class SeriesLecturas:
+    """
+    Un archivo `<directorio>/<id_pileta>/<AAAA-MM>.bin` por pileta y mes con registros REGISTRO
+    ordenados por timestamp, y al lado `<AAAA-MM>.hora.bin` / `<AAAA-MM>.dia.bin` con los
+    resúmenes RESUMEN de ese mes. Las lecturas se devuelven como vistas NumPy sobre un mmap de
+    solo lectura (sin copiar): `rango` da una vista por mes.
+
+    Las escrituras se serializan por turnos (ver `turno`): de a un lote y en el orden en que se
+    pidieron, así la ingesta puede escribir fuera de PiletaService.lock sin que un lote más nuevo
+    pase antes y haga descartar como viejas las lecturas del anterior. Se agrega con pwrite:
+    primero los registros y después el contador de la cabecera, que es lo que publica la escritura.
+    Los lectores no toman locks: leen el contador y ven solo registros completos. Por pileta se
+    agregan solo lecturas más nuevas que la última guardada, así reenviar un lote no duplica.
+    Los resúmenes se actualizan en la misma escritura: como las lecturas llegan en orden, solo la
+    última cubeta de cada archivo puede recibir más datos (se reescribe ese registro).
+    """
+    def __init__(self, directorio: Path = Path(SERIES_RUTA), retencion_cruda_s: Optional[float] = SERIES_RETENCION_CRUDA_S):
+        self.dir = Path(directorio)
+        self.retencion_cruda_s = retencion_cruda_s    # None = los puntos crudos no vencen (ver retener)
+        self._escritura = threading.Condition()
+        self._turnos = 0        # próximo turno a repartir
+        self._atendiendo = 0    # turno que puede escribir ahora
+
+    # Reserva el lugar del próximo agregar_lote (p. ej. con el lock de la ingesta tomado); quien lo
+    # reserva tiene que llamar a agregar_lote(..., turno=t) sí o sí, o las escrituras siguientes esperan
+    def turno(self) -> int:
+        with self._escritura:
+            t = self._turnos
+            self._turnos += 1
+            return t
+
+    def _ruta(self, id_pileta: str, mes: int, nivel: str = "cruda") -> Path:
+        return self.dir / quote(id_pileta, safe="") / f"{_nombre_mes(mes)}{NIVELES[nivel][1]}.bin"
+
+    # Escritura (ingesta)
+    def agregar_lote(self, ids: Sequence[str], ts: Sequence[float], ph: Sequence[float],
+                     turbidez: Sequence[float], algas: Sequence[float], turno: Optional[int] = None) -> Tuple[int, int]:
+        """Agrega lecturas (columnas alineadas, cualquier orden). Devuelve (agregadas, descartadas por viejas).
+        Sin `turno`, toma el siguiente."""
+        with self._escritura:
+            if turno is None:
+                turno = self._turnos
+                self._turnos += 1
+            self._escritura.wait_for(lambda: self._atendiendo == turno)
+        try:
+            return self._agregar_lote(ids, ts, ph, turbidez, algas)
+        finally:
+            with self._escritura:
+                self._atendiendo += 1
+                self._escritura.notify_all()
+
+    def _agregar_lote(self, ids: Sequence[str], ts: Sequence[float], ph: Sequence[float],
+                      turbidez: Sequence[float], algas: Sequence[float]) -> Tuple[int, int]:
+        n = len(ids)
+        if not n:
+            return 0, 0
+        ph, turbidez, algas = (np.asarray(x, dtype=np.float64) for x in (ph, turbidez, algas))
+        # el % estado se calcula antes de pasar a float32: cerca de un umbral el redondeo lo cambiaría
+        estado = estado_agua_lote(ph, turbidez, algas)
+        regs = np.empty(n, dtype=REGISTRO)
+        regs["ts"], regs["ph"], regs["turbidez"], regs["algas"] = ts, ph, turbidez, algas
+        nombres, pileta = np.unique(np.asarray(ids, dtype=str), return_inverse=True)
+        pileta = pileta.reshape(-1)
+        mes = mes_de(regs["ts"])
+        orden = np.lexsort((regs["ts"], mes, pileta))
+        regs, pileta, mes, estado = regs[orden], pileta[orden], mes[orden], estado[orden]
+        cortes = np.flatnonzero((pileta[1:] != pileta[:-1]) | (mes[1:] != mes[:-1])) + 1
+        ini_g, fin_g = np.r_[0, cortes].tolist(), np.r_[cortes, n].tolist()
+        particiones = [(str(nombres[pileta[i]]), int(mes[i])) for i in ini_g]
+        nuevas = np.zeros(n, dtype=bool)         # las que se agregaron (la cola de cada partición)
+        for (id_pileta, m), ini, fin in zip(particiones, ini_g, fin_g):
+            nuevas[fin - self._agregar(id_pileta, m, regs[ini:fin]):fin] = True
+        pos = np.flatnonzero(nuevas)
+        if len(pos):
+            # Resúmenes de todo el lote de una vez; después se escriben por partición
+            grupo = np.repeat(np.arange(len(ini_g)), np.diff(np.r_[ini_g, n]))[pos]
+            for nivel, (paso, _) in NIVELES.items():
+                if paso:
+                    self._resumir_lote(particiones, grupo, regs[pos], estado[pos], paso, nivel)
+        return len(pos), n - len(pos)
+
+    # Agrega la parte más nueva que lo guardado de regs (ordenados por ts) y devuelve cuántos agregó
+    def _agregar(self, id_pileta: str, mes: int, regs: np.ndarray) -> int:
+        ruta = self._ruta(id_pileta, mes)
+        try:
+            fd = os.open(ruta, os.O_RDWR)
+        except FileNotFoundError:
+            if self._ruta(id_pileta, mes, "hora").exists():
+                return 0    # mes ya vencido por la retención: no se vuelve a abrir
+            fd = self._abrir(ruta, REGISTRO)
+        try:
+            cantidad = self._cabecera(os.pread(fd, _CABECERA.size, 0), ruta, REGISTRO)
+            if cantidad:
+                ultimo = self._leer(fd, cantidad - 1, REGISTRO)["ts"]
+                regs = regs[np.searchsorted(regs["ts"], ultimo, side="right"):]
+            if len(regs):
+                self._escribir(fd, cantidad, regs)
+        finally:
+            os.close(fd)
+        return len(regs)
+
+    def _resumir_lote(self, particiones: List[Tuple[str, int]], grupo: np.ndarray, regs: np.ndarray,
+                      estado: np.ndarray, paso: int, nivel: str) -> None:
+        cubeta = np.floor(regs["ts"] / paso) * paso
+        ini = np.r_[0, np.flatnonzero((cubeta[1:] != cubeta[:-1]) | (grupo[1:] != grupo[:-1])) + 1]
+        res = _resumir_cubetas(regs, cubeta, ini, estado)
+        g = grupo[ini]
+        cortes = np.r_[0, np.flatnonzero(g[1:] != g[:-1]) + 1, len(g)].tolist()
+        for a, b in zip(cortes[:-1], cortes[1:]):
+            id_pileta, mes = particiones[g[a]]
+            self._resumir(self._ruta(id_pileta, mes, nivel), res[a:b])
+
+    def _resumir(self, ruta: Path, nuevos: np.ndarray) -> None:
+        fd = self._abrir(ruta, RESUMEN)
+        try:
+            cantidad = self._cabecera(os.pread(fd, _CABECERA.size, 0), ruta, RESUMEN)
+            if cantidad:
+                ultimo = self._leer(fd, cantidad - 1, RESUMEN).item()
+                primero = nuevos[0].item()
+                if ultimo[0] == primero[0]:
+                    nuevos[0] = _combinar(ultimo, primero)
+                    cantidad -= 1
+            self._escribir(fd, cantidad, nuevos)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _abrir(ruta: Path, dtype: np.dtype) -> int:
+        try:
+            return os.open(ruta, os.O_RDWR)
+        except FileNotFoundError:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            with open(ruta, "xb") as f:
+                f.write(_CABECERA.pack(_MAGIA, dtype.itemsize, 0))
+            return os.open(ruta, os.O_RDWR)
+
+    @staticmethod
+    def _leer(fd: int, i: int, dtype: np.dtype) -> np.void:
+        return np.frombuffer(os.pread(fd, dtype.itemsize, _CABECERA.size + i * dtype.itemsize), dtype=dtype)[0]
+
+    # Registros desde la posición `desde` y después el contador (publica)
+    @staticmethod
+    def _escribir(fd: int, desde: int, regs: np.ndarray) -> None:
+        os.pwrite(fd, regs.tobytes(), _CABECERA.size + desde * regs.dtype.itemsize)
+        os.pwrite(fd, _CABECERA.pack(_MAGIA, regs.dtype.itemsize, desde + len(regs)), 0)
+
+    @staticmethod
+    def _cabecera(datos: bytes, ruta: Path, dtype: np.dtype) -> int:
+        magia, tam, cantidad = _CABECERA.unpack(datos)
+        if magia != _MAGIA or tam != dtype.itemsize:
+            raise ValueError(f"Archivo de serie inválido: {ruta}")
+        return cantidad
+
+    # Retención: borra los meses de puntos crudos que terminaron antes del horizonte y cuyos resúmenes
+    # (hora y día) ya cuentan todas sus lecturas; los resúmenes quedan. No corre en la ingesta: se llama
+    # aparte (p. ej. periódicamente, fuera de PiletaService.lock). Recorre todas las piletas. Devuelve
+    # cuántos meses borró.
+    def retener(self, ahora: Optional[float] = None) -> int:
+        if self.retencion_cruda_s is None or not self.dir.is_dir():
+            return 0
+        corte = (time.time() if ahora is None else ahora) - self.retencion_cruda_s
+        borrados = 0
+        for carpeta in self.dir.iterdir():
+            for r in carpeta.glob("????-??.bin"):
+                if _fin_de_mes(r.stem) <= corte and self._resumido(r):
+                    r.unlink()
+                    borrados += 1
+        return borrados
+
+    # Los resúmenes del mes de `ruta` (puntos crudos) existen y suman tantas lecturas como los crudos
+    def _resumido(self, ruta: Path) -> bool:
+        with open(ruta, "rb") as f:
+            cantidad = self._cabecera(f.read(_CABECERA.size), ruta, REGISTRO)
+        for nivel in ("hora", "dia"):
+            r = ruta.with_name(f"{ruta.stem}{NIVELES[nivel][1]}.bin")
+            try:
+                with open(r, "rb") as f:
+                    n = self._cabecera(f.read(_CABECERA.size), r, RESUMEN)
+                    resumen = np.frombuffer(f.read(n * RESUMEN.itemsize), dtype=RESUMEN)
+            except FileNotFoundError:
+                return False
+            if len(resumen) < n or int(resumen["n"].sum()) < cantidad:
+                return False
+        return True
+
+    def horizonte(self, ahora: Optional[float] = None) -> Optional[float]:
+        """Timestamp desde el que se garantizan puntos crudos (None = sin retención)."""
+        if self.retencion_cruda_s is None:
+            return None
+        return (time.time() if ahora is None else ahora) - self.retencion_cruda_s
+
+    # Lectura (sin locks ni copias)
+    def mes(self, id_pileta: str, mes: int, nivel: str = "cruda") -> np.ndarray:
+        """Todos los registros confirmados de un mes y nivel como vista de solo lectura (vacía si no hay)."""
+        ruta = self._ruta(id_pileta, mes, nivel)
+        dtype = RESUMEN if NIVELES[nivel][0] else REGISTRO
+        try:
+            with open(ruta, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):      # ValueError: archivo vacío
+            return np.empty(0, dtype=dtype)
+        cantidad = self._cabecera(mm[:_CABECERA.size], ruta, dtype)
+        cantidad = min(cantidad, (len(mm) - _CABECERA.size) // dtype.itemsize)
+        return np.frombuffer(mm, dtype=dtype, count=cantidad, offset=_CABECERA.size)
+
+    def rango(self, id_pileta: str, desde: float, hasta: float, nivel: str = "cruda") -> List[np.ndarray]:
+        """Registros con desde <= ts <= hasta (en resúmenes, cubetas que empiezan en el rango
+        o lo contienen): una vista (sin copia) por mes con datos."""
+        if nivel not in NIVELES:
+            raise ValueError(f"Nivel desconocido: {nivel} (esperaba {', '.join(NIVELES)})")
+        paso = NIVELES[nivel][0]
+        ini = np.floor(desde / paso) * paso if paso else desde
+        res = []
+        for m in range(int(mes_de(desde)), int(mes_de(hasta)) + 1):
+            v = self.mes(id_pileta, m, nivel)
+            if len(v):
+                t = v["ts"]
+                v = v[np.searchsorted(t, ini, side="left"):np.searchsorted(t, hasta, side="right")]
+                if len(v):
+                    res.append(v)
+        return res
+
+    def serie(self, id_pileta: str, desde: float, hasta: float, paso: float = 0.0) -> Tuple[str, List[np.ndarray]]:
+        """Como `rango`, eligiendo el nivel según el paso pedido (ver nivel_para). Devuelve (nivel, vistas)."""
+        nivel = nivel_para(paso, desde, self.horizonte())
+        return nivel, self.rango(id_pileta, desde, hasta, nivel)
+
+    def meses(self, id_pileta: str, nivel: str = "cruda") -> List[str]:
+        carpeta = self.dir / quote(id_pileta, safe="")
+        if not carpeta.is_dir():
+            return []
+        return sorted(r.name[:7] for r in carpeta.glob(f"????-??{NIVELES[nivel][1]}.bin"))
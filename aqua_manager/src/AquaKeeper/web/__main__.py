@@ -0,0 +1,44 @@
+# aqua_manager/src/AquaKeeper/web/__main__.py
+# Informe de arranque de la app web.
+# Uso: PYTHONPATH=src python3 -m AquaKeeper.web --import-profile [--top 15] [--ruta /api/resumen]
+# (--import-profile pide httpx: pip install -r requirements-dev.txt, o make arranque)
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+from AquaKeeper.web.arranque import perfil_imports, primera_respuesta
+
+# Módulos que no deberían cargarse al importar la app (se cargan al precalentar o al usarse)
+PESADOS = ("numpy", "AquaKeeper.demo", "AquaKeeper.servicios.pileta_service", "AquaKeeper.entidades.modelo")
+
+def informe_imports(top: int) -> None:
+    total, filas = perfil_imports()
+    nombres = {n for n, _, _ in filas}
+    print(f"[imports] AquaKeeper.web.main: {total * 1000:8.1f} ms ({len(filas)} módulos)")
+    for nombre, _propio, acumulado in sorted(filas, key=lambda f: -f[2])[:top]:
+        print(f"  {acumulado * 1000:8.1f} ms  {nombre}")
+    cargados = [m for m in PESADOS if m in nombres]
+    print(f"  pesados cargados al importar: {', '.join(cargados) if cargados else 'ninguno'}")
+
+def informe_primera_respuesta(ruta: str) -> None:
+    snap = os.path.join(tempfile.mkdtemp(prefix="aquakeeper-snap-"), "estado.json")
+    primera_respuesta(ruta, snap)   # este arranque solo deja el snapshot escrito al cerrar
+    for etiqueta, snapshot in (("sin snapshot", None), ("con snapshot", snap)):
+        r = primera_respuesta(ruta, snapshot)
+        print(f"[primera respuesta] GET {ruta} {etiqueta}: HTTP {r['codigo']}  "
+              f"importar app={r['importar_app_s'] * 1000:7.1f} ms  lifespan={r['lifespan_s'] * 1000:7.1f} ms  "
+              f"respuesta={r['primera_respuesta_s'] * 1000:7.1f} ms  proceso total={r['total_s'] * 1000:7.1f} ms")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Tiempos de arranque de AquaKeeper web")
+    ap.add_argument("--import-profile", action="store_true", help="perfil de imports + tiempo a la primera respuesta")
+    ap.add_argument("--top", type=int, default=15, help="módulos más lentos a listar")
+    ap.add_argument("--ruta", default="/api/resumen", help="ruta de la primera respuesta")
+    args = ap.parse_args()
+    if not args.import_profile:
+        ap.error("indicá --import-profile")
+    informe_imports(args.top)
+    informe_primera_respuesta(args.ruta)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# aqua_manager/src/AquaKeeper/web/alertas.py
+# Observer que reparte las alertas de stock (EventoStock) a los clientes WebSocket suscriptos
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import threading
+from AquaKeeper.patrones.observer.observer import Observer
+from AquaKeeper.config.constantes import WS_COLA_ALERTAS
+
+def evento_a_dict(ev: Any) -> Dict[str, Any]:
+    return {"tipo": "alerta_stock", "origen": ev.origen, "sku": ev.sku, "nuevo": ev.nuevo, "minimo": ev.minimo}
+
+class Suscripcion:
+    """
+    Cola acotada de una conexión. `publicar` se llama desde cualquier hilo y nunca bloquea:
+    si la cola está llena se descarta la alerta más vieja (el cliente lento ve las últimas).
+    El event loop de la conexión se despierta con call_soon_threadsafe, una vez por tanda.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, capacidad: int = WS_COLA_ALERTAS):
+        if capacidad < 1:
+            raise ValueError("capacidad debe ser >= 1")
+        self.loop = loop
+        self.cola: Deque[Dict[str, Any]] = deque(maxlen=capacidad)
+        self.descartadas = 0
+        self._hay = asyncio.Event()
+        self._avisado = False
+
+    def publicar(self, msg: Dict[str, Any]) -> None:
+        if len(self.cola) == self.cola.maxlen:
+            self.descartadas += 1
+        self.cola.append(msg)
+        if not self._avisado:
+            self._avisado = True
+            try:
+                self.loop.call_soon_threadsafe(self._hay.set)
+            except RuntimeError:
+                pass    # loop ya cerrado: la conexión se está yendo
+
+    async def esperar(self) -> None:
+        await self._hay.wait()
+
+    # Lo pendiente (precedido de un aviso si se descartaron alertas desde la última tanda)
+    def tomar(self) -> List[Dict[str, Any]]:
+        self._hay.clear()
+        self._avisado = False
+        res: List[Dict[str, Any]] = []
+        if self.descartadas:
+            n, self.descartadas = self.descartadas, 0
+            res.append({"tipo": "descartadas", "cantidad": n})
+        while self.cola:
+            res.append(self.cola.popleft())
+        return res
+
+class PuenteAlertasWS(Observer[Any]):
+    """Se suscribe a InventarioLocal y copia cada alerta en la cola de cada conexión abierta."""
+    def __init__(self, capacidad: int = WS_COLA_ALERTAS):
+        self.capacidad = capacidad
+        self._subs: Dict[int, Suscripcion] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    # Desde el event loop de la conexión
+    def abrir(self, capacidad: Optional[int] = None) -> Suscripcion:
+        s = Suscripcion(asyncio.get_running_loop(), capacidad or self.capacidad)
+        with self._lock:
+            self._subs[id(s)] = s
+        return s
+
+    def cerrar(self, s: Suscripcion) -> None:
+        with self._lock:
+            self._subs.pop(id(s), None)
+
+    def actualizar(self, ev: Any) -> None:
+        self.actualizar_lote([ev])
+
+    def actualizar_lote(self, eventos: List[Any]) -> None:
+        with self._lock:
+            subs = list(self._subs.values())
+        if not subs:
+            return
+        msgs = [evento_a_dict(ev) for ev in eventos]
+        for s in subs:
+            for m in msgs:
+                s.publicar(m)
+
+puente = PuenteAlertasWS()
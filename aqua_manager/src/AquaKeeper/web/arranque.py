@@ -0,0 +1,109 @@
+# aqua_manager/src/AquaKeeper/web/arranque.py
+# Tiempos de arranque: cuánto tardó el proceso en dar su primera respuesta y en tener el
+# estado listo, y herramientas para medir imports / primera respuesta desde afuera.
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Inicio del proceso (epoch). En Linux sale de /proc; si no, el momento en que se importó este módulo.
+def _inicio_proceso() -> float:
+    try:
+        with open("/proc/self/stat") as f:
+            campos = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/stat") as f:
+            btime = next(int(l.split()[1]) for l in f if l.startswith("btime "))
+        return btime + int(campos[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration, AttributeError):
+        return time.time()
+
+INICIO_PROCESO = _inicio_proceso()
+_marcas: Dict[str, float] = {}     # evento -> segundos desde INICIO_PROCESO
+
+def marcar(evento: str) -> None:
+    _marcas.setdefault(evento, time.time() - INICIO_PROCESO)
+
+def marcas() -> Dict[str, float]:
+    return dict(_marcas)
+
+def texto_prometheus() -> str:
+    lineas = ["# HELP aquakeeper_arranque_segundos Segundos desde el inicio del proceso hasta cada evento de arranque",
+              "# TYPE aquakeeper_arranque_segundos gauge"]
+    for evento, s in sorted(_marcas.items()):
+        lineas.append(f'aquakeeper_arranque_segundos{{evento="{evento}"}} {s!r}')
+    return "\n".join(lineas) + "\n"
+
+class MarcaPrimeraRespuesta:
+    """Middleware ASGI que anota `primera_respuesta` y después solo deja pasar."""
+    def __init__(self, app: Callable[..., Any]):
+        self.app = app
+        self.pendiente = True
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if not self.pendiente or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(msg: Dict[str, Any]) -> None:
+            await send(msg)
+            if msg["type"] == "http.response.body" and not msg.get("more_body", False):
+                self.pendiente = False
+                marcar("primera_respuesta")
+
+        await self.app(scope, receive, enviar)
+
+# ---------- Medición desde afuera (proceso nuevo, sin cachés de import) ----------
+def perfil_imports(modulo: str = "AquaKeeper.web.main") -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Importa `modulo` con -X importtime; devuelve (total_s, [(módulo, propio_s, acumulado_s)])."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                          capture_output=True, text=True, env=_entorno(), check=True)
+    filas = []
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        filas.append((nombre.strip(), int(propio) / 1e6, int(acumulado) / 1e6))
+    total = sum(f[1] for f in filas)
+    return total, filas
+
+_SCRIPT_PRIMERA_RESPUESTA = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from AquaKeeper.web.main import app
+t_import = time.perf_counter() - t0
+import httpx
+async def main():
+    async with app.router.lifespan_context(app):
+        t_lifespan = time.perf_counter() - t0
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://arranque") as cli:
+            r = await cli.get(sys.argv[1])
+        return t_lifespan, time.perf_counter() - t0, r.status_code
+t_lifespan, t_resp, codigo = asyncio.run(main())
+print(json.dumps({"importar_app_s": t_import, "lifespan_s": t_lifespan, "primera_respuesta_s": t_resp, "codigo": codigo}))
+"""
+
+def primera_respuesta(ruta: str = "/api/resumen", snapshot: Optional[str] = None) -> Dict[str, float]:
+    """
+    Levanta la app en un proceso nuevo y pide `ruta`. Tiempos desde el arranque del intérprete
+    (`total_s` incluye iniciar Python). Corre en un directorio temporal; `snapshot` se usa
+    como AQUA_SNAPSHOT (None = sin snapshot).
+    """
+    env = _entorno()
+    env["AQUA_SNAPSHOT"] = snapshot or ""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _SCRIPT_PRIMERA_RESPUESTA, ruta], capture_output=True, text=True,
+                          env=env, cwd=tempfile.mkdtemp(prefix="aquakeeper-arranque-"), check=True)
+    res = json.loads(proc.stdout.strip().splitlines()[-1])
+    res["total_s"] = time.perf_counter() - t0
+    return res
+
+def _entorno() -> Dict[str, str]:
+    env = dict(os.environ)
+    src = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = src + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    return env
@@ -0,0 +1,71 @@
+# aqua_manager/src/AquaKeeper/web/cache.py
+# Caché de respuestas con ETag fuerte, TTL y tope de entradas (LRU)
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+import hashlib
+import threading
+import time
+from AquaKeeper.config import constantes
+from AquaKeeper.config.constantes import WEB_CACHE_MAX, WEB_CACHE_TTL_S
+
+@dataclass(frozen=True)
+class EntradaCache:
+    cuerpo: bytes
+    etag: str
+    media_type: str
+    expira: float
+
+def etag_de(cuerpo: bytes) -> str:
+    return '"' + hashlib.sha256(cuerpo).hexdigest()[:32] + '"'
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match usa comparación débil (RFC 9110): se ignora el prefijo W/
+    if not if_none_match:
+        return False
+    candidatos = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+# Huella de la configuración de negocio: si cambia una constante, cambian las claves de caché
+def version_config() -> str:
+    valores = sorted((k, repr(v)) for k, v in vars(constantes).items() if k.isupper())
+    return hashlib.sha256(repr(valores).encode("utf-8")).hexdigest()[:16]
+
+class CacheRespuestas:
+    def __init__(self, max_entradas: int = WEB_CACHE_MAX, ttl_s: float = WEB_CACHE_TTL_S):
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos: "OrderedDict[Hashable, EntradaCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def obtener(self, clave: Hashable) -> Optional[EntradaCache]:
+        ahora = time.monotonic()
+        with self._lock:
+            e = self._datos.get(clave)
+            if e is None or e.expira <= ahora:
+                if e is not None:
+                    del self._datos[clave]
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return e
+
+    def guardar(self, clave: Hashable, cuerpo: bytes, media_type: str = "application/json") -> EntradaCache:
+        e = EntradaCache(cuerpo, etag_de(cuerpo), media_type, time.monotonic() + self.ttl_s)
+        with self._lock:
+            self._datos[clave] = e
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+        return e
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
@@ -0,0 +1,86 @@
+# aqua_manager/src/AquaKeeper/web/ejecucion.py
+# Ejecución de trabajo CPU-bound fuera del event loop, con captura de stdout aislada por request
+from __future__ import annotations
+import asyncio
+import contextvars
+import functools
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TextIO, Tuple, TypeVar
+from AquaKeeper.config.constantes import WEB_WORKERS
+
+R = TypeVar("R")
+
+_buffer: contextvars.ContextVar[Optional[io.StringIO]] = contextvars.ContextVar("aquakeeper_stdout", default=None)
+
+class _StdoutPorContexto:
+    """
+    Reemplaza sys.stdout una sola vez: si el contexto actual tiene un buffer de captura
+    escribe ahí, si no en la salida original. A diferencia de redirect_stdout no cambia
+    sys.stdout por request, así que dos requests concurrentes no se pisan.
+    """
+    def __init__(self, original: TextIO):
+        self.original = original
+
+    def _destino(self) -> TextIO:
+        buf = _buffer.get()
+        return self.original if buf is None else buf
+
+    def write(self, s: str) -> int:
+        return self._destino().write(s)
+
+    def flush(self) -> None:
+        self._destino().flush()
+
+    def isatty(self) -> bool:
+        return _buffer.get() is None and self.original.isatty()
+
+    def __getattr__(self, nombre: str) -> Any:
+        if nombre == "original":
+            raise AttributeError(nombre)
+        return getattr(self.original, nombre)
+
+_instalar_lock = threading.Lock()
+
+def instalar_captura() -> None:
+    with _instalar_lock:
+        if not isinstance(sys.stdout, _StdoutPorContexto):
+            sys.stdout = _StdoutPorContexto(sys.stdout)
+
+def capturar_salida(fn: Callable[..., R], *args: Any, **kwargs: Any) -> Tuple[R, str]:
+    instalar_captura()
+    buf = io.StringIO()
+    token = _buffer.set(buf)
+    try:
+        res = fn(*args, **kwargs)
+    finally:
+        _buffer.reset(token)
+    return res, buf.getvalue()
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _workers() -> int:
+    return max(1, int(os.environ.get("AQUA_WEB_WORKERS", WEB_WORKERS)))
+
+def pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="aquakeeper-web")
+        return _pool
+
+def cerrar_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+# Corre fn en el pool acotado (los requests de más esperan turno sin bloquear el event loop)
+async def ejecutar(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool(), functools.partial(fn, *args, **kwargs))
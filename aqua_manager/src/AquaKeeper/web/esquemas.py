@@ -0,0 +1,81 @@
+# aqua_manager/src/AquaKeeper/web/esquemas.py
+# Modelos de respuesta (pydantic) de la API JSON
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+from AquaKeeper.config.constantes import LECTURAS_MAX_POR_LOTE
+
+class ProductoOut(BaseModel):
+    sku: str
+    nombre: str
+    tipo: str
+    unidad: str
+    presentacion: str
+    precio: float
+    stock_local: float
+
+class PiletaOut(BaseModel):
+    id_pileta: str
+    litros: float
+    cliente_dni: str
+    ph: float
+    turbidez: float
+    algas: float
+
+class PaginaPiletasOut(BaseModel):
+    items: List[Dict[str, Any]]     # PiletaOut, o solo los campos pedidos en fields=
+    siguiente: Optional[str]        # cursor de la página siguiente (None = última página)
+
+class EstadoAguaOut(BaseModel):
+    id_pileta: str
+    estado_agua_pct: float
+
+class CoberturaOut(BaseModel):
+    id_pileta: str
+    razon: str
+    cobertura: Dict[str, float]   # tipo -> % cubierto con el stock del cliente
+
+class FaltantesOut(BaseModel):
+    id_pileta: str
+    razon: str
+    faltantes: Dict[str, float]   # tipo -> cantidad que falta
+
+class VisitaOut(BaseModel):
+    id_pileta: str
+    razon: str
+    realizado: bool
+    observacion: str
+
+class EvaluacionVisitaOut(BaseModel):
+    visita: VisitaOut
+    debo_ir: bool
+
+class ResumenPiletaOut(BaseModel):
+    id_pileta: str
+    litros: float
+    cliente_dni: str
+    estado_agua_pct: float
+    accion: str
+    cobertura: Dict[str, float]
+    faltantes: Dict[str, float]
+
+class ResumenOut(BaseModel):
+    productos: List[ProductoOut]
+    piletas: List[ResumenPiletaOut]
+
+class LoteLecturasIn(BaseModel):
+    # (id_pileta, timestamp unix, ph, turbidez, algas)
+    lecturas: List[Tuple[str, float, float, float, float]] = Field(max_length=LECTURAS_MAX_POR_LOTE)
+
+class RechazoOut(BaseModel):
+    indice: int
+    motivo: str
+
+class IngestaOut(BaseModel):
+    recibidas: int
+    aplicadas: int
+    descartadas: int
+    rechazadas: List[RechazoOut]
+    reevaluadas: List[EstadoAguaOut]   # piletas cuyas alertas cambiaron con este lote
+    segundos: float
+    lecturas_por_s: float
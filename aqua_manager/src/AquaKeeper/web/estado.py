@@ -0,0 +1,147 @@
+# aqua_manager/src/AquaKeeper/web/estado.py
+# Estado de servicios que atiende la API (inventario del local + piletas/clientes).
+# Los servicios (y NumPy) se importan recién al crear el estado, no al importar la app.
+from __future__ import annotations
+import os
+import threading
+from pathlib import Path
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Optional
+from AquaKeeper.config.constantes import SNAPSHOT_RUTA, VISITAS_RUTA, BACKEND_ALMACENAMIENTO, SQLITE_RUTA
+from AquaKeeper.web import arranque
+
+if TYPE_CHECKING:
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    from AquaKeeper.servicios.bitacora_visitas import BitacoraVisitas
+    from AquaKeeper.persistencia.sqlite import AlmacenSQLite
+
+BACKENDS = ("memoria", "sqlite")
+
+class EstadoApp:
+    def __init__(self, inv: InventarioLocal, svc: PiletaService, almacen: Optional[AlmacenSQLite] = None):
+        self.inv = inv
+        self.svc = svc
+        self.almacen = almacen
+        self.lock = threading.RLock()   # las mutaciones (visitas, stock) pasan por acá
+
+    # Para claves de caché: con SQLite incluye la versión de la base (cambios de otros workers)
+    def version(self) -> tuple:
+        externa = self.almacen.version() if self.almacen is not None else 0
+        return (self.svc.version, self.inv.version, externa)
+
+    def sincronizar(self) -> None:
+        if self.almacen is not None:
+            self.almacen.sincronizar(self.inv, self.svc)
+
+def crear_estado_demo(visitas: Optional[BitacoraVisitas] = None) -> EstadoApp:
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    from AquaKeeper.datos_demo import cargar_demo
+    inv = InventarioLocal()
+    svc = PiletaService(visitas=visitas)
+    cargar_demo(inv, svc)
+    return EstadoApp(inv, svc)
+
+# Backend SQLite: si la base está vacía la carga con los datos demo; el BEGIN IMMEDIATE hace
+# que, si arrancan varios workers a la vez, uno solo la cargue y los demás la lean
+def crear_estado_sqlite(ruta: str) -> EstadoApp:
+    from AquaKeeper.servicios.inventario_service import InventarioLocal
+    from AquaKeeper.servicios.pileta_service import PiletaService
+    from AquaKeeper.persistencia.sqlite import AlmacenSQLite
+    from AquaKeeper.datos_demo import cargar_demo
+    alm = AlmacenSQLite(ruta)
+    inv = InventarioLocal(almacen=alm)
+    svc = PiletaService(almacen=alm)
+    with alm.transaccion():
+        if alm.vacio():
+            cargar_demo(inv, svc)
+    est = EstadoApp(inv, svc, alm)
+    est.sincronizar()
+    return est
+
+# AQUA_BACKEND / BACKEND_ALMACENAMIENTO: "memoria" (un solo worker) o "sqlite" (varios workers)
+def backend() -> str:
+    nombre = os.environ.get("AQUA_BACKEND", BACKEND_ALMACENAMIENTO)
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {nombre} (esperaba {', '.join(BACKENDS)})")
+    return nombre
+
+# Ruta del snapshot: AQUA_SNAPSHOT (vacío = sin snapshot) o SNAPSHOT_RUTA
+def ruta_snapshot() -> Optional[str]:
+    ruta = os.environ.get("AQUA_SNAPSHOT", SNAPSHOT_RUTA)
+    return ruta or None
+
+# Directorio de la bitácora de visitas: AQUA_VISITAS (vacío = temporal, se pierden al reiniciar) o VISITAS_RUTA
+def ruta_visitas() -> Optional[str]:
+    ruta = os.environ.get("AQUA_VISITAS", VISITAS_RUTA)
+    return ruta or None
+
+def cargar_estado() -> EstadoApp:
+    if backend() == "sqlite":
+        return crear_estado_sqlite(os.environ.get("AQUA_SQLITE", SQLITE_RUTA))
+    from AquaKeeper.servicios.bitacora_visitas import BitacoraVisitas
+    dir_visitas = ruta_visitas()
+    visitas = BitacoraVisitas(Path(dir_visitas)) if dir_visitas else None   # retoma los segmentos que haya
+    ruta = ruta_snapshot()
+    if ruta and os.path.exists(ruta):
+        from AquaKeeper.web.snapshot import cargar
+        return cargar(ruta, visitas)
+    return crear_estado_demo(visitas)
+
+# ---------- Estado compartido, precalentado en segundo plano ----------
+_futuro: Optional[Future] = None
+_futuro_lock = threading.Lock()
+
+def _preparar() -> Future:
+    global _futuro
+    with _futuro_lock:
+        if _futuro is None:
+            _futuro = Future()
+            threading.Thread(target=_cargar_en, args=(_futuro,), name="aquakeeper-precalentar", daemon=True).start()
+        return _futuro
+
+def _cargar_en(fut: Future) -> None:
+    try:
+        est = cargar_estado()
+        from AquaKeeper.web.alertas import puente
+        est.inv.suscribir(puente)       # alertas de stock -> clientes WebSocket
+        arranque.marcar("estado_listo")
+        fut.set_result(est)
+    except BaseException as e:
+        fut.set_exception(e)
+
+# Arranca la carga sin bloquear (lifespan): el servidor ya atiende mientras se importa y carga
+def precalentar() -> None:
+    _preparar()
+
+def estado_listo() -> bool:
+    return _futuro is not None and _futuro.done()
+
+# Espera la carga si todavía está en curso y trae los cambios de otros workers
+def obtener_estado() -> EstadoApp:
+    est = _preparar().result()
+    est.sincronizar()
+    return est
+
+# Al apagar: vuelca a disco las visitas en memoria de la bitácora (si tiene directorio configurado)
+# y guarda el snapshot (si hay ruta); devuelve la ruta del snapshot o None
+def guardar_estado() -> Optional[str]:
+    if not estado_listo() or _futuro.exception() is not None:
+        return None
+    est = _futuro.result()
+    if est.almacen is not None:
+        return None     # el estado ya está en la base
+    ruta = ruta_snapshot()
+    with est.lock:
+        if ruta_visitas():
+            est.svc.visitas.volcar()
+        if ruta:
+            from AquaKeeper.web.snapshot import guardar
+            guardar(est, ruta)
+    return ruta
+
+def olvidar_estado() -> None:
+    global _futuro
+    with _futuro_lock:
+        _futuro = None
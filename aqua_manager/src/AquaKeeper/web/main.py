@@ -1,19 +1,76 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import io
-from contextlib import redirect_stdout
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+import asyncio
+import json
+import re
+
+# Arranque liviano: demo(), servicios y NumPy se importan recién cuando hacen falta
+# (el estado de la API se precalienta en segundo plano desde el lifespan)
+from AquaKeeper.web.ejecucion import capturar_salida, ejecutar, instalar_captura, cerrar_pool
+from AquaKeeper.web.cache import CacheRespuestas, EntradaCache, coincide_etag, version_config
+from AquaKeeper.web import arranque, estado
+from AquaKeeper.web.estado import EstadoApp
+from AquaKeeper.web.esquemas import (
+    ProductoOut, PiletaOut, PaginaPiletasOut, EstadoAguaOut, CoberturaOut, FaltantesOut,
+    VisitaOut, EvaluacionVisitaOut, ResumenPiletaOut, ResumenOut,
+    LoteLecturasIn, RechazoOut, IngestaOut,
+)
+from AquaKeeper.config.constantes import PAGINA_PILETAS, PAGINA_PILETAS_MAX
+from AquaKeeper import metricas
 
-# importa tu demo real
-from AquaKeeper.demo import demo
+if TYPE_CHECKING:
+    from AquaKeeper.entidades.modelo import Pileta, Producto
+    from AquaKeeper.patrones.strategy.dosificacion import DosificacionStrategy
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    instalar_captura()
+    estado.precalentar()
+    arranque.marcar("lifespan")
+    yield
+    estado.guardar_estado()
+    cerrar_pool()
 
 # ← ESTA variable debe llamarse app (Uvicorn la busca así)
 app = FastAPI(
     title="AquaKeeper Web",
     description="Wrapper web (FastAPI) para ejecutar la demo de AquaKeeper",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# ---------- Métricas (Prometheus) ----------
+# Con AQUA_METRICAS=1 se instrumentan servicios/estrategias y se mide cada ruta; si no, /metrics
+# solo informa que están apagadas y no hay costo extra por request.
+if metricas.activar_desde_entorno():
+    app.add_middleware(metricas.MiddlewareMetricas)
+app.add_middleware(arranque.MarcaPrimeraRespuesta)
+
+@app.get("/metrics", summary="Métricas en formato texto de Prometheus", include_in_schema=False)
+def metrics():
+    texto = metricas.texto_prometheus() + arranque.texto_prometheus()
+    return Response(content=texto, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ---------- Caché de respuestas (ETag + If-None-Match -> 304) ----------
+# Las claves llevan la versión de la config y, en /api, la versión del estado de los
+# servicios: cualquier alta/movimiento cambia la clave y la entrada vieja queda sin uso.
+_cache = CacheRespuestas()
+_VERSION_CONFIG = version_config()
+
+def _json_bytes(obj) -> bytes:
+    return json.dumps(jsonable_encoder(obj), ensure_ascii=False).encode("utf-8")
+
+def _responder(request: Request, e: EntradaCache) -> Response:
+    headers = {"ETag": e.etag, "Cache-Control": "no-cache"}
+    if coincide_etag(request.headers.get("if-none-match"), e.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=e.cuerpo, media_type=e.media_type, headers=headers)
+
 class RunResponse(BaseModel):
     ok: bool
     text: str
@@ -22,18 +79,22 @@ class RunResponse(BaseModel):
 def root():
     return {"ok": True, "service": "AquaKeeper on Render", "docs": "/docs"}
 
-@app.post("/run", response_model=RunResponse, summary="Ejecutar demo() y capturar salida")
-def run_demo():
-    buf = io.StringIO()
-    try:
-        with redirect_stdout(buf):
-            demo()
-        return RunResponse(ok=True, text=buf.getvalue())
-    except Exception as e:
-        return RunResponse(ok=False, text=f"ERROR: {e!r}")
+# demo() corre en el pool acotado y su salida se captura solo para este request
+def _demo_capturada() -> str:
+    from AquaKeeper.demo import demo
+    return capturar_salida(demo)[1]
 
-import re
-from typing import Any, Dict, List
+@app.post("/run", response_model=RunResponse, summary="Ejecutar demo() y capturar salida")
+async def run_demo(request: Request):
+    clave = ("/run", _VERSION_CONFIG)
+    e = _cache.obtener(clave)
+    if e is None:
+        try:
+            txt = await ejecutar(_demo_capturada)
+        except Exception as ex:
+            return RunResponse(ok=False, text=f"ERROR: {ex!r}")
+        e = _cache.guardar(clave, _json_bytes(RunResponse(ok=True, text=txt)))
+    return _responder(request, e)
 
 def _parse_demo_text(txt: str) -> Dict[str, Any]:
     """
@@ -142,10 +203,240 @@ def _parse_demo_text(txt: str) -> Dict[str, Any]:
     }
 
 @app.post("/run-structured", summary="Ejecutar demo() y devolver JSON estructurado")
-def run_structured():
-    buf = io.StringIO()
-    with redirect_stdout(buf):
-        demo()
-    txt = buf.getvalue()
-    data = _parse_demo_text(txt)
-    return {"ok": True, "data": data, "raw_len": len(txt)}
+async def run_structured(request: Request):
+    clave = ("/run-structured", _VERSION_CONFIG)
+    e = _cache.obtener(clave)
+    if e is None:
+        txt = await ejecutar(_demo_capturada)
+        data = _parse_demo_text(txt)
+        e = _cache.guardar(clave, _json_bytes({"ok": True, "data": data, "raw_len": len(txt)}))
+    return _responder(request, e)
+
+# ---------- API JSON nativa (sin demo() ni parseo de stdout) ----------
+obtener_estado = estado.obtener_estado
+
+def _clave_estado(est: EstadoApp, *partes) -> tuple:
+    return partes + est.version() + (_VERSION_CONFIG,)
+
+def _pileta(est: EstadoApp, id_pileta: str) -> "Pileta":
+    p = est.svc.piletas.get(id_pileta)
+    if p is None:
+        raise HTTPException(status_code=404, detail=f"Pileta inexistente: {id_pileta}")
+    return p
+
+def _estrategia(razon: str) -> "DosificacionStrategy":
+    from AquaKeeper.patrones.strategy.dosificacion import estrategia_para
+    try:
+        return estrategia_para(razon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _producto_out(est: EstadoApp, p: "Producto") -> ProductoOut:
+    return ProductoOut(sku=p.sku, nombre=p.nombre, tipo=p.tipo, unidad=p.unidad,
+                       presentacion=p.presentacion, precio=p.precio, stock_local=est.inv.disponible(p.sku))
+
+def _pileta_out(p: "Pileta") -> PiletaOut:
+    return PiletaOut(id_pileta=p.id_pileta, litros=p.litros, cliente_dni=p.cliente_dni,
+                     ph=p.ph, turbidez=p.turbidez, algas=p.algas)
+
+@app.get("/api/productos", response_model=List[ProductoOut], summary="Productos del local con su stock")
+def api_productos(request: Request):
+    est = obtener_estado()
+    clave = _clave_estado(est, "/api/productos")
+    e = _cache.obtener(clave)
+    if e is None:
+        e = _cache.guardar(clave, _json_bytes([_producto_out(est, p) for p in est.inv.productos.values()]))
+    return _responder(request, e)
+
+_CAMPOS_PILETA = tuple(PiletaOut.model_fields)
+
+# fields=id_pileta,ph -> campos de PiletaOut a devolver (None = todos)
+def _campos(fields: Optional[str]) -> tuple:
+    if not fields:
+        return _CAMPOS_PILETA
+    campos = tuple(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+    desconocidos = [c for c in campos if c not in _CAMPOS_PILETA]
+    if desconocidos or not campos:
+        raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(desconocidos) or fields} "
+                                                    f"(esperaba {', '.join(_CAMPOS_PILETA)})")
+    return campos
+
+# El cursor es la fila de la flota de la última pileta entregada (opaco para el cliente)
+def _desde_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return -1
+    try:
+        desde = int(cursor)
+    except ValueError:
+        desde = -1
+    if desde < 0:
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {cursor}")
+    return desde
+
+@app.get("/api/piletas", response_model=PaginaPiletasOut, summary="Piletas registradas (paginadas, con filtros)")
+def api_piletas(request: Request,
+                cursor: Optional[str] = Query(None, description="`siguiente` de la página anterior"),
+                limite: int = Query(PAGINA_PILETAS, ge=1, le=PAGINA_PILETAS_MAX),
+                cliente_dni: Optional[str] = None,
+                litros_min: Optional[float] = Query(None, ge=0),
+                litros_max: Optional[float] = Query(None, ge=0),
+                alerta: Optional[str] = Query(None, description="ph, turbidez, algas, alguna o ninguna"),
+                fields: Optional[str] = Query(None, description="campos separados por coma")):
+    est = obtener_estado()
+    campos = _campos(fields)
+    desde = _desde_cursor(cursor)
+    clave = _clave_estado(est, "/api/piletas", desde, limite, cliente_dni, litros_min, litros_max, alerta, campos)
+    e = _cache.obtener(clave)
+    if e is None:
+        try:
+            piletas, siguiente = est.svc.pagina_piletas(desde, limite, cliente_dni, litros_min, litros_max, alerta)
+        except ValueError as ex:
+            raise HTTPException(status_code=400, detail=str(ex))
+        items = [{c: getattr(p, c) for c in campos} for p in piletas]
+        e = _cache.guardar(clave, _json_bytes({"items": items, "siguiente": None if siguiente is None else str(siguiente)}))
+    return _responder(request, e)
+
+@app.get("/api/piletas/{id_pileta}", response_model=PiletaOut, summary="Una pileta")
+def api_pileta(id_pileta: str):
+    return _pileta_out(_pileta(obtener_estado(), id_pileta))
+
+@app.get("/api/piletas/{id_pileta}/estado", response_model=EstadoAguaOut, summary="% estado del agua")
+def api_estado_agua(id_pileta: str):
+    est = obtener_estado()
+    p = _pileta(est, id_pileta)
+    return EstadoAguaOut(id_pileta=id_pileta, estado_agua_pct=est.svc.estado_agua_porcentual(p))
+
+@app.get("/api/piletas/{id_pileta}/cobertura", response_model=CoberturaOut, summary="% cobertura con el stock del cliente")
+def api_cobertura(id_pileta: str, razon: str = Query("mantenimiento")):
+    est = obtener_estado()
+    p = _pileta(est, id_pileta)
+    cob = est.svc.cobertura_productos_cliente(p.cliente_dni, p, _estrategia(razon))
+    return CoberturaOut(id_pileta=id_pileta, razon=razon, cobertura=cob)
+
+@app.get("/api/piletas/{id_pileta}/faltantes", response_model=FaltantesOut, summary="Faltantes en casa del cliente")
+def api_faltantes(id_pileta: str, razon: str = Query("mantenimiento")):
+    est = obtener_estado()
+    p = _pileta(est, id_pileta)
+    falt = est.svc.faltantes_cliente(p.cliente_dni, p, _estrategia(razon))
+    return FaltantesOut(id_pileta=id_pileta, razon=razon, faltantes=falt)
+
+@app.post("/api/piletas/{id_pileta}/visitas", response_model=EvaluacionVisitaOut, summary="Evaluar y registrar visita")
+def api_evaluar_visita(id_pileta: str, razon: str = Query("mantenimiento")):
+    est = obtener_estado()
+    _pileta(est, id_pileta)
+    strat = _estrategia(razon)
+    with est.lock:
+        v, debo_ir = est.svc.evaluar_visita(id_pileta, razon, strat)
+    return EvaluacionVisitaOut(visita=VisitaOut(id_pileta=v.id_pileta, razon=v.razon, realizado=v.realizado,
+                                                observacion=v.observacion), debo_ir=debo_ir)
+
+@app.post("/api/lecturas", response_model=IngestaOut, summary="Lote de lecturas de sondas (ph, turbidez, algas)")
+def api_lecturas(lote: LoteLecturasIn):
+    est = obtener_estado()
+    cols = list(zip(*lote.lecturas)) or [()] * 5
+    with est.lock:
+        r = est.svc.aplicar_lecturas(*cols)
+    return IngestaOut(
+        recibidas=r.recibidas, aplicadas=r.aplicadas, descartadas=r.descartadas,
+        rechazadas=[RechazoOut(indice=k, motivo=m) for k, m in r.rechazadas],
+        reevaluadas=[EstadoAguaOut(id_pileta=i, estado_agua_pct=e) for i, e in r.reevaluadas.items()],
+        segundos=r.segundos, lecturas_por_s=r.lecturas_por_s,
+    )
+
+@app.get("/api/resumen", response_model=ResumenOut, summary="Productos + estado/cobertura/faltantes por pileta")
+def api_resumen(request: Request, razon: str = Query("mantenimiento")):
+    est = obtener_estado()
+    strat = _estrategia(razon)
+    clave = _clave_estado(est, "/api/resumen", razon)
+    e = _cache.obtener(clave)
+    if e is None:
+        e = _cache.guardar(clave, _json_bytes(_resumen(est, razon, strat)))
+    return _responder(request, e)
+
+def _resumen(est: EstadoApp, razon: str, strat: "DosificacionStrategy") -> ResumenOut:
+    svc = est.svc
+    piletas = []
+    for p in svc.piletas.values():
+        piletas.append(ResumenPiletaOut(
+            id_pileta=p.id_pileta, litros=p.litros, cliente_dni=p.cliente_dni,
+            estado_agua_pct=svc.estado_agua_porcentual(p), accion=razon,
+            cobertura=svc.cobertura_productos_cliente(p.cliente_dni, p, strat),
+            faltantes=svc.faltantes_cliente(p.cliente_dni, p, strat),
+        ))
+    return ResumenOut(productos=[_producto_out(est, p) for p in est.inv.productos.values()], piletas=piletas)
+
+# ---------- Evaluación de flota en streaming (NDJSON) ----------
+# Un item por lote de piletas: StreamingResponse pide el siguiente recién cuando el anterior
+# se envió (backpressure), así la memoria no crece con el tamaño de la flota.
+def _ndjson_evaluacion(est: EstadoApp, razon: Optional[str], tam_lote: int) -> Iterator[bytes]:
+    strat = _estrategia(razon) if razon else None
+    lineas = []
+    for item in est.svc.iterar_evaluacion(razon, strat, tam_lote=tam_lote):
+        lineas.append(json.dumps(item, ensure_ascii=False))
+        if len(lineas) >= tam_lote:
+            yield ("\n".join(lineas) + "\n").encode("utf-8")
+            lineas = []
+    if lineas:
+        yield ("\n".join(lineas) + "\n").encode("utf-8")
+
+@app.get("/api/flota/evaluacion.ndjson", summary="Evaluación de toda la flota, una línea JSON por pileta")
+def api_evaluacion_flota(razon: Optional[str] = Query(None, description="forzar acción; por defecto se elige por pileta"),
+                         tam_lote: int = Query(1000, ge=1, le=50000)):
+    est = obtener_estado()
+    if razon:
+        _estrategia(razon)      # validar antes de empezar a responder
+    return StreamingResponse(_ndjson_evaluacion(est, razon, tam_lote), media_type="application/x-ndjson")
+
+# ---------- Movimientos de stock del local + alertas por WebSocket ----------
+def _producto_de(est: EstadoApp, sku_o_tipo: str) -> "Producto":
+    sku = est.inv._resolver_sku(sku_o_tipo)
+    p = est.inv.productos.get(sku)
+    if p is None:
+        raise HTTPException(status_code=404, detail=f"Producto inexistente: {sku_o_tipo}")
+    return p
+
+@app.post("/api/productos/{sku}/descontar", response_model=ProductoOut, summary="Descontar stock del local (SKU o tipo)")
+def api_descontar(sku: str, cantidad: float = Query(..., gt=0)):
+    est = obtener_estado()
+    p = _producto_de(est, sku)
+    with est.lock:
+        try:
+            est.inv.descontar(p.sku, cantidad)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    return _producto_out(est, p)
+
+@app.post("/api/productos/{sku}/reponer", response_model=ProductoOut, summary="Reponer stock del local (SKU o tipo)")
+def api_reponer(sku: str, cantidad: float = Query(..., gt=0)):
+    est = obtener_estado()
+    p = _producto_de(est, sku)
+    with est.lock:
+        est.inv.reponer(p.sku, cantidad)
+    return _producto_out(est, p)
+
+# Cada conexión tiene su cola acotada (ver web/alertas.py). Se escucha el socket en paralelo
+# para enterarse del cierre aunque no haya alertas que mandar.
+@app.websocket("/ws/alertas")
+async def ws_alertas(ws: WebSocket):
+    from AquaKeeper.web.alertas import puente
+    await ws.accept()
+    await ejecutar(obtener_estado)      # asegura que el inventario ya está suscripto
+    sub = puente.abrir()
+
+    async def hasta_cierre() -> None:
+        while (await ws.receive())["type"] != "websocket.disconnect":
+            pass
+
+    cierre = asyncio.ensure_future(hasta_cierre())
+    try:
+        while True:
+            espera = asyncio.ensure_future(sub.esperar())
+            await asyncio.wait((espera, cierre), return_when=asyncio.FIRST_COMPLETED)
+            if cierre.done():
+                espera.cancel()
+                break
+            for msg in sub.tomar():
+                await ws.send_json(msg)
+    finally:
+        puente.cerrar(sub)
+        cierre.cancel()
@@ -0,0 +1,70 @@
+# aqua_manager/src/AquaKeeper/web/snapshot.py
+# Snapshot JSON del estado de la API (productos, stock, clientes, piletas) para arrancar
+# sin reconstruirlo. Las visitas no entran: van a la bitácora pasada a `importar` (en la web,
+# con directorio VISITAS_RUTA, que guardar_estado vuelca al apagar y se retoma al arrancar).
+from __future__ import annotations
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+import json
+import os
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.servicios.bitacora_visitas import BitacoraVisitas
+from AquaKeeper.web.estado import EstadoApp
+
+FORMATO = 1
+
+def exportar(est: EstadoApp) -> Dict[str, Any]:
+    inv, svc = est.inv, est.svc
+    with svc.lock:
+        flota = svc.flota
+        piletas = []
+        for p in svc.piletas.values():
+            d = asdict(p)
+            d["ts_lectura"] = float(flota.ts_lectura[flota.fila(p.id_pileta)])
+            piletas.append(d)
+        return {
+            "formato": FORMATO,
+            "politica_sku": inv.politica_sku,
+            "productos": [asdict(p) for p in inv.productos.values()],
+            "stock_local": dict(inv.stock.cantidades),
+            "clientes": [{"dni": c.dni, "nombre": c.nombre, "direccion": c.direccion,
+                          "stock": dict(c.stock.cantidades)} for c in svc.clientes.values()],
+            "piletas": piletas,
+        }
+
+def importar(datos: Dict[str, Any], visitas: Optional[BitacoraVisitas] = None) -> EstadoApp:
+    if datos.get("formato") != FORMATO:
+        raise ValueError(f"Formato de snapshot no soportado: {datos.get('formato')} (esperaba {FORMATO})")
+    inv = InventarioLocal(datos["politica_sku"])
+    stock = dict(datos["stock_local"])
+    for d in datos["productos"]:
+        inv.registrar_producto(Producto(**d), cantidad_inicial=stock.pop(d["sku"], 0.0))
+    for sku, cant in stock.items():     # stock de SKUs sin producto registrado
+        inv.stock.disponer(sku, cant)
+    svc = PiletaService(visitas=visitas)
+    for d in datos["clientes"]:
+        c = Cliente(dni=d["dni"], nombre=d["nombre"], direccion=d["direccion"])
+        for sku, cant in d["stock"].items():
+            c.stock.disponer(sku, cant)
+        svc.registrar_cliente(c)
+    for d in datos["piletas"]:
+        d = dict(d)
+        ts = d.pop("ts_lectura", 0.0)
+        svc.cargar_pileta(Pileta(**d), ts)
+    return EstadoApp(inv, svc)
+
+def guardar(est: EstadoApp, ruta: str) -> None:
+    # escritura atómica: un corte a mitad deja el snapshot anterior intacto
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(exportar(est), f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+def cargar(ruta: str, visitas: Optional[BitacoraVisitas] = None) -> EstadoApp:
+    with open(ruta, encoding="utf-8") as f:
+        return importar(json.load(f), visitas)
@@ -0,0 +1,79 @@
+# aqua_manager/tests/test_alertas.py
+# Alertas de stock por WebSocket: la cola acotada de cada conexión descarta las más viejas y una alerta
+# del inventario (stock que cae al mínimo) llega al cliente de /ws/alertas
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+from AquaKeeper.config.constantes import STOCK_MIN_LOCAL
+from AquaKeeper.entidades.modelo import Producto
+from AquaKeeper.servicios.inventario_service import EventoStock, InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.web import main
+from AquaKeeper.web.alertas import PuenteAlertasWS, puente
+from AquaKeeper.web.estado import EstadoApp
+
+def evento(k):
+    return EventoStock("local", f"SKU-{k}", float(k), 2.0)
+
+class TestColaAcotada(unittest.TestCase):
+    def test_llena_descarta_las_mas_viejas(self):
+        p = PuenteAlertasWS(capacidad=3)
+
+        async def escenario():
+            sub = p.abrir()
+            # se publica desde otro hilo (como el inventario) sin bloquear aunque nadie lea
+            hilo = threading.Thread(target=p.actualizar_lote, args=([evento(k) for k in range(5)],))
+            hilo.start()
+            hilo.join()
+            p.actualizar(evento(5))
+            await asyncio.wait_for(sub.esperar(), 2.0)
+            primera = sub.tomar()
+            p.actualizar(evento(6))
+            await asyncio.wait_for(sub.esperar(), 2.0)
+            segunda = sub.tomar()
+            p.cerrar(sub)
+            return primera, segunda
+
+        primera, segunda = asyncio.run(escenario())
+        self.assertEqual(primera[0], {"tipo": "descartadas", "cantidad": 3})
+        self.assertEqual([m["sku"] for m in primera[1:]], ["SKU-3", "SKU-4", "SKU-5"])
+        self.assertEqual([m["sku"] for m in segunda], ["SKU-6"])      # el aviso no se repite
+        self.assertEqual(len(p), 0)
+
+class TestWebSocketAlertas(unittest.TestCase):
+    def setUp(self):
+        self.inv = InventarioLocal()
+        self.inv.registrar_producto(Producto("CL", "Cloro", "cloro-granulado", "g"), 10.0)
+        self.inv.suscribir(puente)
+        self.addCleanup(self.inv.desuscribir, puente)
+        est = EstadoApp(self.inv, PiletaService())
+        parche = mock.patch.object(main, "obtener_estado", return_value=est)
+        parche.start()
+        self.addCleanup(parche.stop)
+        main._cache.limpiar()
+        self.addCleanup(main._cache.limpiar)
+        self.client = TestClient(main.app)
+
+    def esperar_suscripcion(self, n):
+        limite = time.monotonic() + 5
+        while len(puente) < n and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertEqual(len(puente), n)
+
+    def test_recibe_la_alerta_al_cruzar_el_minimo(self):
+        with self.client.websocket_connect("/ws/alertas") as ws:
+            self.esperar_suscripcion(1)
+            # sobre el mínimo no hay alerta; al quedar en el mínimo sí
+            self.assertEqual(self.client.post("/api/productos/CL/descontar", params={"cantidad": 5}).status_code, 200)
+            r = self.client.post("/api/productos/cloro-granulado/descontar", params={"cantidad": 10 - 5 - STOCK_MIN_LOCAL})
+            self.assertEqual(r.json()["stock_local"], STOCK_MIN_LOCAL)
+            msg = ws.receive_json()
+        self.assertEqual(msg, {"tipo": "alerta_stock", "origen": "local", "sku": "CL",
+                               "nuevo": float(STOCK_MIN_LOCAL), "minimo": STOCK_MIN_LOCAL})
+        self.esperar_suscripcion(0)             # al cerrar se da de baja del puente
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+# aqua_manager/tests/test_bitacora.py
+# BitacoraVisitas: volcado por segmentos, desde(seq), historial, reanudar, altas concurrentes y limpieza
+# del directorio temporal
+import gc
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from AquaKeeper.entidades.modelo import Visita
+from AquaKeeper.servicios.bitacora_visitas import BitacoraVisitas
+
+def visita(k: int) -> Visita:
+    return Visita(id_pileta=f"P{k % 3}", razon="mantenimiento", realizado=False, observacion=f"v{k}")
+
+class TestBitacoraVisitas(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_volcado_por_segmentos(self):
+        b = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        b.extend(visita(k) for k in range(12))
+        self.assertEqual(len(b), 12)
+        self.assertEqual(len(b.recientes()), 4)
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()),
+                         [f"visitas-{k:012d}.jsonl" for k in (0, 2, 4, 6)])
+        self.assertEqual([v.observacion for v in b], [f"v{k}" for k in range(12)])
+        self.assertEqual([v.observacion for v in b.historial("P1")], ["v1", "v4", "v7", "v10"])
+        self.assertEqual([v.observacion for v in b.historial("P1", limite=2)], ["v7", "v10"])
+
+    def test_desde(self):
+        b = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        b.extend(visita(k) for k in range(12))
+        for seq in (0, 3, 7, 8, 11, 12):
+            self.assertEqual([v.observacion for v in b.desde(seq)], [f"v{k}" for k in range(seq, 12)])
+
+    def test_reanudar_desde_directorio(self):
+        b = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        b.extend(visita(k) for k in range(9))
+        b.volcar()
+        b2 = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        self.assertEqual(len(b2), 9)
+        b2.append(visita(9))
+        self.assertEqual([v.observacion for v in b2.historial("P0")], ["v0", "v3", "v6", "v9"])
+        self.assertEqual([v.observacion for v in b2.desde(8)], ["v8", "v9"])
+
+    def test_reanudar_con_linea_a_medio_escribir(self):
+        b = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        b.extend(visita(k) for k in range(8))       # segmentos 0 y 2 (v0..v3), v4..v7 en memoria
+        ultimo = self.dir / "visitas-000000000002.jsonl"
+        completo = ultimo.read_bytes()
+        with open(ultimo, "ab") as f:
+            f.write(b'{"id_pileta": "P1", "razon": "mant')   # corte en medio de un volcado
+        b2 = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        self.assertEqual(len(b2), 4)
+        self.assertEqual(ultimo.read_bytes(), completo)
+        b2.extend(visita(k) for k in range(4, 8))
+        b2.volcar()
+        b3 = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        self.assertEqual([v.observacion for v in b3], [f"v{k}" for k in range(8)])
+
+        # segmento sin ninguna línea completa: se descarta y su primer seq lo toma el próximo volcado
+        (self.dir / "visitas-000000000008.jsonl").write_bytes(b'{"id_pi')
+        b4 = BitacoraVisitas(self.dir, capacidad=5, tam_segmento=2)
+        self.assertEqual(len(b4), 8)
+        b4.append(visita(8))
+        b4.volcar()
+        self.assertEqual([v.observacion for v in BitacoraVisitas(self.dir).desde(7)], ["v7", "v8"])
+
+    def test_altas_concurrentes(self):
+        b = BitacoraVisitas(self.dir, capacidad=50, tam_segmento=10)
+
+        def cargar(h):
+            for k in range(500):
+                if k % 2:
+                    b.append(Visita(f"H{h}", "mantenimiento", False, f"{h}-{k}"))
+                else:
+                    b.extend([Visita(f"H{h}", "mantenimiento", False, f"{h}-{k}")])
+
+        hilos = [threading.Thread(target=cargar, args=(h,)) for h in range(4)]
+        for t in hilos:
+            t.start()
+        for t in hilos:
+            t.join()
+        self.assertEqual(len(b), 2000)
+        todas = [v.observacion for v in b]
+        self.assertEqual(len(set(todas)), 2000)
+        for h in range(4):
+            self.assertEqual([v.observacion for v in b.historial(f"H{h}")], [f"{h}-{k}" for k in range(500)])
+        b.volcar()
+        self.assertEqual([v.observacion for v in BitacoraVisitas(self.dir)], todas)
+
+    def test_directorio_temporal_se_borra(self):
+        b = BitacoraVisitas(capacidad=2, tam_segmento=1)
+        b.extend(visita(k) for k in range(4))
+        tmp = b._dir
+        self.assertTrue(tmp.is_dir())
+        b.cerrar()
+        self.assertFalse(tmp.exists())
+
+        b = BitacoraVisitas(capacidad=2, tam_segmento=1)
+        b.extend(visita(k) for k in range(4))
+        tmp = b._dir
+        del b
+        gc.collect()
+        self.assertFalse(tmp.exists())
+
+    def test_directorio_propio_no_se_borra(self):
+        b = BitacoraVisitas(self.dir, capacidad=2, tam_segmento=1)
+        b.extend(visita(k) for k in range(4))
+        b.cerrar()
+        self.assertEqual(len(list(self.dir.iterdir())), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# aqua_manager/tests/test_cache_dosis.py
+# Caché de dosis: solo estrategias con clave_cache(); las de usuario con parámetros no se mezclan
+import unittest
+import numpy as np
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.patrones.strategy.cache_dosis import CacheDosis, CACHE_DOSIS, cacheada
+from AquaKeeper.patrones.strategy.dosificacion import DosificacionStrategy, EstrategiaChoque, estrategia_para
+from AquaKeeper.servicios.pileta_service import PiletaService
+
+class Factor(DosificacionStrategy):
+    def __init__(self, k: float):
+        self.k = k
+
+    def calcular_dosis(self, p):
+        return {"cloro-granulado": p.litros * self.k}
+
+class TestCacheDosis(unittest.TestCase):
+    def test_estrategia_sin_clave_no_se_envuelve(self):
+        f1, f2 = Factor(1), Factor(2)
+        self.assertIs(cacheada(f1), f1)
+        p = Pileta("A", 10000, "1")
+        self.assertEqual(cacheada(f1).calcular_dosis(p), {"cloro-granulado": 10000})
+        self.assertEqual(cacheada(f2).calcular_dosis(p), {"cloro-granulado": 20000})
+
+    def test_cache_no_guarda_estrategias_sin_clave(self):
+        cache = CacheDosis()
+        p = Pileta("A", 10000, "1")
+        self.assertEqual(cache.obtener(Factor(1), p), {"cloro-granulado": 10000})
+        self.assertEqual(cache.obtener(Factor(2), p), {"cloro-granulado": 20000})
+        self.assertEqual(len(cache), 0)
+
+    def test_por_litros_comparte_entradas_entre_instancias(self):
+        cache = CacheDosis()
+        p = Pileta("A", 25000, "1")
+        self.assertEqual(dict(cache.obtener(EstrategiaChoque(), p)), EstrategiaChoque().calcular_dosis(p))
+        cache.obtener(EstrategiaChoque(), p)
+        self.assertEqual((cache.aciertos, cache.fallos), (1, 1))
+
+    def test_bases_de_instancia_no_comparten_entrada(self):
+        cache = CacheDosis()
+        p = Pileta("A", 10000, "1")
+        doble = EstrategiaChoque()
+        doble.BASES = {t: 2 * b for t, b in EstrategiaChoque.BASES.items()}
+        self.assertNotEqual(dict(cache.obtener(EstrategiaChoque(), p)), dict(cache.obtener(doble, p)))
+
+    def test_servicio_usa_la_dosis_de_cada_instancia(self):
+        svc = PiletaService()
+        c = Cliente("1", "Uno", "Calle 1")
+        c.stock.disponer("cloro-granulado", 15000.0)
+        svc.registrar_cliente(c)
+        svc.registrar_pileta(Pileta("A", 10000, "1"))
+        _, ir1 = svc.evaluar_visita("A", "x", Factor(1))
+        _, ir2 = svc.evaluar_visita("A", "x", Factor(2))
+        self.assertEqual((ir1, ir2), (False, True))
+        plan = svc.planificar_visitas("x", Factor(2), registrar=False)
+        self.assertEqual(plan.n_faltantes.tolist(), [1])
+
+    def test_lote_cacheado_igual_al_directo(self):
+        litros = np.array([8000.0, 12500.5, 8000.0, 30000.0])
+        CACHE_DOSIS.limpiar()
+        np.testing.assert_array_equal(estrategia_para("choque").calcular_dosis_lote(litros),
+                                      EstrategiaChoque().calcular_dosis_lote(litros))
+
+if __name__ == "__main__":
+    unittest.main()
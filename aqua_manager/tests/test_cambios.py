@@ -0,0 +1,119 @@
+# aqua_manager/tests/test_cambios.py
+# Guardado incremental: qué marca PiletaService.cambios, guardar_cambios contra la base y ediciones
+# directas sobre objetos Pileta (resincronizar / verificar)
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto
+from AquaKeeper.patrones.strategy.dosificacion import EstrategiaMantenimiento
+from AquaKeeper.persistencia.repositorios import RepositoriosSQLite, cargar_servicios, guardar_cambios, volcar_servicios
+from AquaKeeper.servicios.cambios import RegistroCambios
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+
+class TestRegistroCambios(unittest.TestCase):
+    def setUp(self):
+        self.inv, self.svc = InventarioLocal(), PiletaService()
+        for dni in ("1", "2"):
+            self.svc.registrar_cliente(Cliente(dni, f"Cliente {dni}", "Calle 1"))
+        for i in range(4):
+            self.svc.registrar_pileta(Pileta(f"P{i}", 10000, str(i % 2 + 1)))
+        self.svc.tomar_cambios(self.inv.version)
+
+    def test_marca_lo_que_pasa_por_el_servicio(self):
+        svc = self.svc
+        self.assertEqual(len(svc.tomar_cambios(self.inv.version)), 0)
+        svc.actualizar_lectura("P2", ph=6.5)
+        svc.aplicar_lecturas(["P0", "P2"], [1e9, 1e9], [7.4, 7.0], [5.0, 5.0], [0.0, 0.0])
+        svc.clientes["2"].stock.disponer("cloro-granulado", 10.0)
+        svc.evaluar_visita("P1", "mantenimiento", EstrategiaMantenimiento())
+        self.inv.registrar_producto(Producto("CL", "Cloro", "cloro-granulado", "g"), 5.0)
+        c = svc.tomar_cambios(self.inv.version)
+        self.assertEqual((c.piletas, c.clientes), (["P2", "P0"], ["2"]))
+        self.assertEqual((c.visitas_desde, c.visitas_hasta, c.inventario), (0, 1, True))
+        self.assertEqual(len(svc.tomar_cambios(self.inv.version)), 0)
+
+    def test_devolver_conserva_lo_marcado_despues(self):
+        reg = RegistroCambios()
+        reg.marcar_pileta("A")
+        c = reg.tomar(3, version_inventario=7)
+        reg.marcar_pileta("B")
+        reg.devolver(c)
+        c2 = reg.tomar(5, version_inventario=7)
+        self.assertEqual((c2.piletas, c2.visitas_desde, c2.visitas_hasta, c2.inventario), (["A", "B"], 0, 5, True))
+
+    def test_edicion_directa_se_ve_recien_al_resincronizar(self):
+        svc = self.svc
+        p = svc.piletas["P3"]
+        p.algas = 0.9                               # por fuera del servicio
+        p.litros = 12500.5
+        self.assertEqual(len(svc.tomar_cambios(self.inv.version)), 0)
+        self.assertEqual(svc.piletas_en_alerta("algas"), [])
+        self.assertEqual(svc.resincronizar(), ["P3"])
+        self.assertEqual(svc.tomar_cambios(self.inv.version).piletas, ["P3"])
+        self.assertEqual(svc.piletas_en_alerta("algas"), [p])
+        self.assertEqual(svc.flota.litros[svc.flota.fila("P3")], 12500.5)
+        svc.verificar_indices()
+        self.assertEqual(svc.resincronizar(), [])
+
+class TestGuardarCambios(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self._tmp.name) / "aqua.db")
+        self.repos = RepositoriosSQLite(self.ruta)
+        self.inv, self.svc = InventarioLocal(), PiletaService()
+        self.inv.registrar_producto(Producto("CL", "Cloro", "cloro-granulado", "g"), 100.0)
+        for dni in ("1", "2"):
+            self.svc.registrar_cliente(Cliente(dni, f"Cliente {dni}", "Calle 1"))
+        for i in range(6):
+            self.svc.registrar_pileta(Pileta(f"P{i}", 10000, str(i % 2 + 1)))
+        volcar_servicios(self.repos, self.inv, self.svc)
+
+    def tearDown(self):
+        self.repos.cerrar()
+        self._tmp.cleanup()
+
+    def recargar(self):
+        repos = RepositoriosSQLite(self.ruta)
+        inv, svc = InventarioLocal(), PiletaService()
+        cargar_servicios(repos, inv, svc)
+        repos.cerrar()
+        return inv, svc
+
+    def test_incremental_escribe_solo_lo_modificado(self):
+        svc = self.svc
+        svc.aplicar_lecturas(["P4"], [1e9], [6.9], [12.0], [0.3])
+        svc.clientes["1"].stock.disponer("clarificador", 3.0)
+        svc.evaluar_visita("P4", "mantenimiento", EstrategiaMantenimiento())
+        self.inv.descontar("CL", 40.0)
+        with mock.patch.object(self.repos.piletas, "guardar_lote", wraps=self.repos.piletas.guardar_lote) as piletas:
+            c = guardar_cambios(self.repos, self.inv, svc)
+        self.assertEqual([p.id_pileta for p in piletas.call_args.args[0]], ["P4"])
+        self.assertEqual((c.clientes, c.visitas_hasta - c.visitas_desde, c.inventario), (["1"], 1, True))
+
+        inv2, svc2 = self.recargar()
+        self.assertEqual(svc2.piletas["P4"], svc.piletas["P4"])
+        self.assertEqual(svc2.flota.ts_lectura[svc2.flota.fila("P4")], 1e9)
+        self.assertEqual(svc2.clientes["1"].stock.disponible("clarificador"), 3.0)
+        self.assertEqual(inv2.disponible("CL"), 60.0)
+        self.assertEqual(list(svc2.visitas), list(svc.visitas))
+
+    def test_escritura_fallida_deja_pendiente(self):
+        self.svc.actualizar_lectura("P1", turbidez=30.0)
+        with mock.patch.object(self.repos.piletas, "guardar_lote", side_effect=RuntimeError("disco lleno")):
+            with self.assertRaises(RuntimeError):
+                guardar_cambios(self.repos, self.inv, self.svc)
+        self.assertEqual(guardar_cambios(self.repos, self.inv, self.svc).piletas, ["P1"])
+        self.assertEqual(self.recargar()[1].piletas["P1"].turbidez, 30.0)
+
+    def test_edicion_directa(self):
+        # sin verificar la edición directa no se ve; con verificar (default) se guarda
+        self.svc.piletas["P0"].ph = 6.1
+        self.assertEqual(guardar_cambios(self.repos, self.inv, self.svc, verificar=False).piletas, [])
+        self.assertEqual(self.recargar()[1].piletas["P0"].ph, 7.4)
+        self.assertEqual(guardar_cambios(self.repos, self.inv, self.svc).piletas, ["P0"])
+        self.assertEqual(self.recargar()[1].piletas["P0"].ph, 6.1)
+
+if __name__ == "__main__":
+    unittest.main()
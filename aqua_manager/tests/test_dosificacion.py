@@ -0,0 +1,114 @@
+# aqua_manager/tests/test_dosificacion.py
+# Dosis en lote (pileta × tipo de producto) contra calcular_dosis pileta por pileta, incluido el fallback
+# genérico, volúmenes no enteros leídos de las columnas de la flota, tipos según los litros evaluados y el
+# redondeo vectorizado igual a round()
+import random
+import unittest
+import numpy as np
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.config.constantes import TIPOS_PRODUCTO
+from AquaKeeper.patrones.strategy.cache_dosis import EstrategiaCacheada
+from AquaKeeper.patrones.strategy.dosificacion import (
+    COLUMNA_TIPO, DosificacionStrategy, ESTRATEGIAS, EstrategiaMantenimiento, _redondear_2
+)
+from AquaKeeper.servicios.flota import FlotaPiletas
+from AquaKeeper.servicios.pileta_service import PiletaService
+
+LITROS = [8000, 12500.5, 8000, 30000, 10005, 0, 47333.33]
+
+class PorTurno(DosificacionStrategy):
+    # Solo calcular_dosis: usa el fallback genérico
+    def calcular_dosis(self, p):
+        return {"alguicida": round(p.litros / 3000, 2), "cloro-pastilla": 2.0}
+
+class PorTamanio(DosificacionStrategy):
+    # Antisarro solo en piletas grandes: los tipos dependen del volumen
+    def calcular_dosis(self, p):
+        dosis = {"cloro-granulado": round(p.litros / 1000, 2)}
+        if p.litros > 40000:
+            dosis["antisarro"] = 50.0
+        return dosis
+
+class Desconocido(DosificacionStrategy):
+    def calcular_dosis(self, p):
+        return {"sal": 1.0}
+
+def como_dict(fila):
+    return {t: fila[COLUMNA_TIPO[t]] for t in TIPOS_PRODUCTO if fila[COLUMNA_TIPO[t]]}
+
+class TestDosisLote(unittest.TestCase):
+    def assertIgualAEscalar(self, strat, litros):
+        lote = strat.calcular_dosis_lote(np.array(litros, dtype=float))
+        self.assertEqual(lote.shape, (len(litros), len(TIPOS_PRODUCTO)))
+        for l, fila in zip(litros, lote.tolist()):
+            esperado = {t: c for t, c in strat.calcular_dosis(Pileta("", l, "")).items() if c}
+            self.assertEqual(como_dict(fila), esperado, (type(strat).__name__, l))
+
+    def test_estrategias_incluidas(self):
+        for razon, cls in ESTRATEGIAS.items():
+            with self.subTest(razon=razon):
+                strat = cls()
+                self.assertIgualAEscalar(strat, LITROS)
+                self.assertEqual(strat.tipos(), tuple(strat.calcular_dosis(Pileta("", 10000, ""))))
+
+    def test_fallback_generico(self):
+        self.assertIgualAEscalar(PorTurno(), LITROS)
+        self.assertEqual(PorTurno().calcular_dosis_lote(np.array([])).shape, (0, len(TIPOS_PRODUCTO)))
+        with self.assertRaisesRegex(ValueError, "sal"):
+            Desconocido().calcular_dosis_lote(np.array([10000.0]))
+
+    def test_litros_no_enteros_desde_la_flota(self):
+        flota = FlotaPiletas()
+        for i, l in enumerate(LITROS):
+            flota.upsert(Pileta(f"P{i}", l, "1"))
+        self.assertEqual(flota.litros.tolist(), [float(l) for l in LITROS])
+        for cls in ESTRATEGIAS.values():
+            strat = cls()
+            lote = strat.calcular_dosis_lote(flota.litros)
+            for p, fila in zip(flota.piletas, lote.tolist()):
+                self.assertEqual(como_dict(fila), {t: c for t, c in strat.calcular_dosis(p).items() if c})
+
+class TestTipos(unittest.TestCase):
+    def test_tipos_de_los_litros_evaluados(self):
+        strat = PorTamanio()
+        chicas = strat.calcular_dosis_lote(np.array([8000.0, 25000.0]))
+        mixtas = strat.calcular_dosis_lote(np.array([8000.0, 50000.0]))
+        self.assertEqual(strat.tipos(chicas), ("cloro-granulado",))
+        self.assertEqual(strat.tipos(mixtas), ("cloro-granulado", "antisarro"))
+        self.assertEqual(EstrategiaCacheada(strat).tipos(mixtas), ("cloro-granulado", "antisarro"))
+        with self.assertRaisesRegex(ValueError, "PorTamanio"):
+            strat.tipos()
+        # las que declaran sus tipos no dependen de la matriz
+        self.assertEqual(EstrategiaMantenimiento().tipos(chicas), EstrategiaMantenimiento().tipos())
+
+    def test_evaluacion_de_la_flota(self):
+        svc = PiletaService()
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        svc.registrar_pileta(Pileta("A", 8000, "1"))
+        svc.registrar_pileta(Pileta("B", 50000, "1"))
+        items = {i["id_pileta"]: i for i in svc.iterar_evaluacion("especial", PorTamanio())}
+        self.assertEqual(items["B"]["faltantes"], {"cloro-granulado": 50.0, "antisarro": 50.0})
+        self.assertEqual(items["A"]["cobertura"], {"cloro-granulado": 0.0, "antisarro": 100.0})
+
+class TestRedondeo(unittest.TestCase):
+    def test_igual_a_round(self):
+        rng = random.Random(0)
+        # valores a un ulp de los .5 (donde np.round puede diferir) y al azar
+        bordes = [k / 100 + 0.005 for k in range(-500, 20000)]
+        xs = np.array(bordes + [np.nextafter(x, d) for x in bordes for d in (-np.inf, np.inf)]
+                      + [rng.uniform(0, 5000) for _ in range(20000)] + [0.0, -0.0, 1e17])
+        esperado = [round(x, 2) for x in xs.tolist()]
+        self.assertNotEqual(np.round(xs, 2).tolist(), esperado)
+        self.assertEqual(_redondear_2(xs).tolist(), esperado)
+        self.assertEqual(_redondear_2(xs[:300].reshape(-1, 3)).tolist(), np.reshape(esperado[:300], (-1, 3)).tolist())
+
+    def test_lote_igual_a_escalar_con_bases_arbitrarias(self):
+        strat = EstrategiaMantenimiento()
+        strat.BASES = {"cloro-granulado": 1.0, "clarificador": 0.3, "antisarro": 7.77, "alguicida": 33.35}
+        litros = list(range(0, 60001, 7)) + [12500.5, 47333.33]
+        lote = strat.calcular_dosis_lote(np.array(litros, dtype=float))
+        for l, fila in zip(litros, lote.tolist()):
+            self.assertEqual({t: fila[COLUMNA_TIPO[t]] for t in strat.BASES}, strat.calcular_dosis(Pileta("", l, "")), l)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# aqua_manager/tests/test_ejecucion.py
+# capturar_salida: dos capturas concurrentes no se mezclan y, al terminar, print vuelve a la salida original
+import asyncio
+import io
+import sys
+import threading
+import unittest
+from unittest import mock
+from AquaKeeper.web import ejecucion
+from AquaKeeper.web.ejecucion import capturar_salida, ejecutar
+
+def imprimir(texto, barrera):
+    for _ in range(50):
+        print(texto)
+        barrera.wait(timeout=5)     # las dos capturas se intercalan línea a línea
+    return texto
+
+class TestCapturarSalida(unittest.TestCase):
+    def setUp(self):
+        # sys.stdout propio para que el envoltorio se instale sobre él y el test lo deje como estaba
+        self.original = io.StringIO()
+        parche = mock.patch.object(sys, "stdout", self.original)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def verificar(self, resultados):
+        (ra, sa), (rb, sb) = resultados
+        self.assertEqual((ra, rb), ("uno", "dos"))
+        self.assertEqual(sa, "uno\n" * 50)
+        self.assertEqual(sb, "dos\n" * 50)
+        # nada de las capturas llegó a la salida original, y lo de afuera va ahí
+        print("afuera")
+        self.assertEqual(self.original.getvalue(), "afuera\n")
+        self.assertIs(sys.stdout.original, self.original)
+
+    def test_hilos(self):
+        barrera = threading.Barrier(2)
+        resultados = [None, None]
+
+        def correr(i, texto):
+            resultados[i] = capturar_salida(imprimir, texto, barrera)
+
+        hilos = [threading.Thread(target=correr, args=(i, t)) for i, t in enumerate(("uno", "dos"))]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        self.verificar(resultados)
+
+    def test_gather_en_el_pool(self):
+        barrera = threading.Barrier(2)
+
+        async def ambos():
+            return await asyncio.gather(ejecutar(capturar_salida, imprimir, "uno", barrera),
+                                        ejecutar(capturar_salida, imprimir, "dos", barrera))
+
+        with mock.patch.dict("os.environ", {"AQUA_WEB_WORKERS": "2"}):
+            ejecucion.cerrar_pool()
+            self.addCleanup(ejecucion.cerrar_pool)
+            self.verificar(asyncio.run(ambos()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+# aqua_manager/tests/test_evaluacion.py
+# iterar_evaluacion y planificar_visitas: coinciden con la evaluación por pileta (iterar_evaluacion también
+# si la flota cambia entre lotes) y no fallan por piletas de clientes sin registrar
+import json
+import random
+import threading
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+from AquaKeeper.config.constantes import TIPOS_PRODUCTO
+from AquaKeeper.entidades.modelo import Cliente, MatrizStock, Pileta
+from AquaKeeper.patrones.strategy.dosificacion import estrategia_para
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.web import main
+from AquaKeeper.web.estado import EstadoApp
+
+class FlotaChica(unittest.TestCase):
+    def setUp(self):
+        self.svc = PiletaService()
+        rng = random.Random(0)
+        for d in range(5):
+            c = Cliente(str(d), f"Cliente {d}", "Calle 1")
+            c.stock.disponer("cloro-granulado", float(rng.randrange(0, 400)))
+            c.stock.disponer("clarificador", float(rng.randrange(0, 400)))
+            self.svc.registrar_cliente(c)
+        for i in range(50):
+            self.alta(i, rng)
+
+    def alta(self, i, rng):
+        self.svc.registrar_pileta(Pileta(f"P{i}", 8000 + (i % 7) * 3000, str(i % 5), ph=rng.uniform(6.8, 8.0),
+                                         turbidez=rng.uniform(0, 40), algas=rng.random()))
+
+    def esperado(self, item):
+        p = self.svc.piletas[item["id_pileta"]]
+        strat = estrategia_para(item["accion"])
+        return {"id_pileta": p.id_pileta, "estado_agua_pct": self.svc.estado_agua_porcentual(p),
+                "accion": item["accion"], "cobertura": self.svc.cobertura_productos_cliente(p.cliente_dni, p, strat),
+                "faltantes": self.svc.faltantes_cliente(p.cliente_dni, p, strat)}
+
+class TestIterarEvaluacion(FlotaChica):
+    def test_items_iguales_a_la_evaluacion_por_pileta(self):
+        items = list(self.svc.iterar_evaluacion(tam_lote=7))
+        self.assertEqual([it["id_pileta"] for it in items], [f"P{i}" for i in range(50)])
+        for it in items:
+            self.assertEqual(it, self.esperado(it))
+
+    def test_altas_y_lecturas_entre_lotes(self):
+        rng = random.Random(1)
+        gen = self.svc.iterar_evaluacion("choque", estrategia_para("choque"), tam_lote=10)
+        vistos = []
+        for k, it in enumerate(gen):
+            vistos.append(it["id_pileta"])
+            if k % 10 == 9:
+                # entre lotes: lecturas nuevas y altas (las columnas de la flota se reubican al crecer)
+                self.svc.aplicar_lecturas([f"P{rng.randrange(50)}" for _ in range(20)], [1e9 + k] * 20,
+                                          [7.4] * 20, [5.0] * 20, [0.0] * 20)
+                for i in range(len(self.svc.piletas), len(self.svc.piletas) + 400):
+                    self.alta(i, rng)
+            if k < 10 or k % 10:
+                continue
+            self.assertEqual(it, self.esperado(it))     # primer item de un lote: armado después del cambio
+        # termina con las piletas que había al empezar, sin saltear ni repetir (las altas quedan afuera)
+        self.assertEqual(vistos, [f"P{i}" for i in range(50)])
+        self.assertEqual(len(self.svc.piletas), 50 + 5 * 400)
+
+    def test_con_escritor_concurrente(self):
+        parar = threading.Event()
+
+        def escribir():
+            rng = random.Random(2)
+            k = 0
+            while not parar.is_set():
+                ids = [f"P{rng.randrange(50)}" for _ in range(30)]
+                self.svc.aplicar_lecturas(ids, [1e9 + k] * 30, [rng.uniform(6.8, 8.0) for _ in ids],
+                                          [rng.uniform(0, 40) for _ in ids], [rng.random() for _ in ids])
+                k += 1
+
+        t = threading.Thread(target=escribir)
+        t.start()
+        try:
+            for _ in range(20):
+                items = list(self.svc.iterar_evaluacion(tam_lote=5))
+                self.assertEqual([it["id_pileta"] for it in items], [f"P{i}" for i in range(50)])
+        finally:
+            parar.set()
+            t.join()
+
+class TestPlanificarVisitas(FlotaChica):
+    def test_visitas_iguales_a_evaluar_visita(self):
+        strat = estrategia_para("choque")
+        plan = self.svc.planificar_visitas("choque", strat, registrar=False)
+        self.assertEqual(len(self.svc.visitas), 0)
+        esperadas = {}
+        for i in self.svc.piletas:
+            v, debo_ir = self.svc.evaluar_visita(i, "choque", strat)
+            if debo_ir:
+                esperadas[i] = v
+        self.assertEqual([i for i, d in zip(plan.ids, plan.debo_ir.tolist()) if d], [v.id_pileta for v in plan.visitas])
+        self.assertEqual({v.id_pileta: v for v in plan.visitas}, esperadas)
+
+    def test_registrar(self):
+        plan = self.svc.planificar_visitas("mantenimiento", estrategia_para("mantenimiento"))
+        self.assertEqual(self.svc.visitas.recientes(), plan.visitas)
+
+class TestClienteSinRegistrar(FlotaChica):
+    # una pileta cuyo dni no es de ningún cliente registrado: sin stock en casa, no corta la flota
+    def setUp(self):
+        super().setUp()
+        self.svc.registrar_pileta(Pileta("H", 12000, "nadie", ph=7.4))
+
+    def test_planificar_visitas(self):
+        strat = estrategia_para("mantenimiento")
+        plan = self.svc.planificar_visitas("mantenimiento", strat, registrar=False)
+        dosis = strat.calcular_dosis(self.svc.piletas["H"])
+        k = plan.ids.index("H")
+        self.assertEqual((bool(plan.debo_ir[k]), int(plan.n_faltantes[k])), (True, len(dosis)))
+        visitas = {v.id_pileta: v for v in plan.visitas}
+        self.assertEqual(visitas.pop("H").observacion, f"Estado agua 100.0%. Faltantes: {dosis}")
+        for i, v in visitas.items():
+            self.assertEqual(v, self.svc.evaluar_visita(i, "mantenimiento", strat)[0])
+
+    def test_iterar_evaluacion(self):
+        items = list(self.svc.iterar_evaluacion(tam_lote=7))
+        self.assertEqual([it["id_pileta"] for it in items], [f"P{i}" for i in range(50)] + ["H"])
+        h = items.pop()
+        dosis = estrategia_para(h["accion"]).calcular_dosis(self.svc.piletas["H"])
+        self.assertEqual((h["cobertura"], h["faltantes"]), ({t: 0.0 for t in dosis}, dosis))
+        for it in items:
+            self.assertEqual(it, self.esperado(it))
+
+    def test_stream_ndjson_completo(self):
+        est = EstadoApp(InventarioLocal(), self.svc)
+        with mock.patch.object(main, "obtener_estado", return_value=est):
+            r = TestClient(main.app).get("/api/flota/evaluacion.ndjson", params={"tam_lote": 7})
+        self.assertEqual(r.status_code, 200)
+        lineas = [json.loads(l) for l in r.text.splitlines()]
+        self.assertEqual([l["id_pileta"] for l in lineas], [f"P{i}" for i in range(50)] + ["H"])
+
+    def test_matriz_con_stock_compacto(self):
+        matriz = MatrizStock()
+        for c in self.svc.clientes.values():
+            compacto = matriz.nuevo_stock()
+            for sku, cant in c.stock.cantidades.items():
+                compacto.disponer(sku, cant)
+            c.stock = compacto
+        m = self.svc.matriz_stock_clientes()
+        self.assertEqual(self.svc.flota.clientes[-1], "nadie")
+        self.assertEqual(m[-1].tolist(), [0.0] * len(TIPOS_PRODUCTO))
+        self.assertEqual(m[:-1].tolist(), matriz.datos[:, :len(TIPOS_PRODUCTO)].tolist())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# aqua_manager/tests/test_flota.py
+# FlotaPiletas (columnas por pileta) y estado del agua en lote contra estado_agua_porcentual pileta por pileta
+import random
+import unittest
+import numpy as np
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.servicios.flota import FlotaPiletas
+from AquaKeeper.servicios.pileta_service import ALERTAS, PiletaService, alertas_pileta
+from AquaKeeper.config.constantes import PH_IDEAL_MIN, PH_IDEAL_MAX, TURBIDEZ_MAX_PERMITIDA, ALGAS_UMBRAL_ALERTA
+
+class TestFlotaPiletas(unittest.TestCase):
+    def test_upsert_y_crecimiento(self):
+        flota = FlotaPiletas(capacidad_inicial=2)
+        for i in range(5):
+            self.assertEqual(flota.upsert(Pileta(f"P{i}", 10000 + i, str(i % 2), ph=7.0 + i / 10)), i)
+        self.assertEqual(len(flota), 5)
+        self.assertEqual(flota.litros.tolist(), [10000.0, 10001.0, 10002.0, 10003.0, 10004.0])
+        self.assertEqual(flota.ph.tolist(), [7.0, 7.1, 7.2, 7.3, 7.4])
+        self.assertEqual(flota.clientes, ["0", "1"])
+        self.assertEqual(flota.cliente.tolist(), [0, 1, 0, 1, 0])
+        self.assertEqual(flota.filas(["P3", "X", "P0"]).tolist(), [3, -1, 0])
+
+        # volver a registrar un id pisa su fila (no agrega otra)
+        p = Pileta("P1", 30000, "nuevo", algas=0.9)
+        self.assertEqual(flota.upsert(p), 1)
+        self.assertEqual(len(flota), 5)
+        self.assertIs(flota.piletas[1], p)
+        self.assertEqual((flota.litros[1], flota.algas[1], flota.clientes[flota.cliente[1]]), (30000.0, 0.9, "nuevo"))
+
+    def test_bordes_de_umbrales(self):
+        flota = FlotaPiletas()
+        casos = [(PH_IDEAL_MIN, TURBIDEZ_MAX_PERMITIDA, ALGAS_UMBRAL_ALERTA),          # en el borde: sin alertas
+                 (PH_IDEAL_MAX + 0.01, TURBIDEZ_MAX_PERMITIDA + 0.01, ALGAS_UMBRAL_ALERTA + 0.01),
+                 (PH_IDEAL_MIN - 0.01, 0.0, 1.0)]
+        for i, (ph, turb, algas) in enumerate(casos):
+            flota.upsert(Pileta(f"P{i}", 10000, "1", ph=ph, turbidez=turb, algas=algas))
+        self.assertEqual(flota.estado_agua().tolist(), [100.0, 0.0, 25.0])
+        self.assertEqual(flota.alertas().tolist(), [0, 7, 5])
+        self.assertEqual(flota.estado_agua(np.array([2, 0])).tolist(), [25.0, 100.0])
+
+class TestEstadoAguaLote(unittest.TestCase):
+    def test_igual_a_pileta_por_pileta(self):
+        rng = random.Random(0)
+        svc = PiletaService()
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        for i in range(500):
+            svc.registrar_pileta(Pileta(f"P{i}", 8000 + (i % 9) * 1000, "1", ph=rng.uniform(6.5, 8.5),
+                                        turbidez=rng.uniform(0, 40), algas=rng.random()))
+        for i in rng.sample(range(500), 100):
+            svc.actualizar_lectura(f"P{i}", ph=rng.uniform(6.5, 8.5), algas=rng.random())
+        piletas = list(svc.piletas.values())
+        self.assertEqual(svc.estado_agua_lote().tolist(), [svc.estado_agua_porcentual(p) for p in piletas])
+        ids = [f"P{i}" for i in (499, 3, 250)]
+        self.assertEqual(svc.estado_agua_lote(ids).tolist(), [svc.estado_agua_porcentual(svc.piletas[i]) for i in ids])
+        mascaras = svc.flota.alertas().tolist()
+        self.assertEqual([tuple(a for k, a in enumerate(ALERTAS) if m >> k & 1) for m in mascaras],
+                         [alertas_pileta(p) for p in piletas])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# aqua_manager/tests/test_indices.py
+# Índices secundarios de PiletaService (cliente, banda de tamaño, alertas) contra un filtro por fuerza bruta
+import random
+import unittest
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.servicios.pileta_service import ALERTAS, BANDAS, PiletaService, alertas_pileta, banda_tamano
+from AquaKeeper.config.constantes import PISCINA_CHICA_L, PISCINA_MEDIANA_L, PISCINA_GRANDE_L
+
+CLIENTES = ("111", "222", "333")
+LITROS = (PISCINA_CHICA_L, PISCINA_MEDIANA_L, PISCINA_GRANDE_L)
+
+class TestIndicesPiletas(unittest.TestCase):
+    def setUp(self):
+        self.svc = PiletaService()
+        for dni in CLIENTES:
+            self.svc.registrar_cliente(Cliente(dni, f"Cliente {dni}", "Calle 1"))
+
+    def comparar_con_fuerza_bruta(self):
+        svc = self.svc
+        svc.verificar_indices()
+        todas = list(svc.piletas.values())
+        for dni in CLIENTES + ("999",):
+            self.assertEqual({p.id_pileta for p in svc.piletas_de_cliente(dni)},
+                             {p.id_pileta for p in todas if p.cliente_dni == dni})
+        for banda in BANDAS:
+            self.assertEqual({p.id_pileta for p in svc.piletas_por_banda(banda)},
+                             {p.id_pileta for p in todas if banda_tamano(p.litros) == banda})
+        for alerta in ALERTAS:
+            self.assertEqual({p.id_pileta for p in svc.piletas_en_alerta(alerta)},
+                             {p.id_pileta for p in todas if alerta in alertas_pileta(p)})
+
+    def test_registrar(self):
+        self.svc.registrar_pileta(Pileta("A", PISCINA_CHICA_L, "111"))
+        self.svc.registrar_pileta(Pileta("B", PISCINA_GRANDE_L, "111", ph=6.0, algas=0.9))
+        self.svc.registrar_pileta(Pileta("C", PISCINA_MEDIANA_L, "222", turbidez=99.0))
+        self.comparar_con_fuerza_bruta()
+        self.assertEqual([p.id_pileta for p in self.svc.piletas_de_cliente("111")], ["A", "B"])
+        self.assertEqual([p.id_pileta for p in self.svc.piletas_en_alerta("turbidez")], ["C"])
+
+    def test_reregistrar_con_otro_cliente_y_tamano(self):
+        self.svc.registrar_pileta(Pileta("A", PISCINA_CHICA_L, "111", algas=0.9))
+        self.svc.registrar_pileta(Pileta("A", PISCINA_GRANDE_L, "222"))
+        self.comparar_con_fuerza_bruta()
+        self.assertEqual(self.svc.piletas_de_cliente("111"), [])
+        self.assertEqual([p.id_pileta for p in self.svc.piletas_por_banda("grande")], ["A"])
+        self.assertEqual(self.svc.piletas_por_banda("chica"), [])
+        self.assertEqual(self.svc.piletas_en_alerta("algas"), [])
+        self.assertIs(self.svc.flota.piletas[self.svc.flota.fila("A")], self.svc.piletas["A"])
+
+    def test_actualizar_lectura_cambia_alertas(self):
+        self.svc.registrar_pileta(Pileta("A", PISCINA_CHICA_L, "111"))
+        self.svc.actualizar_lectura("A", ph=5.5, algas=0.8)
+        self.comparar_con_fuerza_bruta()
+        self.assertEqual(set(alertas_pileta(self.svc.piletas["A"])), {"ph", "algas"})
+        self.svc.actualizar_lectura("A", ph=7.4)
+        self.comparar_con_fuerza_bruta()
+        self.assertEqual(self.svc.piletas_en_alerta("ph"), [])
+
+    def test_aplicar_lecturas_cambia_alertas(self):
+        for i in range(20):
+            self.svc.registrar_pileta(Pileta(f"P{i}", LITROS[i % 3], CLIENTES[i % 3]))
+        rng = random.Random(0)
+        for lote in range(5):
+            ids = [f"P{rng.randrange(20)}" for _ in range(30)]
+            self.svc.aplicar_lecturas(ids, [1000.0 + lote * 100 + k for k in range(30)],
+                                      [rng.uniform(6.0, 8.5) for _ in ids], [rng.uniform(0, 40) for _ in ids],
+                                      [rng.random() for _ in ids])
+            self.comparar_con_fuerza_bruta()
+
+    def test_verificar_indices_detecta_inconsistencia(self):
+        self.svc.registrar_pileta(Pileta("A", PISCINA_CHICA_L, "111"))
+        self.svc.piletas["A"].algas = 0.9      # cambio sin pasar por el servicio
+        with self.assertRaises(ValueError):
+            self.svc.verificar_indices()
+
+    def test_mezcla_aleatoria(self):
+        rng = random.Random(1)
+        for k in range(300):
+            i = f"P{rng.randrange(40)}"
+            if i in self.svc.piletas and rng.random() < 0.5:
+                self.svc.actualizar_lectura(i, ph=rng.uniform(6.0, 8.5), turbidez=rng.uniform(0, 40))
+            else:
+                self.svc.registrar_pileta(Pileta(i, rng.choice(LITROS) + rng.randrange(-5000, 5000),
+                                                 rng.choice(CLIENTES), algas=rng.random()))
+            if k % 25 == 0:
+                self.comparar_con_fuerza_bruta()
+        self.comparar_con_fuerza_bruta()
+
+if __name__ == "__main__":
+    unittest.main()
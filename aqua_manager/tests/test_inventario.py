@@ -0,0 +1,60 @@
+# aqua_manager/tests/test_inventario.py
+# InventarioLocal: índice tipo -> SKUs (altas, re-registro con otro tipo) y elección de SKU según la política
+import unittest
+from AquaKeeper.entidades.modelo import Producto
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+
+def catalogo(inv: InventarioLocal) -> None:
+    inv.registrar_producto(Producto("CL-1", "Cloro 1kg", "cloro-granulado", "g", precio=9.0), 100.0)
+    inv.registrar_producto(Producto("CL-5", "Cloro 5kg", "cloro-granulado", "g", precio=7.5), 400.0)
+    inv.registrar_producto(Producto("CL-X", "Cloro genérico", "cloro-granulado", "g", precio=8.0), 400.0)
+    inv.registrar_producto(Producto("CLA", "Clarificador", "clarificador", "ml", precio=3.0), 50.0)
+
+class TestIndiceTipos(unittest.TestCase):
+    def test_altas_y_re_registro(self):
+        inv = InventarioLocal()
+        catalogo(inv)
+        self.assertEqual(inv.skus_de_tipo("cloro-granulado"), ["CL-1", "CL-5", "CL-X"])
+        self.assertEqual(inv.skus_de_tipo("alguicida"), [])
+
+        # mismo tipo: no se duplica ni cambia de lugar
+        inv.registrar_producto(Producto("CL-1", "Cloro 1kg (nuevo envase)", "cloro-granulado", "g"))
+        self.assertEqual(inv.skus_de_tipo("cloro-granulado"), ["CL-1", "CL-5", "CL-X"])
+        # otro tipo: sale del anterior
+        inv.registrar_producto(Producto("CL-5", "Alguicida 5L", "alguicida", "ml"))
+        inv.registrar_producto(Producto("CLA", "Antisarro", "antisarro", "ml"))
+        self.assertEqual(inv.skus_de_tipo("cloro-granulado"), ["CL-1", "CL-X"])
+        self.assertEqual(inv.skus_de_tipo("alguicida"), ["CL-5"])
+        self.assertEqual(inv.skus_de_tipo("clarificador"), [])
+        self.assertEqual(inv.disponible("antisarro"), 50.0)      # el stock sigue en el SKU
+
+        # la lista devuelta es una copia
+        inv.skus_de_tipo("alguicida").append("Z")
+        self.assertEqual(inv.skus_de_tipo("alguicida"), ["CL-5"])
+
+class TestPoliticaSku(unittest.TestCase):
+    def resolver(self, politica: str) -> dict:
+        inv = InventarioLocal(politica_sku=politica)
+        catalogo(inv)
+        return inv.resolver_dosis({"cloro-granulado": 10.0})
+
+    def test_politicas(self):
+        self.assertEqual(self.resolver("primero"), {"CL-1": 10.0})
+        self.assertEqual(self.resolver("mayor_stock"), {"CL-5": 10.0})   # empate con CL-X: el primero
+        self.assertEqual(self.resolver("mas_barato"), {"CL-5": 10.0})
+        with self.assertRaisesRegex(ValueError, "caro"):
+            InventarioLocal(politica_sku="caro")
+
+    def test_resolver_dosis_y_movimientos(self):
+        inv = InventarioLocal(politica_sku="mas_barato")
+        catalogo(inv)
+        # SKU y tipo que resuelven al mismo SKU se suman; lo desconocido pasa tal cual
+        self.assertEqual(inv.resolver_dosis({"CL-5": 1.0, "cloro-granulado": 2.5, "clarificador": 4.0, "sal": 1.0}),
+                         {"CL-5": 3.5, "CLA": 4.0, "sal": 1.0})
+        v = inv.version
+        inv.descontar("cloro-granulado", 100.0)
+        inv.reponer("clarificador", 5.0)
+        self.assertEqual((inv.disponible("CL-5"), inv.disponible("CLA"), inv.version), (300.0, 55.0, v + 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# aqua_manager/tests/test_lecturas.py
+# Ingesta de lecturas en lote (aplicar_lecturas y POST /api/lecturas): motivos de rechazo, la lectura más
+# nueva de cada pileta gana, las viejas se descartan y solo se reevalúan las piletas cuyas alertas cambian
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+from AquaKeeper.config.constantes import LECTURAS_MAX_POR_LOTE
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.web import main
+from AquaKeeper.web.estado import EstadoApp
+
+NAN, INF = float("nan"), float("inf")
+
+def columnas(lecturas):
+    return list(zip(*lecturas))
+
+class TestAplicarLecturas(unittest.TestCase):
+    def setUp(self):
+        self.svc = PiletaService()
+        self.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        for i in "ABC":
+            self.svc.registrar_pileta(Pileta(i, 10000, "1", ph=7.4, turbidez=5.0, algas=0.0))
+
+    def test_rechazos_y_ultima_lectura(self):
+        svc = self.svc
+        lote = [
+            ("X", 10.0, 7.0, 1.0, 0.0),
+            ("A", 0.0, 7.0, 1.0, 0.0),
+            ("A", NAN, 7.0, 1.0, 0.0),
+            ("A", 10.0, 15.0, 1.0, 0.0),
+            ("A", 10.0, 7.0, -1.0, 0.0),
+            ("A", 10.0, 7.0, INF, 0.0),
+            ("A", 10.0, 7.0, 1.0, 1.5),
+            ("X", 0.0, 20.0, -1.0, 2.0),        # varias fallas: se informa la primera
+            ("A", 20.0, 6.0, 5.0, 0.0),         # más vieja que la siguiente
+            ("A", 30.0, 7.4, 5.0, 0.9),
+            ("B", 25.0, 7.4, 8.0, 0.0),         # mismo ts que la siguiente: gana la posterior
+            ("B", 25.0, 6.0, 5.0, 0.0),
+        ]
+        v = svc.version
+        r = svc.aplicar_lecturas(*columnas(lote))
+        self.assertEqual(r.rechazadas, [(0, "pileta desconocida"), (1, "timestamp inválido"), (2, "timestamp inválido"),
+                                        (3, "ph fuera de rango"), (4, "turbidez inválida"), (5, "turbidez inválida"),
+                                        (6, "algas fuera de rango"), (7, "pileta desconocida")])
+        self.assertEqual((r.recibidas, r.aplicadas, r.descartadas), (12, 2, 2))
+        a, b = svc.piletas["A"], svc.piletas["B"]
+        self.assertEqual(((a.ph, a.algas), (b.ph, b.turbidez)), ((7.4, 0.9), (6.0, 5.0)))
+        self.assertEqual(svc.flota.ts_lectura[svc.flota.filas(["A", "B", "C"])].tolist(), [30.0, 25.0, 0.0])
+        self.assertEqual(r.reevaluadas, {"A": svc.estado_agua_porcentual(a), "B": svc.estado_agua_porcentual(b)})
+        self.assertEqual((svc.piletas_en_alerta("algas"), svc.piletas_en_alerta("ph")), ([a], [b]))
+        self.assertEqual(svc.version, v + 1)
+        svc.verificar_indices()
+
+    def test_lecturas_viejas_y_sin_cambio_de_alertas(self):
+        svc = self.svc
+        svc.aplicar_lecturas(["A"], [30.0], [7.4], [5.0], [0.0])
+        v = svc.version
+        r = svc.aplicar_lecturas(["A", "A"], [30.0, 29.0], [6.0, 6.0], [5.0, 5.0], [0.0, 0.0])
+        self.assertEqual((r.aplicadas, r.descartadas, r.reevaluadas, svc.version), (0, 2, {}, v))
+        self.assertEqual(svc.piletas["A"].ph, 7.4)
+        r = svc.aplicar_lecturas(["C"], [1.0], [7.3], [20.0], [0.2])       # aplicada, mismas alertas
+        self.assertEqual((r.aplicadas, r.reevaluadas, svc.piletas["C"].turbidez), (1, {}, 20.0))
+
+    def test_lote_vacio_y_largos_distintos(self):
+        r = self.svc.aplicar_lecturas([], [], [], [], [])
+        self.assertEqual((r.recibidas, r.aplicadas, r.descartadas, r.rechazadas), (0, 0, 0, []))
+        with self.assertRaises(ValueError):
+            self.svc.aplicar_lecturas(["A", "B"], [1.0], [7.0, 7.0], [1.0, 1.0], [0.0, 0.0])
+
+class TestApiLecturas(unittest.TestCase):
+    def setUp(self):
+        svc = PiletaService()
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        svc.registrar_pileta(Pileta("A", 10000, "1"))
+        self.est = EstadoApp(InventarioLocal(), svc)
+        patch = mock.patch.object(main, "obtener_estado", return_value=self.est)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.cliente = TestClient(main.app)
+
+    def test_post(self):
+        r = self.cliente.post("/api/lecturas", json={"lecturas": [["A", 10.0, 6.0, 5.0, 0.0], ["Z", 10.0, 7.0, 5.0, 0.0],
+                                                                  ["A", 5.0, 7.4, 5.0, 0.0]]})
+        self.assertEqual(r.status_code, 200)
+        cuerpo = r.json()
+        self.assertEqual((cuerpo["recibidas"], cuerpo["aplicadas"], cuerpo["descartadas"]), (3, 1, 1))
+        self.assertEqual(cuerpo["rechazadas"], [{"indice": 1, "motivo": "pileta desconocida"}])
+        self.assertEqual([e["id_pileta"] for e in cuerpo["reevaluadas"]], ["A"])
+        self.assertEqual(self.est.svc.piletas["A"].ph, 6.0)
+
+    def test_lote_demasiado_grande(self):
+        lecturas = [["A", 1.0, 7.0, 1.0, 0.0]] * (LECTURAS_MAX_POR_LOTE + 1)
+        self.assertEqual(self.cliente.post("/api/lecturas", json={"lecturas": lecturas}).status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# aqua_manager/tests/test_libro_stock.py
+# LibroStock: rotación de segmentos, reapertura con snapshot + cola y clientes registrados después de conectar
+import tempfile
+import unittest
+from pathlib import Path
+from AquaKeeper.entidades.modelo import Cliente, Stock
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.libro_stock import LibroStock, conectar_libro
+from AquaKeeper.servicios.pileta_service import PiletaService
+
+class TestLibroStock(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def cargar(self, libro, n, desde=0):
+        st = libro.stock("local")
+        for k in range(desde, desde + n):
+            st.disponer(f"sku{k % 3}", 1.0 + k)
+
+    def test_rotacion_de_segmentos(self):
+        libro = LibroStock(self.dir, snapshot_cada=1000, tam_segmento=4)
+        self.cargar(libro, 10)
+        libro.cerrar()
+        self.assertEqual(sorted(p.name for p in self.dir.glob("movimientos-*.jsonl")),
+                         [f"movimientos-{k:012d}.jsonl" for k in (0, 4, 8)])
+        self.assertEqual([m.seq for m in libro.movimientos(desde=3)], list(range(3, 10)))
+        self.assertEqual([m.delta for m in libro.movimientos(desde=5)], [1.0 + k for k in range(5, 10)])
+        # reabierto sin snapshot: aplica todo y sigue escribiendo en el último segmento hasta llenarlo
+        libro = LibroStock(self.dir, snapshot_cada=1000, tam_segmento=4)
+        self.assertEqual(libro.reaplicados, 10)
+        self.cargar(libro, 3, desde=10)
+        libro.cerrar()
+        self.assertEqual(len(list(self.dir.glob("movimientos-*.jsonl"))), 4)
+        self.assertEqual([m.seq for m in libro.movimientos()], list(range(13)))
+
+    def test_reabrir_con_snapshot_y_cola(self):
+        libro = LibroStock(self.dir, snapshot_cada=5, tam_segmento=3)
+        self.cargar(libro, 12)
+        libro.stock("local").descontar("sku0", 2.5)
+        libro.cerrar()
+        esperado = libro.reproducir()
+        self.assertEqual(sorted(p.name for p in self.dir.glob("snapshot-*.json")),
+                         ["snapshot-000000000005.json", "snapshot-000000000010.json"])
+        libro = LibroStock(self.dir, snapshot_cada=5, tam_segmento=3)
+        self.assertEqual(libro.reaplicados, 3)          # solo la cola posterior al snapshot de seq 10
+        self.assertEqual(len(libro), 13)
+        self.assertEqual(libro.estado, esperado)
+        self.assertEqual(libro.reproducir(hasta=5), {"local": {"sku0": 5.0, "sku1": 7.0, "sku2": 3.0}})
+        libro.cerrar()
+
+    def test_snapshot_danado_y_linea_cortada(self):
+        libro = LibroStock(self.dir, snapshot_cada=5, tam_segmento=3)
+        self.cargar(libro, 12)
+        libro.cerrar()
+        esperado = libro.reproducir(hasta=11)
+        (self.dir / "snapshot-000000000010.json").write_text('{"seq": 10, "est')
+        ultimo = self.dir / "movimientos-000000000009.jsonl"
+        ultimo.write_bytes(ultimo.read_bytes()[:-7])    # la última línea a medio escribir
+        libro = LibroStock(self.dir, snapshot_cada=5, tam_segmento=3)
+        self.assertEqual(libro.reaplicados, 6)          # desde el snapshot de seq 5
+        self.assertEqual(len(libro), 11)
+        self.assertEqual(libro.estado, esperado)
+        self.cargar(libro, 1, desde=11)
+        self.assertEqual([m.seq for m in libro.movimientos(desde=9)], [9, 10, 11])
+        libro.cerrar()
+
+    def test_clientes_registrados_despues_de_conectar(self):
+        libro = LibroStock(self.dir)
+        inv, svc = InventarioLocal(), PiletaService()
+        viejo = Cliente("1", "Ana", "Calle 1", Stock({"cloro-granulado": 10.0}))
+        svc.registrar_cliente(viejo)
+        conectar_libro(libro, inv, svc)
+        nuevo = Cliente("2", "Beto", "Calle 2", Stock({"clarificador": 4.0}))
+        svc.registrar_cliente(nuevo)
+        svc.tomar_cambios()
+        nuevo.stock.descontar("clarificador", 1.5)
+        viejo.stock.disponer("cloro-granulado", 5.0)
+        self.assertEqual(svc.tomar_cambios().clientes, ["2", "1"])     # sigue avisando a RegistroCambios
+        libro.cerrar()
+        libro = LibroStock(self.dir)
+        self.assertEqual(libro.reproducir(),
+                         {"cliente:1": {"cloro-granulado": 15.0}, "cliente:2": {"clarificador": 2.5}})
+        libro.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
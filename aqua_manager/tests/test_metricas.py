@@ -0,0 +1,109 @@
+# aqua_manager/tests/test_metricas.py
+# Instrumentación de métricas: activar/desactivar envuelve y restaura los métodos, las llamadas suman a los
+# histogramas y contadores, y /metrics (y el middleware por ruta) exponen el texto de Prometheus
+import unittest
+from fastapi.testclient import TestClient
+from AquaKeeper import metricas
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.patrones.strategy.dosificacion import EstrategiaMantenimiento, _EstrategiaPorLitros
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.web import main
+
+def cuenta(clase, metodo):
+    return metricas.registro.histograma("aquakeeper_servicio_segundos",
+                                        (("clase", clase), ("metodo", metodo))).leer()[2]
+
+class ConMetricas(unittest.TestCase):
+    def setUp(self):
+        estaban = metricas.activas()
+        metricas.desactivar()
+        metricas.registro.limpiar()
+        self.addCleanup(metricas.activar if estaban else metricas.desactivar)
+        self.addCleanup(metricas.registro.limpiar)
+
+class TestActivar(ConMetricas):
+    def test_envuelve_y_restaura(self):
+        original = PiletaService.__dict__["estado_agua_porcentual"]
+        original_dosis = _EstrategiaPorLitros.__dict__["calcular_dosis"]
+        metricas.activar()
+        self.assertTrue(metricas.activas())
+        self.assertIsNot(PiletaService.__dict__["estado_agua_porcentual"], original)
+        self.assertIs(PiletaService.__dict__["estado_agua_porcentual"].__wrapped__, original)
+        metricas.activar()                  # idempotente: no envuelve dos veces
+        self.assertIs(PiletaService.__dict__["estado_agua_porcentual"].__wrapped__, original)
+        metricas.desactivar()
+        self.assertFalse(metricas.activas())
+        self.assertIs(PiletaService.__dict__["estado_agua_porcentual"], original)
+        self.assertIs(_EstrategiaPorLitros.__dict__["calcular_dosis"], original_dosis)
+
+    def test_apagadas_no_miden(self):
+        svc = PiletaService()
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        svc.registrar_pileta(Pileta("A", 10000, "1"))
+        svc.estado_agua_porcentual(svc.piletas["A"])
+        self.assertEqual(cuenta("PiletaService", "estado_agua_porcentual"), 0)
+
+class TestConteos(ConMetricas):
+    def setUp(self):
+        super().setUp()
+        metricas.activar()
+        self.svc = PiletaService()
+        self.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        self.svc.registrar_pileta(Pileta("A", 10000, "1", ph=8.2))
+
+    def test_histogramas_por_clase_real(self):
+        for _ in range(3):
+            self.svc.estado_agua_porcentual(self.svc.piletas["A"])
+        EstrategiaMantenimiento().calcular_dosis(self.svc.piletas["A"])
+        self.assertEqual(cuenta("PiletaService", "estado_agua_porcentual"), 3)
+        # etiquetado con la clase concreta, no con _EstrategiaPorLitros que define el método
+        self.assertEqual(cuenta("EstrategiaMantenimiento", "calcular_dosis"), 1)
+        self.assertEqual(cuenta("_EstrategiaPorLitros", "calcular_dosis"), 0)
+        texto = metricas.texto_prometheus()
+        self.assertIn("aquakeeper_metricas_activas 1", texto)
+        self.assertIn("# TYPE aquakeeper_servicio_segundos histogram", texto)
+        self.assertIn('aquakeeper_servicio_segundos_count{clase="PiletaService",metodo="estado_agua_porcentual"} 3', texto)
+        self.assertIn('aquakeeper_servicio_segundos_bucket{clase="EstrategiaMantenimiento",metodo="calcular_dosis",le="+Inf"} 1', texto)
+
+    def test_errores(self):
+        inv = InventarioLocal()
+        with self.assertRaises(ValueError):
+            inv.descontar("cloro-granulado", 5.0)
+        texto = metricas.texto_prometheus()
+        self.assertIn("# TYPE aquakeeper_servicio_errores_total counter", texto)
+        self.assertIn('aquakeeper_servicio_errores_total{clase="InventarioLocal",metodo="descontar"} 1', texto)
+        self.assertIn('aquakeeper_servicio_segundos_count{clase="InventarioLocal",metodo="descontar"} 1', texto)
+
+class TestRutaMetrics(ConMetricas):
+    def test_texto_prometheus(self):
+        metricas.activar()
+        svc = PiletaService()
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        svc.registrar_pileta(Pileta("A", 10000, "1"))
+        svc.estado_agua_porcentual(svc.piletas["A"])
+        r = TestClient(main.app).get("/metrics")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        for nombre in ("aquakeeper_metricas_activas 1", "aquakeeper_servicio_segundos_bucket",
+                       "aquakeeper_servicio_segundos_sum", "aquakeeper_servicio_segundos_count",
+                       "# TYPE aquakeeper_arranque_segundos gauge"):
+            self.assertIn(nombre, r.text)
+
+    def test_apagadas(self):
+        r = TestClient(main.app).get("/metrics")
+        self.assertIn("aquakeeper_metricas_activas 0", r.text)
+        self.assertNotIn("aquakeeper_servicio_segundos", r.text)
+
+    def test_middleware_por_plantilla_de_ruta(self):
+        # main solo monta el middleware si AQUA_METRICAS estaba al importar; acá se envuelve la app a mano
+        cliente = TestClient(metricas.MiddlewareMetricas(main.app))
+        cliente.get("/metrics")
+        cliente.get("/no-existe")
+        cliente.get("/metrics")
+        texto = metricas.texto_prometheus()     # cada request se registra al terminar de responder
+        self.assertIn('aquakeeper_http_segundos_count{metodo="GET",ruta="/metrics",codigo="200"} 2', texto)
+        self.assertIn('aquakeeper_http_segundos_count{metodo="GET",ruta="<sin_ruta>",codigo="404"} 1', texto)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# aqua_manager/tests/test_observer.py
+# Despacho por lotes del Observable: coalescencia y errores de entrega (un lote fallido no corta a los
+# demás observadores ni el hilo, y no se reintenta)
+import threading
+import unittest
+from AquaKeeper.patrones.observer.observer import DespachoPorLotes, Observable, Observer
+
+class Junta(Observer[tuple]):
+    def __init__(self):
+        self.lotes = []
+
+    def actualizar_lote(self, valores):
+        self.lotes.append(list(valores))
+
+class Falla(Observer[tuple]):
+    def actualizar(self, valor):
+        raise RuntimeError("observador roto")
+
+class TestDespachoPorLotes(unittest.TestCase):
+    def test_coalesce_por_clave(self):
+        obs = Observable()
+        j = Junta()
+        obs.suscribir(j)
+        obs.activar_lotes(clave=lambda e: e[0])
+        for e in (("a", 1), ("b", 1), ("a", 2)):
+            obs.notificar(e)
+        self.assertEqual(obs.flush(), 2)
+        self.assertEqual(j.lotes, [[("a", 2), ("b", 1)]])
+
+    def test_observador_que_falla_no_corta_a_los_demas(self):
+        obs = Observable()
+        j = Junta()
+        obs.suscribir(Falla())
+        obs.suscribir(j)
+        obs.activar_lotes(clave=lambda e: e[0])
+        obs.notificar(("a", 1))
+        with self.assertLogs("AquaKeeper.patrones.observer.observer", level="ERROR") as log:
+            self.assertEqual(obs.flush(), 1)
+        self.assertIn("observador roto", log.output[0])
+        self.assertEqual(j.lotes, [[("a", 1)]])
+        # no queda nada para reintentar: los que recibieron el lote no lo vuelven a recibir
+        self.assertEqual((len(obs._despacho), obs.flush()), (0, 0))
+        obs.notificar(("b", 1))
+        with self.assertLogs("AquaKeeper.patrones.observer.observer", level="ERROR"):
+            self.assertEqual(obs.flush(), 1)
+        self.assertEqual(j.lotes, [[("a", 1)], [("b", 1)]])
+
+    def test_entrega_fallida_propaga_y_descarta_el_lote(self):
+        entregados = []
+        fallar = [True]
+
+        def entregar(lote):
+            if fallar[0]:
+                d.encolar(("a", 9))         # llega algo nuevo mientras se entrega
+                raise RuntimeError("caído")
+            entregados.append(lote)
+
+        d = DespachoPorLotes(lambda e: e[0], entregar)
+        d.encolar(("a", 1))
+        d.encolar(("b", 1))
+        with self.assertRaises(RuntimeError):
+            d.flush()
+        self.assertEqual(len(d), 1)         # solo lo encolado durante la entrega
+        fallar[0] = False
+        self.assertEqual(d.flush(), 1)
+        self.assertEqual(entregados, [[("a", 9)]])
+
+    def test_hilo_sobrevive_a_errores(self):
+        entregados = []
+        intentos = [0]
+        fallo, listo = threading.Event(), threading.Event()
+
+        def entregar(lote):
+            intentos[0] += 1
+            if intentos[0] == 1:
+                fallo.set()
+                raise RuntimeError("caído")
+            entregados.append(lote)
+            listo.set()
+
+        d = DespachoPorLotes(lambda e: e, entregar, intervalo=0.01)
+        d.encolar("x")
+        with self.assertLogs("AquaKeeper.patrones.observer.observer", level="ERROR"):
+            d.iniciar()
+            self.assertTrue(fallo.wait(2.0))
+            d.encolar("y")              # "x" se descartó; el hilo sigue con lo siguiente
+            self.assertTrue(listo.wait(2.0))
+        d.detener()
+        self.assertEqual(entregados, [["y"]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# aqua_manager/tests/test_paginacion.py
+# Paginación por cursor de piletas (pagina_piletas y GET /api/piletas): filtros contra fuerza bruta,
+# altas durante la lectura y fields=
+import itertools
+import random
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService, alertas_pileta
+from AquaKeeper.web import main
+from AquaKeeper.web.estado import EstadoApp
+
+CLIENTES = ("111", "222", "333")
+
+def flota_al_azar(n: int, semilla: int = 0) -> PiletaService:
+    rng = random.Random(semilla)
+    svc = PiletaService()
+    for dni in CLIENTES:
+        svc.registrar_cliente(Cliente(dni, f"Cliente {dni}", "Calle 1"))
+    for i in range(n):
+        svc.registrar_pileta(Pileta(f"P{i}", rng.choice((8000, 12000, 25000.5, 45000)), rng.choice(CLIENTES),
+                                    ph=rng.choice((7.4, 6.5)), turbidez=rng.choice((5.0, 35.0)),
+                                    algas=rng.choice((0.0, 0.0, 0.8))))
+    return svc
+
+def cumple(p, cliente_dni, litros_min, litros_max, alerta) -> bool:
+    alertas = alertas_pileta(p)
+    return ((cliente_dni is None or p.cliente_dni == cliente_dni)
+            and (litros_min is None or p.litros >= litros_min)
+            and (litros_max is None or p.litros <= litros_max)
+            and (alerta is None or (alerta == "alguna" and bool(alertas)) or (alerta == "ninguna" and not alertas)
+                 or alerta in alertas))
+
+def recorrer(svc, limite, desde=-1, **filtros):
+    vistos, paginas = [], 0
+    while True:
+        piletas, siguiente = svc.pagina_piletas(desde, limite, **filtros)
+        vistos += [p.id_pileta for p in piletas]
+        paginas += 1
+        if siguiente is None:
+            return vistos, paginas
+        desde = siguiente
+
+class TestPaginaPiletas(unittest.TestCase):
+    def setUp(self):
+        self.svc = flota_al_azar(300)
+        # re-registrar con otro cliente y volumen no cambia la fila (ni el orden)
+        self.svc.registrar_pileta(Pileta("P7", 45000, "333", algas=0.9))
+        self.svc.actualizar_lectura("P8", ph=6.0)
+
+    def test_filtros_contra_fuerza_bruta(self):
+        combinaciones = itertools.product((None, "111", "999"), (None, 12000), (None, 25000.5),
+                                          (None, "ph", "turbidez", "algas", "alguna", "ninguna"))
+        for dni, lmin, lmax, alerta in combinaciones:
+            filtros = dict(cliente_dni=dni, litros_min=lmin, litros_max=lmax, alerta=alerta)
+            with self.subTest(**filtros):
+                esperado = [p.id_pileta for p in self.svc.piletas.values() if cumple(p, **filtros)]
+                for limite in (1, 7, 1000):
+                    vistos, paginas = recorrer(self.svc, limite, **filtros)
+                    self.assertEqual(vistos, esperado)
+                    self.assertEqual(paginas, max(1, -(-len(esperado) // limite)))
+
+    def test_altas_durante_la_lectura(self):
+        svc = self.svc
+        primera, desde = svc.pagina_piletas(limite=50, cliente_dni="222")
+        self.assertIsNotNone(desde)
+        for i in range(300, 350):
+            svc.registrar_pileta(Pileta(f"P{i}", 10000, "222"))
+        resto, _ = recorrer(svc, 100, desde, cliente_dni="222")
+        ids = [p.id_pileta for p in primera] + resto
+        self.assertEqual(ids, [p.id_pileta for p in svc.piletas.values() if p.cliente_dni == "222"])
+        self.assertEqual(ids[-50:], [f"P{i}" for i in range(300, 350)])
+
+    def test_argumentos_invalidos(self):
+        with self.assertRaises(ValueError):
+            self.svc.pagina_piletas(limite=0)
+        with self.assertRaisesRegex(ValueError, "cloro"):
+            self.svc.pagina_piletas(alerta="cloro")
+        self.assertEqual(self.svc.pagina_piletas(desde=10_000), ([], None))
+
+class TestApiPiletas(unittest.TestCase):
+    def setUp(self):
+        self.est = EstadoApp(InventarioLocal(), flota_al_azar(40))
+        patch = mock.patch.object(main, "obtener_estado", return_value=self.est)
+        patch.start()
+        self.addCleanup(patch.stop)
+        main._cache.limpiar()
+        self.addCleanup(main._cache.limpiar)
+        self.cliente = TestClient(main.app)
+
+    def test_cursor_y_fields(self):
+        ids, cursor = [], None
+        while True:
+            params = {"limite": 15, "cliente_dni": "111", "fields": "id_pileta, litros,id_pileta"}
+            if cursor is not None:
+                params["cursor"] = cursor
+            r = self.cliente.get("/api/piletas", params=params)
+            self.assertEqual(r.status_code, 200)
+            cuerpo = r.json()
+            self.assertTrue(all(list(it) == ["id_pileta", "litros"] for it in cuerpo["items"]))
+            ids += [it["id_pileta"] for it in cuerpo["items"]]
+            cursor = cuerpo["siguiente"]
+            if cursor is None:
+                break
+            self.assertIsInstance(cursor, str)
+        self.assertEqual(ids, [p.id_pileta for p in self.est.svc.piletas.values() if p.cliente_dni == "111"])
+        completo = self.cliente.get("/api/piletas", params={"limite": 1}).json()["items"][0]
+        self.assertEqual(list(completo), list(main.PiletaOut.model_fields))
+
+    def test_errores(self):
+        for params in ({"cursor": "abc"}, {"cursor": "-2"}, {"fields": "id_pileta,color"}, {"fields": ","},
+                       {"alerta": "cloro"}):
+            with self.subTest(**params):
+                self.assertEqual(self.cliente.get("/api/piletas", params=params).status_code, 400)
+        self.assertEqual(self.cliente.get("/api/piletas", params={"limite": 0}).status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# aqua_manager/tests/test_registro.py
+# AlmacenRegistros: lectura del último, recuperación de una cola cortada y altas de otro proceso
+import multiprocessing
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from AquaKeeper.servicios import registro_service
+from AquaKeeper.servicios.registro_service import AlmacenRegistros, RegistroOperacion
+
+def _agregar_en_otro_proceso(base: str, nombre: str, n: int) -> None:
+    alm = AlmacenRegistros(Path(base))
+    for k in range(n):
+        alm.agregar(nombre, RegistroOperacion(f"{nombre}{k}", {"k": k}))
+    alm.cerrar()
+
+class TestAlmacenRegistros(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_leer_ultimo_e_historial(self):
+        alm = AlmacenRegistros(self.base, codec="zlib")
+        alm.agregar("a", RegistroOperacion("a1", {}), ts=1.0)
+        alm.agregar("b", RegistroOperacion("b1", {}), ts=2.0)
+        alm.agregar("a", RegistroOperacion("a2", {"x": 1}), ts=3.0)
+        self.assertEqual(alm.leer_ultimo("a"), RegistroOperacion("a2", {"x": 1}))
+        self.assertEqual([r.descripcion for _, r in alm.historial("a", desde=0.5, hasta=2.5)], ["a1"])
+        self.assertIsNone(alm.leer_ultimo("z"))
+        alm.cerrar()
+
+    def test_cola_cortada_se_recorta_al_abrir(self):
+        alm = AlmacenRegistros(self.base)
+        alm.agregar("a", RegistroOperacion("a1", {}))
+        alm.agregar("a", RegistroOperacion("a2", {}))
+        alm.cerrar()
+        # corte a mitad del último registro (y su línea del índice)
+        log, idx = self.base / "registros.log", self.base / "registros.idx"
+        os.truncate(log, log.stat().st_size - 3)
+        os.truncate(idx, idx.stat().st_size - 5)
+        alm = AlmacenRegistros(self.base)
+        self.assertEqual(alm.leer_ultimo("a").descripcion, "a1")
+        alm.agregar("a", RegistroOperacion("a3", {}))
+        alm.cerrar()
+        alm = AlmacenRegistros(self.base)
+        self.assertEqual([r.descripcion for _, r in alm.historial("a")], ["a1", "a3"])
+        alm.cerrar()
+
+    def test_registro_sin_indice_se_reindexa(self):
+        alm = AlmacenRegistros(self.base)
+        alm.agregar("a", RegistroOperacion("a1", {}))
+        alm.agregar("a", RegistroOperacion("a2", {}))
+        alm.cerrar()
+        idx = self.base / "registros.idx"
+        lineas = idx.read_bytes().splitlines(keepends=True)
+        idx.write_bytes(lineas[0])            # el proceso murió antes de escribir el índice
+        alm = AlmacenRegistros(self.base)
+        self.assertEqual(alm.leer_ultimo("a").descripcion, "a2")
+        alm.cerrar()
+
+    def test_se_pone_al_dia_con_otro_proceso(self):
+        alm = AlmacenRegistros(self.base)
+        alm.agregar("yo", RegistroOperacion("yo0", {}))
+        p = multiprocessing.get_context("spawn").Process(target=_agregar_en_otro_proceso,
+                                                         args=(str(self.base), "otro", 20))
+        p.start()
+        p.join(30)
+        self.assertEqual(p.exitcode, 0)
+        self.assertEqual(alm.leer_ultimo("otro").descripcion, "otro19")
+        alm.agregar("yo", RegistroOperacion("yo1", {}))
+        self.assertEqual(len(alm.historial("otro")), 20)
+        self.assertEqual([r.descripcion for _, r in alm.historial("yo")], ["yo0", "yo1"])
+        alm.cerrar()
+
+    def test_sin_fcntl_funciona_en_un_proceso(self):
+        with mock.patch.object(registro_service, "fcntl", None), mock.patch.object(registro_service, "msvcrt", None):
+            alm = AlmacenRegistros(self.base)
+            alm.agregar("a", RegistroOperacion("a1", {}))
+            self.assertEqual(alm.leer_ultimo("a").descripcion, "a1")
+            alm.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+# aqua_manager/tests/test_repositorios.py
+# Repositorios SQLite (upsert en lote, lectura en streaming, consultas por índice) y volcado/carga
+# completa de InventarioLocal + PiletaService
+import tempfile
+import unittest
+from pathlib import Path
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto, Stock, Visita
+from AquaKeeper.patrones.strategy.dosificacion import EstrategiaChoque
+from AquaKeeper.persistencia.repositorios import RepositoriosSQLite, cargar_servicios, volcar_servicios
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+
+class BaseTemporal(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self._tmp.name) / "aqua.db")
+        self.repos = RepositoriosSQLite(self.ruta, tam_lote=2)     # lotes chicos: varias vueltas de fetchmany
+
+    def tearDown(self):
+        self.repos.cerrar()
+        self._tmp.cleanup()
+
+class TestRepositorios(BaseTemporal):
+    def test_productos(self):
+        r = self.repos.productos
+        self.assertEqual(r.guardar_lote([Producto("CL-5", "Cloro 5kg", "cloro-granulado", "g", "5kg", 7.5),
+                                         Producto("AL", "Alguicida", "alguicida", "ml"),
+                                         Producto("CL-1", "Cloro 1kg", "cloro-granulado", "g", "1kg", 9.0)]), 3)
+        r.guardar(Producto("AL", "Alguicida 1L", "alguicida", "ml", "1L", 4.0))
+        self.assertEqual(len(r), 3)
+        self.assertEqual(r.obtener("AL"), Producto("AL", "Alguicida 1L", "alguicida", "ml", "1L", 4.0))
+        self.assertIsNone(r.obtener("X"))
+        self.assertEqual([p.sku for p in r.iterar()], ["AL", "CL-1", "CL-5"])
+        self.assertEqual([p.sku for p in r.de_tipo("cloro-granulado")], ["CL-1", "CL-5"])
+        self.assertEqual(list(r.de_tipo("antisarro")), [])
+
+    def test_stock_reemplaza_por_duenio(self):
+        r = self.repos.stock
+        r.guardar_lote([("local", Stock({"CL": 10.0, "AL": 2.5})), ("cliente:1", Stock({"CL": 1.0}))])
+        r.guardar(("local", Stock({"CL": 8.0})))           # AL ya no está
+        self.assertEqual(r.obtener("local"), ("local", Stock({"CL": 8.0})))
+        self.assertIsNone(r.obtener("cliente:9"))
+        self.assertEqual(list(r.iterar()), [("cliente:1", Stock({"CL": 1.0})), ("local", Stock({"CL": 8.0}))])
+        self.assertEqual(list(r.por_sku("CL")), [("cliente:1", 1.0), ("local", 8.0)])
+        self.assertEqual(len(r), 2)
+
+    def test_clientes_con_su_stock(self):
+        r = self.repos.clientes
+        ana = Cliente("1", "Ana", "Calle 1", Stock({"CL": 3.0, "AL": 1.0, "CA": 2.0}))
+        r.guardar_lote([ana, Cliente("2", "Beto", "Calle 2"), Cliente("3", "Caro", "Calle 3", Stock({"CL": 5.0}))])
+        self.assertEqual(r.obtener("1"), ana)
+        self.assertEqual(r.obtener("2"), Cliente("2", "Beto", "Calle 2"))
+        r.guardar(Cliente("1", "Ana María", "Calle 9", Stock({"CL": 1.0})))
+        self.assertEqual(list(r.iterar()), [Cliente("1", "Ana María", "Calle 9", Stock({"CL": 1.0})),
+                                            Cliente("2", "Beto", "Calle 2"),
+                                            Cliente("3", "Caro", "Calle 3", Stock({"CL": 5.0}))])
+        self.assertEqual((len(r), len(self.repos.stock)), (3, 2))
+
+    def test_piletas(self):
+        r = self.repos.piletas
+        piletas = [Pileta(f"P{i}", 10000 + i / 2, str(i % 3), ph=7.0 + i / 10) for i in range(7)]
+        self.assertEqual(r.guardar_lote(piletas, [float(i) for i in range(7)]), 7)
+        # sin ts: el upsert conserva el de la última lectura
+        r.guardar(Pileta("P3", 30000.5, "9", algas=0.7))
+        self.assertEqual(r.obtener("P3"), Pileta("P3", 30000.5, "9", algas=0.7))
+        self.assertIsNone(r.obtener("X"))
+        self.assertEqual(dict((p.id_pileta, ts) for p, ts in r.iterar_con_lectura())["P3"], 3.0)
+        self.assertEqual([p.id_pileta for p in r.de_cliente("1")], ["P1", "P4"])
+        self.assertEqual(len(list(r.iterar())), len(r))
+
+    def test_importar_recrea_los_indices(self):
+        con = self.repos.conexiones.conexion()
+        indices = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'piletas' ORDER BY name"
+        antes = con.execute(indices).fetchall()
+        self.assertEqual(self.repos.piletas.importar(Pileta(f"P{i}", 10000, str(i % 2)) for i in range(5)), 5)
+        self.assertEqual(con.execute(indices).fetchall(), antes)
+        self.assertEqual([p.id_pileta for p in self.repos.piletas.de_cliente("0")], ["P0", "P2", "P4"])
+
+    def test_visitas_append_only(self):
+        r = self.repos.visitas
+        r.guardar_lote([Visita("A", "choque", False, "uno"), Visita("B", "mantenimiento", True, "dos")])
+        r.guardar(Visita("A", "alguicida", True, "tres"))
+        self.assertEqual(len(r), 3)
+        self.assertEqual(r.obtener(0), Visita("A", "choque", False, "uno"))
+        self.assertIsNone(r.obtener(3))
+        self.assertEqual([v.observacion for v in r.de_pileta("A")], ["uno", "tres"])
+        self.assertEqual([v.observacion for v in r.iterar()], ["uno", "dos", "tres"])
+
+    def test_transaccion_agrupa_varios_repositorios(self):
+        with self.assertRaises(RuntimeError):
+            with self.repos.transaccion():
+                self.repos.clientes.guardar(Cliente("1", "Ana", "Calle 1"))
+                self.repos.piletas.guardar(Pileta("P1", 10000, "1"))
+                raise RuntimeError("falla a mitad")
+        self.assertEqual((len(self.repos.clientes), len(self.repos.piletas)), (0, 0))
+
+    def test_tam_lote_invalido(self):
+        with self.assertRaises(ValueError):
+            RepositoriosSQLite(self.ruta, tam_lote=0)
+
+class TestVolcarCargar(BaseTemporal):
+    def servicios(self):
+        inv, svc = InventarioLocal(), PiletaService()
+        inv.registrar_producto(Producto("CL", "Cloro", "cloro-granulado", "g", precio=8.0), 500.0)
+        inv.registrar_producto(Producto("CLA", "Clarificador", "clarificador", "ml"), 20.0)
+        inv.reponer("SUELTO", 3.0)                         # stock de un SKU sin producto registrado
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1", Stock({"cloro-granulado": 100.0})))
+        svc.registrar_cliente(Cliente("2", "Beto", "Calle 2"))
+        for i in range(5):
+            svc.registrar_pileta(Pileta(f"P{i}", 12000.5 + i, str(i % 2 + 1)))
+        svc.aplicar_lecturas(["P1", "P3"], [1e9, 2e9], [6.5, 7.4], [40.0, 5.0], [0.9, 0.0])
+        svc.evaluar_visita("P1", "choque", EstrategiaChoque())
+        return inv, svc
+
+    def recargar(self):
+        repos = RepositoriosSQLite(self.ruta)
+        inv, svc = InventarioLocal(), PiletaService()
+        cargar_servicios(repos, inv, svc)
+        repos.cerrar()
+        return inv, svc
+
+    def test_ida_y_vuelta(self):
+        inv, svc = self.servicios()
+        volcar_servicios(self.repos, inv, svc)
+        inv2, svc2 = self.recargar()
+        self.assertEqual(inv2.productos, inv.productos)
+        self.assertEqual(inv2.stock, inv.stock)
+        self.assertEqual(inv2.skus_de_tipo("cloro-granulado"), ["CL"])
+        self.assertEqual(svc2.clientes, svc.clientes)
+        self.assertEqual(svc2.piletas, svc.piletas)
+        self.assertEqual(list(svc2.piletas), list(svc.piletas))
+        self.assertEqual(svc2.flota.ts_lectura[:5].tolist(), svc.flota.ts_lectura[:5].tolist())
+        self.assertEqual(svc2.flota.litros[:5].tolist(), [12000.5 + i for i in range(5)])
+        self.assertEqual(svc2.piletas_en_alerta("algas"), [svc2.piletas["P1"]])
+        self.assertEqual(list(svc2.visitas), list(svc.visitas))
+        self.assertEqual(len(svc2.tomar_cambios(inv2.version)), 0)      # lo cargado no queda pendiente
+
+    def test_volcar_de_nuevo_solo_agrega_visitas_nuevas(self):
+        inv, svc = self.servicios()
+        volcar_servicios(self.repos, inv, svc)
+        svc.evaluar_visita("P3", "choque", EstrategiaChoque())
+        volcar_servicios(self.repos, inv, svc)
+        self.assertEqual(len(self.repos.visitas), 2)
+        self.assertEqual(list(self.repos.visitas.iterar()), list(svc.visitas))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+# aqua_manager/tests/test_series.py
+# SeriesLecturas: resúmenes hora/día al ingresar, retención de los puntos crudos y escritura por turnos
+# fuera del lock de PiletaService
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from pathlib import Path
+import numpy as np
+from AquaKeeper.entidades.modelo import Cliente, Pileta
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.servicios.series_lecturas import SeriesLecturas, mes_de, promedio, resumir
+
+DIA = 86400.0
+T0 = 1_700_000_000.0            # 2023-11-14 22:13:20 UTC
+
+def lote(ids, ts, k=0.0):
+    n = len(ts)
+    return ids, ts, [7.0 + k] * n, [10.0 + k] * n, [0.1] * n
+
+class TestSeriesLecturas(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resumenes_iguales_a_resumir_lo_crudo(self):
+        s = SeriesLecturas(self.dir, retencion_cruda_s=None)
+        rng = np.random.default_rng(0)
+        ts = np.sort(T0 + rng.uniform(0, 3 * DIA, 600))
+        ph = rng.uniform(6.8, 8.0, 600)
+        # en varios lotes: la última cubeta de cada archivo se combina con lo nuevo
+        for a, b in ((0, 150), (150, 151), (151, 600)):
+            s.agregar_lote(["A"] * (b - a), ts[a:b], ph[a:b], [12.0] * (b - a), [0.2] * (b - a))
+        crudo = np.concatenate(s.rango("A", T0, T0 + 4 * DIA))
+        self.assertEqual(len(crudo), 600)
+        for nivel, paso in (("hora", 3600), ("dia", 86400)):
+            esperado = resumir(crudo, paso)
+            obtenido = np.concatenate(s.rango("A", T0, T0 + 4 * DIA, nivel))
+            np.testing.assert_array_equal(obtenido["ts"], esperado["ts"])
+            np.testing.assert_array_equal(obtenido["n"], esperado["n"])
+            np.testing.assert_array_equal(obtenido["ph_min"], esperado["ph_min"])
+            np.testing.assert_array_equal(obtenido["ph_max"], esperado["ph_max"])
+            np.testing.assert_allclose(promedio(obtenido, "ph"), promedio(esperado, "ph"))
+
+    def test_estado_del_resumen_igual_al_de_la_lectura(self):
+        # en float32 turbidez y algas quedan en el umbral (sin alerta); el % sale de los valores recibidos
+        s = SeriesLecturas(self.dir, retencion_cruda_s=None)
+        svc = PiletaService()
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        svc.registrar_pileta(Pileta("A", 10000, "1", ph=7.4, turbidez=30.000001, algas=0.50000001))
+        vivo = svc.estado_agua_porcentual(svc.piletas["A"])
+        self.assertEqual(vivo, 25.0)
+        s.agregar_lote(["A", "A"], [T0, T0 + 1], [7.4, 7.4], [30.000001, 5.0], [0.50000001, 0.0])
+        for nivel in ("hora", "dia"):
+            r = np.concatenate(s.rango("A", T0, T0 + 1, nivel))
+            self.assertEqual((r["estado_min"][0], r["estado_max"][0], r["estado_suma"][0]), (vivo, 100.0, vivo + 100.0))
+
+    def test_reenviar_un_lote_no_duplica(self):
+        s = SeriesLecturas(self.dir, retencion_cruda_s=None)
+        self.assertEqual(s.agregar_lote(*lote(["A", "A"], [T0, T0 + 1])), (2, 0))
+        self.assertEqual(s.agregar_lote(*lote(["A", "A"], [T0, T0 + 1])), (0, 2))
+        self.assertEqual(int(np.concatenate(s.rango("A", T0, T0 + 1, "hora"))["n"].sum()), 2)
+
+    def test_ingesta_no_retiene(self):
+        s = SeriesLecturas(self.dir, retencion_cruda_s=30 * DIA)
+        viejo = T0 - 200 * DIA
+        s.agregar_lote(*lote(["A"], [viejo]))         # carga retroactiva de un mes vencido
+        s.agregar_lote(*lote(["A"], [T0]))            # y un mes nuevo
+        self.assertEqual(len(s.meses("A")), 2)
+
+    def test_retener_borra_solo_crudos_resumidos(self):
+        s = SeriesLecturas(self.dir, retencion_cruda_s=30 * DIA)
+        viejo = T0 - 200 * DIA
+        s.agregar_lote(*lote(["A", "B", "A"], [viejo, viejo, T0]))
+        # a B le falta el resumen por día (p. ej. se cortó entre los crudos y los resúmenes)
+        mes_b = s.meses("B")[0]
+        (self.dir / "B" / f"{mes_b}.dia.bin").unlink()
+        self.assertEqual(s.retener(ahora=T0), 1)
+        self.assertEqual(s.meses("A"), [str(np.datetime64(int(mes_de(T0)), "M"))])
+        self.assertEqual(len(s.meses("A", "hora")), 2)
+        self.assertEqual(s.meses("B"), [mes_b])
+        # con los crudos borrados, la consulta antigua va por hora
+        nivel, vistas = s.serie("A", viejo - 1, T0, paso=60)
+        self.assertEqual(nivel, "hora")
+        self.assertEqual(sum(len(v) for v in vistas), 2)
+        # un mes ya retenido no se vuelve a abrir
+        self.assertEqual(s.agregar_lote(*lote(["A"], [viejo + 10])), (0, 1))
+
+    def test_sin_retencion(self):
+        s = SeriesLecturas(self.dir, retencion_cruda_s=None)
+        s.agregar_lote(*lote(["A"], [T0 - 400 * DIA]))
+        self.assertEqual(s.retener(ahora=T0), 0)
+
+class TestIngestaConHistorial(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.series = SeriesLecturas(Path(self._tmp.name), retencion_cruda_s=None)
+        self.svc = PiletaService(series=self.series)
+        self.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        self.svc.registrar_pileta(Pileta("A", 10000, "1"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_escribe_sin_el_lock_del_servicio(self):
+        libre = []
+        escribir = self.series._agregar_lote
+
+        def leer():
+            if self.svc.lock.acquire(timeout=5):
+                self.svc.lock.release()
+                libre.append(True)
+
+        def espiar(*args):
+            # otro hilo (un lector del servicio) consigue el lock mientras se escribe el historial
+            t = threading.Thread(target=leer)
+            t.start()
+            t.join()
+            return escribir(*args)
+
+        with mock.patch.object(self.series, "_agregar_lote", side_effect=espiar):
+            r = self.svc.aplicar_lecturas(["A", "X"], [T0, T0], [7.0, 7.0], [5.0, 5.0], [0.1, 0.1])
+        self.assertEqual((libre, r.aplicadas), ([True], 1))
+        self.assertEqual(len(np.concatenate(self.series.rango("A", T0, T0))), 1)   # solo las válidas
+
+    def test_los_turnos_respetan_el_orden_de_los_lotes(self):
+        t1, t2 = self.series.turno(), self.series.turno()
+        # el lote más nuevo llega primero: espera a que se escriba el anterior
+        hilo = threading.Thread(target=self.series.agregar_lote, args=lote(["A"], [T0 + 10]), kwargs={"turno": t2})
+        hilo.start()
+        hilo.join(0.2)
+        self.assertTrue(hilo.is_alive())
+        self.assertEqual(self.series.meses("A"), [])
+        self.assertEqual(self.series.agregar_lote(*lote(["A"], [T0]), turno=t1), (1, 0))
+        hilo.join()
+        self.assertEqual(np.concatenate(self.series.rango("A", T0, T0 + 10))["ts"].tolist(), [T0, T0 + 10])
+
+    def test_un_lote_que_falla_no_traba_los_siguientes(self):
+        with self.assertRaises(ValueError):
+            self.series.agregar_lote(["A"], [T0, T0 + 1], [7.0], [5.0], [0.1])
+        self.assertEqual(self.series.agregar_lote(*lote(["A"], [T0])), (1, 0))
+
+if __name__ == "__main__":
+    unittest.main()
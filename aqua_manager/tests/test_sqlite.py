@@ -0,0 +1,96 @@
+# aqua_manager/tests/test_sqlite.py
+# Backend SQLite: dos workers (almacén + servicios propios) sobre la misma base ven lo que escribe el otro
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto, Stock
+from AquaKeeper.persistencia.sqlite import AlmacenSQLite
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+
+class Worker:
+    def __init__(self, ruta: str):
+        self.alm = AlmacenSQLite(ruta)
+        self.inv = InventarioLocal(almacen=self.alm)
+        self.svc = PiletaService(almacen=self.alm)
+
+    def sincronizar(self) -> bool:
+        return self.alm.sincronizar(self.inv, self.svc)
+
+class TestDosWorkers(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        ruta = str(Path(self._tmp.name) / "aqua.sqlite3")
+        self.a, self.b = Worker(ruta), Worker(ruta)
+
+    def tearDown(self):
+        for w in (self.a, self.b):
+            w.alm.conexiones.cerrar()
+        self._tmp.cleanup()
+
+    def test_escribe_uno_lee_el_otro(self):
+        a, b = self.a, self.b
+        a.inv.registrar_producto(Producto("CL-1", "Cloro", "cloro-granulado", "g"), cantidad_inicial=500.0)
+        a.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        a.svc.registrar_pileta(Pileta("P1", 12500.5, "1"))
+        self.assertTrue(b.sincronizar())
+        self.assertEqual(b.inv.productos["CL-1"].nombre, "Cloro")
+        self.assertEqual(b.inv.stock.disponible("CL-1"), 500.0)
+        self.assertEqual(b.svc.piletas["P1"], Pileta("P1", 12500.5, "1"))     # litros no enteros tal cual
+        self.assertEqual(b.svc.flota.litros.tolist(), [12500.5])
+
+        # lecturas y stock en b: a los ve al sincronizar (el stock se lee directo de la base)
+        b.svc.aplicar_lecturas(["P1"], [1e9], [6.5], [30.0], [0.8])
+        b.svc.clientes["1"].stock.disponer("cloro-granulado", 40.0)
+        self.assertTrue(a.sincronizar())
+        p = a.svc.piletas["P1"]
+        self.assertEqual((p.ph, p.turbidez, p.algas), (6.5, 30.0, 0.8))
+        self.assertEqual(a.svc.piletas_en_alerta("algas"), [p])
+        self.assertEqual(a.svc.clientes["1"].stock.disponible("cloro-granulado"), 40.0)
+
+    def test_no_relee_lo_escrito_por_el_mismo_worker(self):
+        a, b = self.a, self.b
+        a.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        for i in range(20):
+            a.svc.registrar_pileta(Pileta(f"P{i}", 10000, "1"))
+        a.svc.aplicar_lecturas([f"P{i}" for i in range(20)], [1e9] * 20, [7.0] * 20, [5.0] * 20, [0.1] * 20)
+        with mock.patch.object(a.svc, "cargar_pileta") as cargar:
+            self.assertFalse(a.sincronizar())
+            cargar.assert_not_called()
+        self.assertEqual(a.alm.conexiones.propias(0, a.alm.version()), set())   # ya cubiertas por la marca
+
+        # cambios mezclados: de a solo se aplica la fila que escribió b
+        b.sincronizar()
+        b.svc.actualizar_lectura("P3", ph=6.0)
+        a.svc.actualizar_lectura("P4", ph=8.5)
+        with mock.patch.object(a.svc, "cargar_pileta", wraps=a.svc.cargar_pileta) as cargar:
+            self.assertTrue(a.sincronizar())
+            self.assertEqual([c.args[0].id_pileta for c in cargar.call_args_list], ["P3"])
+        self.assertEqual((a.svc.piletas["P3"].ph, a.svc.piletas["P4"].ph), (6.0, 8.5))
+
+    def test_re_registrar_cliente_reemplaza_su_stock(self):
+        a, b = self.a, self.b
+        a.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1", Stock({"cloro-granulado": 10.0, "alguicida": 3.0})))
+        a.svc.registrar_cliente(Cliente("1", "Ana", "Calle 2", Stock({"clarificador": 4.0})))
+        self.assertEqual(a.svc.clientes["1"].stock.cantidades, {"clarificador": 4.0})
+        self.assertEqual(a.svc.clientes["1"].stock.disponible("cloro-granulado"), 0.0)
+        b.sincronizar()
+        self.assertEqual((b.svc.clientes["1"].direccion, b.svc.clientes["1"].stock.cantidades),
+                         ("Calle 2", {"clarificador": 4.0}))
+        # con el stock de la base (p. ej. el mismo objeto) no se toca lo guardado
+        a.svc.registrar_cliente(a.svc.clientes["1"])
+        self.assertEqual(a.svc.clientes["1"].stock.cantidades, {"clarificador": 4.0})
+
+    def test_transaccion_revertida_no_queda_como_propia(self):
+        a = self.a
+        antes = a.alm.version()
+        with self.assertRaises(RuntimeError):
+            with a.alm.transaccion():
+                a.svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+                raise RuntimeError("falla a mitad")
+        self.assertEqual(a.alm.version(), antes)
+        self.assertEqual(a.alm.conexiones.propias(0, antes + 10), set())
+
+if __name__ == "__main__":
+    unittest.main()
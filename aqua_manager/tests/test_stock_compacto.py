@@ -0,0 +1,85 @@
+# aqua_manager/tests/test_stock_compacto.py
+# StockCompacto (filas de una MatrizStock) con la misma API y resultados que Stock, crecimiento de la
+# matriz y submatriz de solo lectura
+import random
+import unittest
+from AquaKeeper.config.constantes import TIPOS_PRODUCTO
+from AquaKeeper.entidades.modelo import MatrizStock, Stock
+
+class TestParidadConStock(unittest.TestCase):
+    def test_movimientos_al_azar(self):
+        rng = random.Random(0)
+        matriz = MatrizStock(filas_iniciales=1)
+        skus = list(TIPOS_PRODUCTO) + ["CL-1", "CL-5", "AL-1"]
+        pares = [(Stock(), matriz.nuevo_stock()) for _ in range(6)]
+        for _ in range(2000):
+            st, comp = rng.choice(pares)
+            sku = rng.choice(skus)
+            cant = float(rng.randrange(0, 20))
+            if rng.random() < 0.5:
+                st.disponer(sku, cant)
+                comp.disponer(sku, cant)
+            else:
+                errores = []
+                for s in (st, comp):
+                    try:
+                        s.descontar(sku, cant)
+                    except ValueError as e:
+                        errores.append(str(e))
+                self.assertIn(len(errores), (0, 2))         # fallan los dos (con el mismo mensaje) o ninguno
+                if errores:
+                    self.assertEqual(errores[0], errores[1])
+            self.assertEqual(comp.disponible(sku), st.disponible(sku))
+        for st, comp in pares:
+            self.assertEqual(comp.cantidades, st.cantidades)
+            self.assertEqual(comp.disponible("nunca-usado"), 0.0)
+
+    def test_descontar_hasta_cero_conserva_la_clave(self):
+        st, comp = Stock(), MatrizStock().nuevo_stock()
+        for s in (st, comp):
+            s.disponer("cloro-granulado", 5.0)
+            s.descontar("cloro-granulado", 5.0)
+            s.descontar("clarificador", 0.0)
+        self.assertEqual(comp.cantidades, {"cloro-granulado": 0.0, "clarificador": 0.0})
+        self.assertEqual(comp.cantidades, st.cantidades)
+        self.assertEqual(MatrizStock().nuevo_stock().cantidades, {})
+
+    def test_al_cambiar(self):
+        llamadas = []
+        comp = MatrizStock().nuevo_stock()
+        comp.al_cambiar = lambda: llamadas.append(1)
+        comp.disponer("antisarro", 2.0)
+        comp.descontar("antisarro", 1.0)
+        with self.assertRaises(ValueError):
+            comp.descontar("antisarro", 5.0)
+        self.assertEqual(len(llamadas), 2)
+
+class TestMatrizStock(unittest.TestCase):
+    def test_crece_en_filas_y_columnas(self):
+        matriz = MatrizStock(filas_iniciales=2)
+        stocks = [matriz.nuevo_stock() for _ in range(5)]
+        skus = [f"SKU-{k}" for k in range(20)]        # más que las 8 columnas iniciales
+        for i, st in enumerate(stocks):
+            for k, sku in enumerate(skus):
+                st.disponer(sku, float(i * 100 + k))
+        self.assertEqual(len(matriz), 5)
+        self.assertEqual(matriz.datos.shape, (5, len(TIPOS_PRODUCTO) + 20))
+        for i, st in enumerate(stocks):
+            self.assertEqual(st.cantidades, {sku: float(i * 100 + k) for k, sku in enumerate(skus)})
+        self.assertEqual(matriz.columnas.nombres[:len(TIPOS_PRODUCTO)], list(TIPOS_PRODUCTO))
+
+    def test_submatriz_no_agrega_columnas(self):
+        matriz = MatrizStock()
+        a, b = matriz.nuevo_stock(), matriz.nuevo_stock()
+        a.disponer("cloro-granulado", 3.0)
+        b.disponer("CL-1", 4.0)
+        columnas = len(matriz.columnas)
+        sub = matriz.submatriz([1, 0], ["CL-1", "desconocido", "cloro-granulado"])
+        self.assertEqual(sub.tolist(), [[4.0, 0.0, 0.0], [0.0, 0.0, 3.0]])
+        self.assertEqual(len(matriz.columnas), columnas)
+        self.assertIsNone(matriz.columnas.buscar("desconocido"))
+        sub[0, 0] = 99.0                                # es una copia
+        self.assertEqual(b.disponible("CL-1"), 4.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# aqua_manager/tests/test_web_cache.py
+# Caché de respuestas de la API: If-None-Match, TTL/LRU de CacheRespuestas y ETag/304 en los endpoints
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+from AquaKeeper.config import constantes
+from AquaKeeper.entidades.modelo import Cliente, Pileta, Producto
+from AquaKeeper.servicios.inventario_service import InventarioLocal
+from AquaKeeper.servicios.pileta_service import PiletaService
+from AquaKeeper.web import main
+from AquaKeeper.web.cache import CacheRespuestas, coincide_etag, etag_de, version_config
+from AquaKeeper.web.estado import EstadoApp
+
+class TestCoincideEtag(unittest.TestCase):
+    def test_comparacion_debil(self):
+        etag = etag_de(b"{}")
+        self.assertFalse(coincide_etag(None, etag))
+        self.assertFalse(coincide_etag("", etag))
+        self.assertTrue(coincide_etag(etag, etag))
+        self.assertTrue(coincide_etag("W/" + etag, etag))
+        self.assertTrue(coincide_etag(f'"otro", {etag}', etag))
+        self.assertTrue(coincide_etag("*", etag))
+        self.assertFalse(coincide_etag('"otro"', etag))
+        self.assertFalse(coincide_etag(etag.strip('"'), etag))    # sin comillas no es el mismo ETag
+
+class TestCacheRespuestas(unittest.TestCase):
+    def test_lru_y_contadores(self):
+        cache = CacheRespuestas(max_entradas=2, ttl_s=60)
+        a = cache.guardar("a", b"1")
+        cache.guardar("b", b"2")
+        self.assertIs(cache.obtener("a"), a)        # "a" pasa a ser la más reciente
+        cache.guardar("c", b"1")
+        self.assertIsNone(cache.obtener("b"))
+        self.assertEqual(cache.obtener("c").etag, a.etag)      # mismo cuerpo -> mismo ETag
+        self.assertEqual((len(cache), cache.aciertos, cache.fallos), (2, 2, 1))
+        cache.limpiar()
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl(self):
+        cache = CacheRespuestas(ttl_s=10)
+        with mock.patch("AquaKeeper.web.cache.time.monotonic", return_value=100.0):
+            cache.guardar("a", b"1")
+        with mock.patch("AquaKeeper.web.cache.time.monotonic", return_value=109.9):
+            self.assertIsNotNone(cache.obtener("a"))
+        with mock.patch("AquaKeeper.web.cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.obtener("a"))
+        self.assertEqual(len(cache), 0)             # la vencida se descarta al pedirla
+
+    def test_version_config_cambia_con_las_constantes(self):
+        v = version_config()
+        self.assertEqual(version_config(), v)
+        with mock.patch.object(constantes, "PH_IDEAL_MAX", constantes.PH_IDEAL_MAX + 0.1):
+            self.assertNotEqual(version_config(), v)
+
+class TestEtagEndpoints(unittest.TestCase):
+    def setUp(self):
+        inv, svc = InventarioLocal(), PiletaService()
+        inv.registrar_producto(Producto("CL", "Cloro", "cloro-granulado", "g"), 500.0)
+        svc.registrar_cliente(Cliente("1", "Ana", "Calle 1"))
+        svc.registrar_pileta(Pileta("P1", 10000, "1"))
+        self.est = EstadoApp(inv, svc)
+        patch = mock.patch.object(main, "obtener_estado", return_value=self.est)
+        patch.start()
+        self.addCleanup(patch.stop)
+        main._cache.limpiar()
+        self.addCleanup(main._cache.limpiar)
+        self.cliente = TestClient(main.app)     # sin lifespan: no precalienta ni guarda estado
+
+    def test_304_con_el_mismo_etag(self):
+        for url in ("/api/productos", "/api/piletas", "/api/resumen?razon=choque"):
+            with self.subTest(url=url):
+                r = self.cliente.get(url)
+                self.assertEqual(r.status_code, 200)
+                etag = r.headers["etag"]
+                self.assertEqual(r.headers["cache-control"], "no-cache")
+                r2 = self.cliente.get(url, headers={"If-None-Match": etag})
+                self.assertEqual((r2.status_code, r2.content, r2.headers["etag"]), (304, b"", etag))
+                self.assertEqual(self.cliente.get(url, headers={"If-None-Match": '"otro"'}).status_code, 200)
+
+    def test_cambio_de_estado_cambia_el_etag(self):
+        r = self.cliente.get("/api/productos")
+        etag = r.headers["etag"]
+        self.est.inv.reponer("CL", 10.0)
+        r2 = self.cliente.get("/api/productos", headers={"If-None-Match": etag})
+        self.assertEqual(r2.status_code, 200)
+        self.assertNotEqual(r2.headers["etag"], etag)
+        self.assertEqual(r2.json()[0]["stock_local"], 510.0)
+
+    def test_sin_cambios_se_sirve_de_la_cache(self):
+        self.cliente.get("/api/piletas")
+        with mock.patch.object(self.est.svc, "pagina_piletas") as pagina:
+            self.assertEqual(self.cliente.get("/api/piletas").status_code, 200)
+            pagina.assert_not_called()
+        self.est.svc.actualizar_lectura("P1", ph=6.0)
+        self.assertEqual(self.cliente.get("/api/piletas").json()["items"][0]["ph"], 6.0)
+
+if __name__ == "__main__":
+    unittest.main()